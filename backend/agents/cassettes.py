@@ -0,0 +1,316 @@
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+# Cassettes capture every LLM call, tool call and top-level agent call made while
+# handling one request, with their timing, into a gzipped JSON file:
+#   {"version": 1, "name", "recordedAt", "request": {...},
+#    "interactions": [{"kind": "llm" | "tool" | "agent", "name", "key", "offsetMs", "durationMs",
+#                      "response": ... | "error": ...}]}
+# Prompts are not stored, only a fingerprint ("key") used to match calls on replay.
+# On replay, calls are answered from the cassette, matched by key and falling back
+# to recording order, after sleeping for the recorded duration times ``speed``.
+# Only active when settings.CASSETTE_MODE is "record" or "replay" (see model_router).
+
+CASSETTE_VERSION = 1
+
+_active: ContextVar[Optional["Cassette"]] = ContextVar("cassette", default=None)
+
+def interaction_key(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class Cassette:
+    def __init__(self, name: str, mode: str, request: Optional[Dict] = None,
+                 interactions: Optional[List[Dict]] = None, speed: float = 1.0):
+        self.name = name
+        self.mode = mode
+        self.request = request or {}
+        self.interactions: List[Dict] = interactions or []
+        self.speed = speed
+        self.started = time.perf_counter()
+        self.path: Optional[str] = None
+        self._pending = list(self.interactions) if mode == "replay" else []
+        self._write_lock = threading.Lock()
+        self._written = 0
+        self._saves: Set[asyncio.Future] = set()
+
+    @classmethod
+    def for_request(cls, method: str, path: str) -> "Cassette":
+        slug = re.sub(r"[^a-zA-Z0-9]+", "-", path).strip("-")[:60] or "root"
+        name = f"{datetime.now():%Y%m%d-%H%M%S}-{method.lower()}-{slug}-{uuid.uuid4().hex[:6]}"
+        return cls(name, "record", request={"method": method, "path": path})
+
+    @classmethod
+    def load(cls, path: str, speed: float = 1.0) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["name"], "replay", data.get("request"), data["interactions"], speed)
+
+    def record(self, kind: str, name: str, key: Optional[str], started: float,
+               response: Any = None, error: Optional[BaseException] = None) -> None:
+        interaction = {
+            "kind": kind,
+            "name": name,
+            "key": key,
+            "offsetMs": round(1000 * (started - self.started), 1),
+            "durationMs": round(1000 * (time.perf_counter() - started), 1),
+        }
+        if error is not None:
+            interaction["error"] = f"{type(error).__name__}: {error}"
+        else:
+            interaction["response"] = response
+        self.interactions.append(interaction)
+        # Speculative work spawned by the request can finish after it was saved.
+        if self.path:
+            self._save_in_background(self.path)
+
+    def take(self, kind: str, name: str, key: str) -> Dict:
+        """Pops the recorded interaction answering this call: same key, else the next one of its kind."""
+        matchers = (
+            lambda i: i["name"] == name and i["key"] == key,
+            lambda i: i["name"] == name,
+            lambda i: True,
+        )
+        for matches in matchers:
+            for index, interaction in enumerate(self._pending):
+                if interaction["kind"] == kind and matches(interaction):
+                    return self._pending.pop(index)
+        raise LookupError(f"Cassette '{self.name}' has no recorded {kind} call left for '{name}'.")
+
+    async def replay(self, interaction: Dict) -> Any:
+        if self.speed > 0:
+            await asyncio.sleep(interaction["durationMs"] / 1000 * self.speed)
+        return self._answer(interaction)
+
+    def replay_blocking(self, interaction: Dict) -> Any:
+        """``replay`` for synchronous model and tool calls."""
+        if self.speed > 0:
+            time.sleep(interaction["durationMs"] / 1000 * self.speed)
+        return self._answer(interaction)
+
+    @staticmethod
+    def _answer(interaction: Dict) -> Any:
+        if "error" in interaction:
+            raise RuntimeError(f"Replayed error: {interaction['error']}")
+        return interaction["response"]
+
+    def agent_calls(self) -> List[Dict]:
+        return [i for i in self.interactions if i["kind"] == "agent"]
+
+    def save(self, path: str) -> None:
+        self._write(path, self._snapshot())
+
+    def _snapshot(self) -> Dict:
+        # Taken on the calling thread; interactions are never modified once appended.
+        return {
+            "version": CASSETTE_VERSION,
+            "name": self.name,
+            "recordedAt": datetime.now().isoformat(),
+            "request": self.request,
+            "interactions": list(self.interactions),
+        }
+
+    def _write(self, path: str, data: Dict) -> None:
+        with self._write_lock:
+            # Background writes can finish out of order; never replace a newer snapshot.
+            if len(data["interactions"]) < self._written:
+                return
+            with gzip.open(path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"), default=str)
+            self._written = len(data["interactions"])
+
+    def _save_in_background(self, path: str) -> None:
+        """Re-saves after a late interaction without blocking the event loop on gzip and file IO."""
+        data = self._snapshot()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(path, data)
+            return
+        future = loop.create_task(asyncio.to_thread(self._write, path, data))
+        self._saves.add(future)
+        future.add_done_callback(self._saves.discard)
+
+    def close(self, directory: str) -> Optional[str]:
+        """Writes a recorded cassette if the request made any agent calls; returns its path."""
+        if self.mode != "record" or not self.interactions:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{self.name}.json.gz")
+        self._save_in_background(self.path)
+        return self.path
+
+@contextmanager
+def use_cassette(cassette: Cassette):
+    token = _active.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _active.reset(token)
+
+def active_cassette() -> Optional[Cassette]:
+    return _active.get()
+
+def recorded(method):
+    """Records a top-level agent call (arguments and result) so it can be re-run on replay."""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        cassette = active_cassette()
+        if cassette is None or cassette.mode != "record":
+            return await method(self, *args, **kwargs)
+        started = time.perf_counter()
+        result = await method(self, *args, **kwargs)
+        cassette.record("agent", f"{self.route}.{method.__name__}", None, started,
+                        {"args": list(args), "kwargs": kwargs, "result": result})
+        return result
+    return wrapper
+
+def _message_fingerprint(message) -> Dict:
+    # Message ids are assigned per run, so they are left out to keep keys stable across replays.
+    return {
+        "type": message.type,
+        "content": message.content,
+        "toolCalls": [{"name": c["name"], "args": c["args"]} for c in getattr(message, "tool_calls", None) or []],
+    }
+
+def cassette_chat_model(model: str, inner: Any, **model_kwargs):
+    """Wraps a chat model so calls are recorded to, or answered from, the active cassette."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import message_to_dict, messages_from_dict
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    class CassetteChatModel(BaseChatModel):
+        model_name: str
+        inner: Any = None
+
+        @property
+        def _llm_type(self) -> str:
+            return "cassette"
+
+        def bind_tools(self, tools, **kwargs):
+            return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+        def _key(self, messages, kwargs) -> str:
+            return interaction_key(self.model_name, [_message_fingerprint(m) for m in messages], kwargs.get("tools"))
+
+        @staticmethod
+        def _replayed(response: Dict):
+            message = messages_from_dict([response["message"]])[0]
+            return ChatResult(generations=[ChatGeneration(message=message)], llm_output=response.get("llmOutput"))
+
+        def _record(self, cassette, key: str, started: float, result=None, error=None) -> None:
+            if cassette is None:
+                return
+            if error is not None:
+                cassette.record("llm", self.model_name, key, started, error=error)
+            else:
+                cassette.record("llm", self.model_name, key, started, {
+                    "message": message_to_dict(result.generations[0].message),
+                    "llmOutput": result.llm_output,
+                })
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            cassette = active_cassette()
+            key = self._key(messages, kwargs)
+            if cassette is not None and cassette.mode == "replay":
+                return self._replayed(cassette.replay_blocking(cassette.take("llm", self.model_name, key)))
+            if self.inner is None:
+                raise RuntimeError("Replay mode needs an active cassette.")
+
+            started = time.perf_counter()
+            try:
+                result = self.inner._generate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self._record(cassette, key, started, error=e)
+                raise
+            self._record(cassette, key, started, result)
+            return result
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            cassette = active_cassette()
+            key = self._key(messages, kwargs)
+            if cassette is not None and cassette.mode == "replay":
+                return self._replayed(await cassette.replay(cassette.take("llm", self.model_name, key)))
+            if self.inner is None:
+                raise RuntimeError("Replay mode needs an active cassette.")
+
+            started = time.perf_counter()
+            try:
+                result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+            except Exception as e:
+                self._record(cassette, key, started, error=e)
+                raise
+            self._record(cassette, key, started, result)
+            return result
+
+    return CassetteChatModel(model_name=model, inner=inner, **model_kwargs)
+
+def wrap_tools(tools: List[Any]) -> List[Any]:
+    """Wraps agent tools for recording/replay; returns them unchanged when cassettes are off."""
+    from config import settings
+
+    if settings.CASSETTE_MODE not in ("record", "replay"):
+        return tools
+
+    from langchain_core.tools import BaseTool
+
+    class CassetteTool(BaseTool):
+        inner: Any
+
+        def _run(self, *args, **kwargs):
+            tool_input = kwargs or (args[0] if args else "")
+            cassette = active_cassette()
+            key = interaction_key(self.name, tool_input)
+            if cassette is not None and cassette.mode == "replay":
+                return cassette.replay_blocking(cassette.take("tool", self.name, key))
+            if self.inner is None:
+                raise RuntimeError("Replay mode needs an active cassette.")
+
+            started = time.perf_counter()
+            try:
+                output = self.inner.invoke(tool_input)
+            except Exception as e:
+                if cassette is not None:
+                    cassette.record("tool", self.name, key, started, error=e)
+                raise
+            if cassette is not None:
+                cassette.record("tool", self.name, key, started, output)
+            return output
+
+        async def _arun(self, *args, **kwargs):
+            tool_input = kwargs or (args[0] if args else "")
+            cassette = active_cassette()
+            key = interaction_key(self.name, tool_input)
+            if cassette is not None and cassette.mode == "replay":
+                return await cassette.replay(cassette.take("tool", self.name, key))
+            if self.inner is None:
+                raise RuntimeError("Replay mode needs an active cassette.")
+
+            started = time.perf_counter()
+            try:
+                output = await self.inner.ainvoke(tool_input)
+            except Exception as e:
+                if cassette is not None:
+                    cassette.record("tool", self.name, key, started, error=e)
+                raise
+            if cassette is not None:
+                cassette.record("tool", self.name, key, started, output)
+            return output
+
+    return [
+        CassetteTool(name=tool.name, description=tool.description, args_schema=tool.args_schema, inner=tool)
+        for tool in tools
+    ]
@@ -1,12 +1,19 @@
 
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from agents.model_router import model_router
+from agents.cassettes import recorded
+from agents.tracing import trace_config
 from typing import List, Dict
+import logging
+
+logger = logging.getLogger(__name__)
 
 class LevelDetectorAgent:
+    route = "level_detector"
+
     def __init__(self, api_key: str):
-        self.llm = ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key)
+        self.api_key = api_key
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", "You are an AI that classifies a student's skill level based on their quiz answers."),
             ("human", """Based on these 10 QA pairs, classify the user as Beginner / Intermediate / Advanced.
@@ -15,19 +22,33 @@ class LevelDetectorAgent:
             {qa_pairs}
             """)
         ])
-        self.chain = self.prompt | self.llm | StrOutputParser()
+        self._chains = {}
 
+    def _chain_for(self, model: str):
+        if model not in self._chains:
+            self._chains[model] = self.prompt | model_router.chat_model(model, api_key=self.api_key) | StrOutputParser()
+        return self._chains[model]
+
+    @recorded
     async def detect_level(self, qa_pairs: List[Dict]) -> str:
         qa_text = "\n".join([f"Q: {q['question']}\nA: {q['answer']}" for q in qa_pairs])
-        try:
-            level = await self.chain.ainvoke({"qa_pairs": qa_text})
-            valid_levels = ["Beginner", "Intermediate", "Advanced"]
-            level = level.strip()
-            if level in valid_levels:
-                return level
-            else:
-                print(f"Agent returned unexpected level: '{level}'. Defaulting to 'Beginner'.")
-                return "Beginner"
-        except Exception as e:
-            print(f"Error detecting skill level: {e}")
-            return "Beginner"
\ No newline at end of file
+        valid_levels = ["Beginner", "Intermediate", "Advanced"]
+        tiers = model_router.tiers(self.route)
+        model = tiers[0]
+        for model in tiers:
+            with model_router.observe(self.route, model) as call:
+                try:
+                    level = await self._chain_for(model).ainvoke({"qa_pairs": qa_text}, config=trace_config())
+                except Exception as e:
+                    logger.warning("Error detecting skill level with %s: %s", model, e, extra={"event": "agent.attempt_failed", "route": self.route})
+                    continue
+                level = level.strip().strip(".'\"").capitalize()
+                if level in valid_levels:
+                    call["ok"] = True
+                    model_router.record_request(self.route, model, ok=True)
+                    return level
+                logger.warning("Agent (%s) returned unexpected level %r, escalating", model, level, extra={"event": "agent.attempt_failed", "route": self.route})
+
+        logger.error("No model returned a valid level; defaulting to 'Beginner'", extra={"event": "agent.failed", "route": self.route})
+        model_router.record_request(self.route, model, ok=False)
+        return "Beginner"
@@ -0,0 +1,32 @@
+import importlib
+import logging
+import time
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# Agent modules pull in langchain, langchain_groq and the Tavily tooling, which
+# dominate process start-up. Routes import them inside the handlers instead of
+# at module level, and the API warms them in a background thread once it is up.
+AGENT_MODULES: Tuple[str, ...] = (
+    "agents.strategy_questions",
+    "agents.level_detector",
+    "agents.track_recommender",
+    "agents.roadmap_generator",
+)
+
+def warm_agent_modules() -> float:
+    """Imports every agent module so the first agent-backed request does not pay for it.
+
+    Meant to run off the event loop (e.g. via ``asyncio.to_thread``). Returns the
+    elapsed time in seconds.
+    """
+    started = time.perf_counter()
+    for module_name in AGENT_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logger.warning("Failed to warm agent module %s: %s", module_name, e)
+    elapsed = time.perf_counter() - started
+    logger.info("Agent modules warmed in %.2fs", elapsed)
+    return elapsed
@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from config import settings
+
+ROUTE_SETTINGS = {
+    "level_detector": "LEVEL_DETECTOR_MODELS",
+    "strategy_questions": "STRATEGY_QUESTIONS_MODELS",
+    "track_recommender": "TRACK_RECOMMENDER_MODELS",
+    "roadmap_generator": "ROADMAP_GENERATOR_MODELS",
+}
+
+# Token usage accumulator for the current task (and the tasks it spawns); see ModelRouter.meter_tokens.
+_token_meter: ContextVar[Optional[Dict[str, int]]] = ContextVar("token_meter", default=None)
+# Optional request limiter for the current task: ``await acquire()`` runs before every provider
+# request and ``record_tokens(n)`` after it (e.g. scripts/warm_cache.py's RateLimiter).
+_request_limiter: ContextVar[Optional[Any]] = ContextVar("request_limiter", default=None)
+
+def _usage_handler():
+    from langchain_core.callbacks import AsyncCallbackHandler
+
+    class TokenUsageHandler(AsyncCallbackHandler):
+        # Run in the calling task so the context variables resolve to the caller's meter and
+        # limiter, and so the request waits for the limiter before it is sent.
+        run_inline = True
+
+        async def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+            limiter = _request_limiter.get()
+            if limiter is not None:
+                await limiter.acquire()
+
+        async def on_llm_end(self, response, **kwargs) -> None:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            limiter = _request_limiter.get()
+            if limiter is not None:
+                limiter.record_tokens(token_usage.get("total_tokens", 0) or 0)
+            usage = _token_meter.get()
+            if usage is None:
+                return
+            usage["promptTokens"] += token_usage.get("prompt_tokens", 0) or 0
+            usage["completionTokens"] += token_usage.get("completion_tokens", 0) or 0
+            usage["totalTokens"] += token_usage.get("total_tokens", 0) or 0
+            usage["llmCalls"] += 1
+
+    return TokenUsageHandler()
+
+class _RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.escalated = 0
+        self.failed = 0
+        self.calls: Dict[str, Dict[str, Any]] = {}
+
+    def call_stats(self, model: str) -> Dict[str, Any]:
+        if model not in self.calls:
+            self.calls[model] = {"calls": 0, "failures": 0, "totalSeconds": 0.0, "recent": deque(maxlen=200)}
+        return self.calls[model]
+
+class ModelRouter:
+    """
+    Picks the Groq model for each agent call and escalates on validation failure.
+
+    Every route has an ordered list of models (``settings.<ROUTE>_MODELS``). Agents
+    start on the first, usually small and fast, model and move one tier up each time
+    their output fails validation. Latency per model and escalation rate per route
+    are kept in memory and exposed via ``snapshot()``.
+
+    Chat model clients are cached, and ``langchain_groq`` is imported on first use
+    only so importing the router stays cheap. With ``CASSETTE_MODE`` set, clients are
+    wrapped to record or replay their calls (see ``agents/cassettes.py``).
+    """
+
+    def __init__(self):
+        self._llms: Dict[Tuple, Any] = {}
+        self._usage_handler = None
+        self._stats: Dict[str, _RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def tiers(self, route: str) -> List[str]:
+        raw = getattr(settings, ROUTE_SETTINGS.get(route, ""), "") or "large"
+        aliases = {"small": settings.LLM_SMALL_MODEL, "large": settings.LLM_LARGE_MODEL}
+        models = [aliases.get(name.strip(), name.strip()) for name in raw.split(",") if name.strip()]
+        return models or [settings.LLM_LARGE_MODEL]
+
+    def model_for_attempt(self, route: str, attempt: int) -> str:
+        """Model to use for the given 0-based attempt; stays on the last tier once reached."""
+        tiers = self.tiers(route)
+        return tiers[min(attempt, len(tiers) - 1)]
+
+    def is_escalated(self, route: str, model: str) -> bool:
+        tiers = self.tiers(route)
+        return model in tiers and tiers.index(model) > 0
+
+    def chat_model(self, model: str, **llm_kwargs):
+        """Returns a shared ``ChatGroq`` client for ``model`` and the given options."""
+        key = (model, tuple(sorted(llm_kwargs.items())))
+        llm = self._llms.get(key)
+        if llm is None:
+            from langchain_groq import ChatGroq
+
+            if self._usage_handler is None:
+                self._usage_handler = _usage_handler()
+            if settings.CASSETTE_MODE in ("record", "replay"):
+                from agents.cassettes import cassette_chat_model
+
+                inner = ChatGroq(model=model, **llm_kwargs) if settings.CASSETTE_MODE == "record" else None
+                llm = cassette_chat_model(model, inner, callbacks=[self._usage_handler])
+            else:
+                llm = ChatGroq(model=model, callbacks=[self._usage_handler], **llm_kwargs)
+            self._llms[key] = llm
+        return llm
+
+    @contextmanager
+    def meter_tokens(self, limiter: Optional[Any] = None):
+        """
+        Collects token usage of every model call made inside the block (including spawned tasks).
+        With a ``limiter``, every provider request made inside the block is admitted by it first.
+        """
+        usage = {"promptTokens": 0, "completionTokens": 0, "totalTokens": 0, "llmCalls": 0}
+        token = _token_meter.set(usage)
+        limiter_token = _request_limiter.set(limiter)
+        try:
+            yield usage
+        finally:
+            _request_limiter.reset(limiter_token)
+            _token_meter.reset(token)
+
+    def _route_stats(self, route: str) -> _RouteStats:
+        if route not in self._stats:
+            self._stats[route] = _RouteStats()
+        return self._stats[route]
+
+    @contextmanager
+    def observe(self, route: str, model: str):
+        """Times one model call. Set ``call["ok"] = True`` inside the block when the output validated."""
+        call = {"ok": False}
+        started = time.perf_counter()
+        try:
+            yield call
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats = self._route_stats(route).call_stats(model)
+                stats["calls"] += 1
+                stats["totalSeconds"] += elapsed
+                stats["recent"].append(elapsed)
+                if not call["ok"]:
+                    stats["failures"] += 1
+
+    def record_request(self, route: str, final_model: str, ok: bool) -> None:
+        """Records the outcome of one agent request (possibly spanning several calls)."""
+        with self._lock:
+            stats = self._route_stats(route)
+            stats.requests += 1
+            if self.is_escalated(route, final_model):
+                stats.escalated += 1
+            if not ok:
+                stats.failed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {}
+            for route in ROUTE_SETTINGS:
+                stats = self._stats.get(route, _RouteStats())
+                models = {}
+                for model, call in stats.calls.items():
+                    recent: Deque[float] = call["recent"]
+                    ordered = sorted(recent)
+                    models[model] = {
+                        "calls": call["calls"],
+                        "failures": call["failures"],
+                        "avgLatencyMs": round(1000 * call["totalSeconds"] / call["calls"], 1) if call["calls"] else None,
+                        "p50LatencyMs": round(1000 * ordered[len(ordered) // 2], 1) if ordered else None,
+                        "p95LatencyMs": round(1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1) if ordered else None,
+                    }
+                result[route] = {
+                    "tiers": self.tiers(route),
+                    "requests": stats.requests,
+                    "escalationRate": round(stats.escalated / stats.requests, 3) if stats.requests else 0.0,
+                    "failureRate": round(stats.failed / stats.requests, 3) if stats.requests else 0.0,
+                    "models": models,
+                }
+            return result
+
+model_router = ModelRouter()
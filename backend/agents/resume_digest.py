@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RESUME_CACHE_DIR = os.path.join("data", ".resume_cache")
+DIGEST_VERSION = 1
+# Per-digest LRU of for_domain results; domains are free text, so the key space is open.
+DOMAIN_CACHE_SIZE = 256
+
+# Sections worth keeping even when they do not mention the domain explicitly.
+ALWAYS_RELEVANT_HEADINGS = ("skill", "summary", "profile", "objective", "technolog")
+
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "for", "to", "on", "with", "at", "by", "or",
+    "developer", "engineer", "dev", "specialist", "role", "career",
+}
+
+WORD_RE = re.compile(r"[a-z0-9+#.]+")
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting prompts."""
+    return math.ceil(len(text) / 4) if text else 0
+
+def _terms(text: str) -> List[str]:
+    return [w.strip(".") for w in WORD_RE.findall(text.lower()) if w.strip(".")]
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    if not stripped or len(stripped) > 60:
+        return False
+    if stripped.endswith(":"):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    return bool(letters) and all(c.isupper() for c in letters)
+
+def split_sections(resume_text: str) -> List[Dict]:
+    """Splits raw resume text into heading-delimited sections with whitespace compacted and duplicate lines dropped."""
+    sections: List[Dict] = []
+    current = {"heading": "", "lines": []}
+    seen = set()
+
+    for raw_line in resume_text.splitlines():
+        line = " ".join(raw_line.split())
+        if not line:
+            continue
+        if _is_heading(line):
+            if current["lines"] or current["heading"]:
+                sections.append(current)
+            current = {"heading": line.rstrip(":"), "lines": []}
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        current["lines"].append(line)
+
+    if current["lines"] or current["heading"]:
+        sections.append(current)
+
+    return [
+        {
+            "heading": section["heading"],
+            "text": "\n".join(section["lines"]),
+            "terms": sorted(set(_terms(section["heading"] + " " + " ".join(section["lines"])))),
+        }
+        for section in sections
+        if section["lines"]
+    ]
+
+class ResumeDigest:
+    """
+    Preprocessed, content-addressed view of a resume.
+
+    The raw file is split into compact sections once per content hash and cached on
+    disk under ``data/.resume_cache/<sha256>.json``; editing the resume changes the
+    hash, so stale digests are never served. ``for_domain`` then selects only the
+    sections relevant to the requested domain within a token budget.
+    """
+
+    _memory_cache: Dict[str, "ResumeDigest"] = {}
+    # path -> ((mtime_ns, size), digest): an unchanged file is not re-read or re-hashed.
+    _file_cache: Dict[str, Tuple[Tuple[int, int], "ResumeDigest"]] = {}
+
+    def __init__(self, content_hash: str, sections: List[Dict], raw_tokens: int):
+        self.content_hash = content_hash
+        self.sections = sections
+        self.raw_tokens = raw_tokens
+        self._domain_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+
+    @classmethod
+    def from_file(cls, path: str, cache_dir: Optional[str] = RESUME_CACHE_DIR) -> "ResumeDigest":
+        """``from_text`` for a resume file; raises OSError like ``open``."""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = cls._file_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with open(key, "r", encoding="utf-8") as file:
+            digest = cls.from_text(file.read(), cache_dir)
+        cls._file_cache[key] = (signature, digest)
+        return digest
+
+    @classmethod
+    def from_text(cls, resume_text: str, cache_dir: Optional[str] = RESUME_CACHE_DIR) -> "ResumeDigest":
+        content_hash = hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+        cached = cls._memory_cache.get(content_hash)
+        if cached is not None:
+            return cached
+
+        digest = cls._read_disk_cache(content_hash, cache_dir)
+        if digest is None:
+            digest = cls(content_hash, split_sections(resume_text), estimate_tokens(resume_text))
+            digest._write_disk_cache(cache_dir)
+
+        cls._memory_cache[content_hash] = digest
+        return digest
+
+    @classmethod
+    def _read_disk_cache(cls, content_hash: str, cache_dir: Optional[str]) -> Optional["ResumeDigest"]:
+        if not cache_dir:
+            return None
+        path = os.path.join(cache_dir, f"{content_hash}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") != DIGEST_VERSION:
+                return None
+            return cls(content_hash, data["sections"], data["raw_tokens"])
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            logger.warning("Ignoring corrupt resume digest cache %s: %s", path, e)
+            return None
+
+    def _write_disk_cache(self, cache_dir: Optional[str]) -> None:
+        if not cache_dir:
+            return
+        path = os.path.join(cache_dir, f"{self.content_hash}.json")
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"version": DIGEST_VERSION, "raw_tokens": self.raw_tokens, "sections": self.sections}, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write resume digest cache %s: %s", path, e)
+
+    def for_domain(self, domain: str, max_tokens: int = 400) -> str:
+        """Returns the domain-relevant sections of the resume, most relevant first, within ``max_tokens``."""
+        cache_key = (domain.strip().lower(), max_tokens)
+        if cache_key in self._domain_cache:
+            self._domain_cache.move_to_end(cache_key)
+            return self._domain_cache[cache_key]
+
+        domain_terms = {t for t in _terms(domain) if t not in STOPWORDS}
+        # Matching on the first four characters lets "frontend" hit "front-end"/"frontends"
+        # and "data" hit "database" (at half weight).
+        prefixes = {t[:4] for t in domain_terms if len(t) >= 4}
+
+        scored = []
+        for index, section in enumerate(self.sections):
+            section_terms = section["terms"]
+            score = sum(1 for t in section_terms if t in domain_terms)
+            score += 0.5 * sum(1 for t in section_terms if t[:4] in prefixes and t not in domain_terms)
+            if any(h in section["heading"].lower() for h in ALWAYS_RELEVANT_HEADINGS):
+                score += 1
+            if score > 0:
+                scored.append((score, index, section))
+
+        selected = []
+        used_tokens = 0
+        for _, index, section in sorted(scored, key=lambda item: (-item[0], item[1])):
+            block = f"{section['heading']}:\n{section['text']}" if section["heading"] else section["text"]
+            block_tokens = estimate_tokens(block)
+            if used_tokens + block_tokens > max_tokens:
+                remaining_chars = (max_tokens - used_tokens) * 4
+                if remaining_chars < 80:
+                    continue
+                # Leave room for the " ..." marker so the block stays within budget.
+                block = block[:remaining_chars - 4].rsplit(" ", 1)[0] + " ..."
+                block_tokens = estimate_tokens(block)
+            selected.append((index, block))
+            used_tokens += block_tokens
+
+        # Keep the original resume order so the digest still reads naturally.
+        digest = "\n\n".join(block for _, block in sorted(selected)) or "No domain-relevant resume details."
+        self._domain_cache[cache_key] = digest
+        if len(self._domain_cache) > DOMAIN_CACHE_SIZE:
+            self._domain_cache.popitem(last=False)
+        return digest
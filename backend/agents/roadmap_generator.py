@@ -1,20 +1,26 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain.tools.render import format_tool_to_openai_function
+from agents.model_router import model_router
+from agents.cassettes import recorded, wrap_tools
+from agents.tracing import trace_config
 from typing import List, Dict, Optional
 import json
+import logging
 import re
 import asyncio
-import traceback
+
+logger = logging.getLogger(__name__)
 
 class RoadmapGeneratorAgent:
+    route = "roadmap_generator"
+
     def __init__(self, api_key: str, tavily_api_key: str):
-        self.llm = ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key, temperature=0.5, max_tokens=4096) 
+        self.api_key = api_key
 
         self.tavily_tool = TavilySearchResults(api_key=tavily_api_key, max_results=3)
-        self.tools = [self.tavily_tool]
+        self.tools = wrap_tools([self.tavily_tool])
 
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an AI specialized in creating structured learning roadmaps. For each task, you MUST try to find a relevant, high-quality online resource link. Prioritize finding **YouTube video tutorials or playlists** for each task. Use the provided search tool to find these resources.
@@ -42,13 +48,17 @@ class RoadmapGeneratorAgent:
             MessagesPlaceholder(variable_name="agent_scratchpad")
         ])
 
-        self.agent_chain = create_tool_calling_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=self.prompt
-        )
+        self._executors = {}
 
-        self.executor = AgentExecutor(agent=self.agent_chain, tools=self.tools, verbose=True)
+    def _executor_for(self, model: str) -> AgentExecutor:
+        if model not in self._executors:
+            agent_chain = create_tool_calling_agent(
+                llm=model_router.chat_model(model, api_key=self.api_key, temperature=0.5, max_tokens=4096),
+                tools=self.tools,
+                prompt=self.prompt
+            )
+            self._executors[model] = AgentExecutor(agent=agent_chain, tools=self.tools, verbose=False)
+        return self._executors[model]
 
     def _extract_and_parse_json(self, text: str) -> Optional[List[Dict]]:
         """
@@ -61,60 +71,60 @@ class RoadmapGeneratorAgent:
         json_match_md = re.search(r'```json\s*(\[.*?\])\s*```', text, re.DOTALL)
         if json_match_md:
             json_str = json_match_md.group(1)
-            print(f"DEBUG: Found JSON in markdown block. Trying to parse: {json_str[:200]}...")
         
         if json_str is None:
             json_str_match = re.search(r'\[.*\]', text, re.DOTALL)
             if json_str_match:
                 json_str = json_str_match.group(0)
-                print(f"DEBUG: Found raw JSON array. Trying to parse: {json_str[:200]}...")
         
         if json_str:
             try:
                 parsed_json = json.loads(json_str)
                 if isinstance(parsed_json, list):
                     if all(isinstance(week, dict) and 'week' in week and 'tasks' in week and isinstance(week['tasks'], list) for week in parsed_json):
-                        print("DEBUG: JSON parsed and validated successfully.")
                         return parsed_json
                     else:
-                        print(f"DEBUG: JSON list found, but does not match expected RoadmapWeek structure criteria. Raw: {json_str[:500]}...")
+                        logger.debug("JSON does not match the RoadmapWeek structure", extra={"event": "agent.parse_failed", "route": self.route, "sample": json_str[:200]})
                         return None
             except json.JSONDecodeError as e:
-                print(f"DEBUG: Failed to parse extracted JSON string. Error: {e}. String (full): {json_str} \n--- Raw Text from LLM was: {text[:2000]}...")
+                logger.debug("Extracted JSON does not parse: %s", e, extra={"event": "agent.parse_failed", "route": self.route, "sample": json_str[:200]})
                 return None
         
-        print(f"DEBUG: No valid JSON array found in text after all attempts. Raw text (full): {text[:2000]}...")
+        logger.debug("No JSON array found in output", extra={"event": "agent.parse_failed", "route": self.route, "sample": text[:200]})
         return None
 
+    @recorded
     async def generate_roadmap(self, domain: str, level: str) -> List[Dict]:
         """Generates a weekly learning roadmap with retry logic."""
         max_retries = 3
         for attempt in range(max_retries):
-            print(f"Attempt {attempt + 1} to generate roadmap for {domain} ({level})...")
-            try:
-                agent_query_input = f"Domain: {domain}, Level: {level} learner. Generate a detailed roadmap."
-                
-                response = await self.executor.ainvoke({"input": agent_query_input})
-                
-                raw_agent_output = response.get("output")
+            model = model_router.model_for_attempt(self.route, attempt)
+            logger.info("Attempt %d to generate roadmap for %s (%s) with %s", attempt + 1, domain, level, model, extra={"event": "agent.attempt", "route": self.route})
+            with model_router.observe(self.route, model) as call:
+                try:
+                    agent_query_input = f"Domain: {domain}, Level: {level} learner. Generate a detailed roadmap."
+
+                    response = await self._executor_for(model).ainvoke({"input": agent_query_input}, config=trace_config())
 
-                if raw_agent_output:
-                    generated_weeks_data = self._extract_and_parse_json(raw_agent_output)
-                    
-                    if generated_weeks_data is not None:
-                        print(f"Roadmap generated successfully on attempt {attempt + 1}.")
-                        return generated_weeks_data
+                    raw_agent_output = response.get("output")
+
+                    if raw_agent_output:
+                        generated_weeks_data = self._extract_and_parse_json(raw_agent_output)
+
+                        if generated_weeks_data is not None:
+                            call["ok"] = True
+                            model_router.record_request(self.route, model, ok=True)
+                            return generated_weeks_data
+                        else:
+                            logger.warning("Attempt %d (%s): malformed roadmap JSON, retrying", attempt + 1, model, extra={"event": "agent.attempt_failed", "route": self.route})
                     else:
-                        print(f"Attempt {attempt + 1}: Agent returned malformed or unparseable JSON output for roadmap. Retrying...")
-                        await asyncio.sleep(2 * (attempt + 1))
-                else:
-                    print(f"Attempt {attempt + 1}: Agent response missing 'output' key. Raw response: {response}. Retrying...")
-                    await asyncio.sleep(2 * (attempt + 1))
+                        logger.warning("Attempt %d (%s): response has no output, retrying", attempt + 1, model, extra={"event": "agent.attempt_failed", "route": self.route})
 
-            except Exception as e:
-                print(f"Attempt {attempt + 1}: Error during agent execution: {e}. Retrying...")
-                traceback.print_exc()
+                except Exception as e:
+                    logger.warning("Attempt %d (%s): agent error: %s, retrying", attempt + 1, model, e, exc_info=True, extra={"event": "agent.attempt_failed", "route": self.route})
+            if attempt + 1 < max_retries and model_router.model_for_attempt(self.route, attempt + 1) == model:
                 await asyncio.sleep(2 * (attempt + 1))
-        
-        print(f"Failed to generate roadmap after {max_retries} attempts.")
+
+        model_router.record_request(self.route, model, ok=False)
+        logger.error("Failed to generate roadmap after %d attempts", max_retries, extra={"event": "agent.failed", "route": self.route})
         return []
\ No newline at end of file
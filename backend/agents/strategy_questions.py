@@ -1,17 +1,35 @@
 import json
+import logging
 import re
 import asyncio
 import os
 from typing import List, Dict, Optional
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from agents.resume_digest import ResumeDigest, estimate_tokens
+from agents.model_router import model_router
+from agents.cassettes import recorded
+from agents.tracing import trace_config
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_QUESTION_PREFIX = "Error-fallback question"
+
+def fallback_questions(domain: str) -> List[Dict]:
+    """Placeholder questions returned when every attempt failed, so the quiz can still start."""
+    return [{"id": i+1, "question": f"{FALLBACK_QUESTION_PREFIX} {i+1} for {domain}"} for i in range(10)]
+
+def is_fallback_questions(questions: List[Dict]) -> bool:
+    return any(str(item.get("question", "")).startswith(FALLBACK_QUESTION_PREFIX) for item in questions)
 
 class StrategyQuestionsAgent:
-    def __init__(self, api_key: str, resume_file: str = "data/resume.txt"):
-        self.llm = ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key)
+    route = "strategy_questions"
+
+    def __init__(self, api_key: str, resume_file: str = "data/resume.txt", resume_token_budget: int = 400):
+        self.api_key = api_key
         self.parser = JsonOutputParser()
-        self.resume_data = self._load_resume(resume_file)
+        self.resume_token_budget = resume_token_budget
+        self.resume_digest = self._load_resume_digest(resume_file)
         
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are an expert career guidance AI. Your task is to generate assessment questions tailored to a candidate's resume and a specified domain. Use the provided resume data to create relevant, in-depth strategy questions that assess the candidate's expertise in the domain. Provide the output as a JSON array of objects, where each object has an 'id' (integer, starting from 1) and 'question' (string). Do NOT include markdown backticks or extra text."""),
@@ -25,23 +43,21 @@ Example:
 Domain: {domain}
 """)
         ])
-        self.chain = self.prompt | self.llm
+        self._chains = {}
 
-    def _load_resume(self, resume_file: str) -> str:
+    def _chain_for(self, model: str):
+        if model not in self._chains:
+            self._chains[model] = self.prompt | model_router.chat_model(model, api_key=self.api_key)
+        return self._chains[model]
+
+    def _load_resume_digest(self, resume_file: str) -> ResumeDigest:
         try:
-            # Debug: Print current working directory to help troubleshoot
-            print(f"Current working directory: {os.getcwd()}")
-            print(f"Attempting to load resume file: {os.path.abspath(resume_file)}")
-            
-            with open(resume_file, 'r', encoding='utf-8') as file:
-                resume_content = file.read()
-            return resume_content
+            return ResumeDigest.from_file(resume_file)
         except FileNotFoundError:
-            print(f"Error: Resume file '{resume_file}' not found. Please ensure the file exists in the 'data' directory or provide the correct path.")
-            return "Resume data unavailable."
+            logger.warning("Resume file %s not found (cwd %s)", os.path.abspath(resume_file), os.getcwd(), extra={"event": "agent.resume_missing"})
         except Exception as e:
-            print(f"Error reading resume file: {e}")
-            return "Resume data unavailable."
+            logger.warning("Error reading resume file %s: %s", resume_file, e, extra={"event": "agent.resume_missing"})
+        return ResumeDigest.from_text("Resume data unavailable.")
 
     def _extract_and_parse_json(self, text: str) -> Optional[List[Dict]]:
         json_match = re.search(r'```json\s*(\[.*?\])\s*```', text, re.DOTALL)
@@ -52,7 +68,7 @@ Domain: {domain}
             if json_str_match:
                 json_str = json_str_match.group(0)
             else:
-                print(f"DEBUG: No JSON array found in text: {text[:500]}...")
+                logger.debug("No JSON array found in output", extra={"event": "agent.parse_failed", "route": self.route, "sample": text[:200]})
                 return None
         
         try:
@@ -60,38 +76,55 @@ Domain: {domain}
             if isinstance(parsed_json, list) and all(isinstance(q, dict) and 'id' in q and 'question' in q for q in parsed_json):
                 return parsed_json
             else:
-                print(f"DEBUG: JSON is list, but does not match Question structure: {json_str[:200]}...")
+                logger.debug("JSON does not match the Question structure", extra={"event": "agent.parse_failed", "route": self.route, "sample": json_str[:200]})
                 return None
         except json.JSONDecodeError:
-            print(f"DEBUG: Failed to parse extracted JSON string: {json_str[:200]}...")
+            logger.debug("Extracted JSON does not parse", extra={"event": "agent.parse_failed", "route": self.route, "sample": json_str[:200]})
             return None
         
         return None
 
+    def _resume_context(self, domain: str) -> str:
+        """Returns the compact, domain-relevant resume digest used in the prompt."""
+        resume_context = self.resume_digest.for_domain(domain, max_tokens=self.resume_token_budget)
+        raw_tokens, prompt_tokens = self.resume_digest.raw_tokens, estimate_tokens(resume_context)
+        logger.info("Resume context for %r: ~%d tokens raw -> ~%d tokens in prompt", domain, raw_tokens, prompt_tokens,
+                    extra={"event": "agent.resume_context", "route": self.route,
+                           "rawTokens": raw_tokens, "promptTokens": prompt_tokens})
+        return resume_context
+
+    @recorded
     async def generate_questions(self, domain: str) -> List[Dict]:
         max_retries = 3
+        resume_context = self._resume_context(domain)
         for attempt in range(max_retries):
-            try:
-                raw_response = await self.chain.ainvoke({
-                    "domain": domain,
-                    "resume_data": self.resume_data
-                })
-                
-                if hasattr(raw_response, 'content'):
-                    response_content = raw_response.content
-                else:
-                    response_content = str(raw_response)
+            model = model_router.model_for_attempt(self.route, attempt)
+            with model_router.observe(self.route, model) as call:
+                try:
+                    raw_response = await self._chain_for(model).ainvoke({
+                        "domain": domain,
+                        "resume_data": resume_context
+                    }, config=trace_config())
+
+                    if hasattr(raw_response, 'content'):
+                        response_content = raw_response.content
+                    else:
+                        response_content = str(raw_response)
 
-                response = self._extract_and_parse_json(response_content)
+                    response = self._extract_and_parse_json(response_content)
 
-                if response is not None:
-                    return response
-                else:
-                    print(f"Attempt {attempt + 1}: Agent returned malformed or unparseable JSON for questions. Retrying...")
-                    await asyncio.sleep(2 * (attempt + 1))
-            except Exception as e:
-                print(f"Attempt {attempt + 1}: Error generating strategy questions: {e}. Retrying...")
+                    if response is not None:
+                        call["ok"] = True
+                        model_router.record_request(self.route, model, ok=True)
+                        return response
+                    else:
+                        logger.warning("Attempt %d (%s): malformed questions JSON, retrying", attempt + 1, model, extra={"event": "agent.attempt_failed", "route": self.route})
+                except Exception as e:
+                    logger.warning("Attempt %d (%s): agent error: %s, retrying", attempt + 1, model, e, extra={"event": "agent.attempt_failed", "route": self.route})
+            # Escalating to a larger model is already a change of strategy; only back off when staying on the same tier.
+            if attempt + 1 < max_retries and model_router.model_for_attempt(self.route, attempt + 1) == model:
                 await asyncio.sleep(2 * (attempt + 1))
-        
-        print(f"Failed to generate strategy questions after {max_retries} attempts.")
-        return [{"id": i+1, "question": f"Error-fallback question {i+1} for {domain}"} for i in range(10)]
\ No newline at end of file
+
+        model_router.record_request(self.route, model, ok=False)
+        logger.error("Failed to generate strategy questions after %d attempts", max_retries, extra={"event": "agent.failed", "route": self.route})
+        return fallback_questions(domain)
\ No newline at end of file
@@ -0,0 +1,32 @@
+import logging
+from typing import Any, Dict
+from langchain_core.callbacks import BaseCallbackHandler
+from logging_config import agent_trace_var
+
+logger = logging.getLogger(__name__)
+
+def _clip(value: Any, limit: int = 1000) -> str:
+    text = str(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+class AgentTraceHandler(BaseCallbackHandler):
+    """Logs intermediate agent steps; replaces AgentExecutor(verbose=True) for traced requests only."""
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        text = response.generations[0][0].text if response.generations and response.generations[0] else ""
+        logger.info("LLM output", extra={"event": "agent.trace", "step": "llm", "output": _clip(text)})
+
+    def on_agent_action(self, action, **kwargs) -> None:
+        logger.info("Tool call %s", action.tool, extra={"event": "agent.trace", "step": "tool_call", "toolInput": _clip(action.tool_input, 500)})
+
+    def on_tool_end(self, output, **kwargs) -> None:
+        logger.info("Tool result", extra={"event": "agent.trace", "step": "tool_result", "output": _clip(output)})
+
+    def on_agent_finish(self, finish, **kwargs) -> None:
+        logger.info("Agent finished", extra={"event": "agent.trace", "step": "finish", "output": _clip(finish.return_values.get("output"))})
+
+_trace_handler = AgentTraceHandler()
+
+def trace_config() -> Dict:
+    """Runnable config for an agent call: traces steps when the current request asked for it."""
+    return {"callbacks": [_trace_handler]} if agent_trace_var.get() else {}
@@ -1,20 +1,27 @@
 
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain.tools.render import format_tool_to_openai_function
+from agents.model_router import model_router
+from agents.cassettes import recorded, wrap_tools
+from agents.tracing import trace_config
 from typing import List, Dict, Optional
 import json
+import logging
 import re
 import asyncio
 
+logger = logging.getLogger(__name__)
+
 class CareerTrackRecommenderAgent:
+    route = "track_recommender"
+
     def __init__(self, api_key: str, tavily_api_key: str):
-        self.llm = ChatGroq(model="llama-3.3-70b-versatile", api_key=api_key)
+        self.api_key = api_key
 
         self.tavily_tool = TavilySearchResults(api_key=tavily_api_key, max_results=5)
-        self.tools = [self.tavily_tool]
+        self.tools = wrap_tools([self.tavily_tool])
 
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", "You are an expert career guidance AI. Your goal is to suggest 2-3 career roles based on the user's domain and skill level, enriching them with salary, skills, tools, and growth prospects using web search tools if necessary. Your final answer MUST be a JSON array of objects as per the example provided, without any extra text, preamble, or markdown backticks."),
@@ -49,13 +56,17 @@ class CareerTrackRecommenderAgent:
             MessagesPlaceholder(variable_name="agent_scratchpad")
         ])
 
-        self.agent_chain = create_tool_calling_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=self.prompt
-        )
+        self._executors = {}
 
-        self.executor = AgentExecutor(agent=self.agent_chain, tools=self.tools, verbose=True)
+    def _executor_for(self, model: str) -> AgentExecutor:
+        if model not in self._executors:
+            agent_chain = create_tool_calling_agent(
+                llm=model_router.chat_model(model, api_key=self.api_key),
+                tools=self.tools,
+                prompt=self.prompt
+            )
+            self._executors[model] = AgentExecutor(agent=agent_chain, tools=self.tools, verbose=False)
+        return self._executors[model]
 
     def _extract_and_parse_json(self, text: str) -> Optional[List[Dict]]:
         json_match = re.search(r'```json\s*(\[.*?\])\s*```', text, re.DOTALL)
@@ -66,7 +77,7 @@ class CareerTrackRecommenderAgent:
             if json_str_match:
                 json_str = json_str_match.group(0)
             else:
-                print(f"DEBUG: No valid JSON array found in text: {text[:500]}...")
+                logger.debug("No JSON array found in output", extra={"event": "agent.parse_failed", "route": self.route, "sample": text[:200]})
                 return None
         
         try:
@@ -74,43 +85,48 @@ class CareerTrackRecommenderAgent:
             if isinstance(parsed_json, list) and all(isinstance(t, dict) and 'title' in t for t in parsed_json):
                 return parsed_json
             else:
-                print(f"DEBUG: JSON is list, but does not match CareerTrack structure: {json_str[:200]}...")
+                logger.debug("JSON does not match the CareerTrack structure", extra={"event": "agent.parse_failed", "route": self.route, "sample": json_str[:200]})
                 return None
         except json.JSONDecodeError:
-            print(f"DEBUG: Failed to parse extracted JSON string: {json_str[:200]}...")
+            logger.debug("Extracted JSON does not parse", extra={"event": "agent.parse_failed", "route": self.route, "sample": json_str[:200]})
             return None
         
         return None
 
+    @recorded
     async def recommend_tracks(self, domain: str, level: str) -> List[Dict]:
         max_retries = 3
         for attempt in range(max_retries):
-            try:
-                agent_query_input = (
-                    f"Suggest 2-3 career roles in the '{domain}' domain for a '{level}' learner."
-                    " Provide detailed information for each role, including average salary, key skills required,"
-                    " essential tools used, and potential career growth paths."
-                    " Utilize web search tools to gather accurate and up-to-date information."
-                    " Ensure the output is STRICTLY a JSON array as per the example provided, with no extra text or formatting."
-                )
-                
-                response = await self.executor.ainvoke({"input": agent_query_input})
+            model = model_router.model_for_attempt(self.route, attempt)
+            with model_router.observe(self.route, model) as call:
+                try:
+                    agent_query_input = (
+                        f"Suggest 2-3 career roles in the '{domain}' domain for a '{level}' learner."
+                        " Provide detailed information for each role, including average salary, key skills required,"
+                        " essential tools used, and potential career growth paths."
+                        " Utilize web search tools to gather accurate and up-to-date information."
+                        " Ensure the output is STRICTLY a JSON array as per the example provided, with no extra text or formatting."
+                    )
+
+                    response = await self._executor_for(model).ainvoke({"input": agent_query_input}, config=trace_config())
 
-                if "output" in response:
-                    tracks = self._extract_and_parse_json(response["output"])
-                    
-                    if tracks is not None:
-                        return tracks
+                    if "output" in response:
+                        tracks = self._extract_and_parse_json(response["output"])
+
+                        if tracks is not None:
+                            call["ok"] = True
+                            model_router.record_request(self.route, model, ok=True)
+                            return tracks
+                        else:
+                            logger.warning("Attempt %d (%s): malformed track JSON, retrying", attempt + 1, model, extra={"event": "agent.attempt_failed", "route": self.route})
                     else:
-                        print(f"Attempt {attempt + 1}: Agent returned malformed or unparseable JSON output. Retrying...")
-                        await asyncio.sleep(2 * (attempt + 1))
-                else:
-                    print(f"Attempt {attempt + 1}: Agent response missing 'output' key. Retrying...")
-                    await asyncio.sleep(2 * (attempt + 1))
+                        logger.warning("Attempt %d (%s): response has no output, retrying", attempt + 1, model, extra={"event": "agent.attempt_failed", "route": self.route})
 
-            except Exception as e:
-                print(f"Attempt {attempt + 1}: Error during agent execution: {e}. Retrying...")
+                except Exception as e:
+                    logger.warning("Attempt %d (%s): agent error: %s, retrying", attempt + 1, model, e, extra={"event": "agent.attempt_failed", "route": self.route})
+            if attempt + 1 < max_retries and model_router.model_for_attempt(self.route, attempt + 1) == model:
                 await asyncio.sleep(2 * (attempt + 1))
-        
-        print(f"Failed to recommend career tracks after {max_retries} attempts.")
+
+        model_router.record_request(self.route, model, ok=False)
+        logger.error("Failed to recommend career tracks after %d attempts", max_retries, extra={"event": "agent.failed", "route": self.route})
         return []
\ No newline at end of file
@@ -0,0 +1,121 @@
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Picks "br" or "gzip" from an Accept-Encoding header, honouring q-values; None for identity."""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        parts = [part.strip() for part in item.split(";")]
+        if not parts[0]:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        weights[parts[0].lower()] = q
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    available = [(weights.get(name, weights.get("*", 0.0)), -index, name) for index, name in enumerate(candidates)]
+    best = max(available)
+    return best[2] if best[0] > 0 else None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        # Streaming chunks are flushed so clients can consume each one as it arrives.
+        if self._brotli is not None:
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """
+    Compresses HTTP responses with brotli or gzip, negotiated from Accept-Encoding.
+
+    Single-body responses are compressed only when they reach ``minimum_size`` bytes;
+    streamed responses (e.g. NDJSON) are compressed chunk by chunk. Responses that
+    already carry a Content-Encoding or are not text/JSON pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Dict] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = {k.lower(): v for k, v in message.get("headers", [])}
+                content_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in response_headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                if not more_body:
+                    compressed = compressor.chunk(body, final=True)
+                    await send({**start_message, "headers": _compressed_headers(start_message, encoding, len(compressed))})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send({**start_message, "headers": _compressed_headers(start_message, encoding, None)})
+            await send({"type": "http.response.body", "body": compressor.chunk(body, final=not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+def _compressed_headers(start_message: Dict, encoding: str, content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+    headers = [(k, v) for k, v in start_message.get("headers", []) if k.lower() != b"content-length"]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode("latin-1")))
+    headers.append((b"content-encoding", encoding.encode("latin-1")))
+    vary = [v for k, v in headers if k.lower() == b"vary"]
+    if not any(b"accept-encoding" in v.lower() for v in vary):
+        headers.append((b"vary", b"Accept-Encoding"))
+    return headers
@@ -6,7 +6,55 @@ load_dotenv()
 class Settings:
     MONGO_URI: str = os.getenv("MONGO_URI", "mongodb://localhost:27017/pathfinder")
     DB_NAME: str = os.getenv("DB_NAME", "pathfinder")
+    # Write concern "w" values: an integer or "majority". Progress updates are frequent
+    # and idempotent, so they can be tuned separately from the rest.
+    MONGO_WRITE_CONCERN: str = os.getenv("MONGO_WRITE_CONCERN", "1")
+    MONGO_PROGRESS_WRITE_CONCERN: str = os.getenv("MONGO_PROGRESS_WRITE_CONCERN", "1")
     TAVILY_API_KEY: str = os.getenv("TAVILY_API_KEY", "YOUR_TAVILY_API_KEY")
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "YOUR_GROQ_API_KEY")
+    LLM_SMALL_MODEL: str = os.getenv("LLM_SMALL_MODEL", "llama-3.1-8b-instant")
+    LLM_LARGE_MODEL: str = os.getenv("LLM_LARGE_MODEL", "llama-3.3-70b-versatile")
+    # Comma-separated escalation order per agent; "small"/"large" resolve to the models above,
+    # anything else is used as a literal model id.
+    LEVEL_DETECTOR_MODELS: str = os.getenv("LEVEL_DETECTOR_MODELS", "small,large")
+    STRATEGY_QUESTIONS_MODELS: str = os.getenv("STRATEGY_QUESTIONS_MODELS", "small,large")
+    TRACK_RECOMMENDER_MODELS: str = os.getenv("TRACK_RECOMMENDER_MODELS", "small,large")
+    ROADMAP_GENERATOR_MODELS: str = os.getenv("ROADMAP_GENERATOR_MODELS", "large")
+    SPECULATIVE_TRACKS_MAX_CONCURRENCY: int = int(os.getenv("SPECULATIVE_TRACKS_MAX_CONCURRENCY", "8"))
+    SPECULATIVE_TRACKS_TTL_SECONDS: int = int(os.getenv("SPECULATIVE_TRACKS_TTL_SECONDS", "900"))
+    COHORT_MAX_CONCURRENCY: int = int(os.getenv("COHORT_MAX_CONCURRENCY", "4"))
+    # Mentor dashboard (POST /progress/batch): explicit session ids per request, and how many
+    # NDJSON records are written per chunk.
+    PROGRESS_BATCH_MAX_SESSIONS: int = int(os.getenv("PROGRESS_BATCH_MAX_SESSIONS", "2000"))
+    PROGRESS_BATCH_CHUNK_RECORDS: int = int(os.getenv("PROGRESS_BATCH_CHUNK_RECORDS", "50"))
+    # "auto" uses MongoDB change streams when the server supports them, else in-process pub/sub.
+    LIVE_UPDATES_MODE: str = os.getenv("LIVE_UPDATES_MODE", "auto")
+    # Cosine similarity (0-1) a free-text domain needs to be mapped onto a canonical domain.
+    DOMAIN_MATCH_THRESHOLD: float = float(os.getenv("DOMAIN_MATCH_THRESHOLD", "0.65"))
+    DOMAIN_INDEX_REFRESH_SECONDS: int = int(os.getenv("DOMAIN_INDEX_REFRESH_SECONDS", "300"))
+    # When set, /admin endpoints require a matching X-Admin-Key header.
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")
+    # "record" writes one cassette of LLM/tool calls per request to CASSETTE_DIR;
+    # "replay" answers them from cassettes (scripts/replay_cassette.py). Default "off".
+    CASSETTE_MODE: str = os.getenv("CASSETTE_MODE", "off")
+    CASSETTE_DIR: str = os.getenv("CASSETTE_DIR", "data/cassettes")
+    # Read-through cache for Session and CareerTrack documents (per worker); 0 disables it.
+    ENTITY_CACHE_SIZE: int = int(os.getenv("ENTITY_CACHE_SIZE", "10000"))
+    ENTITY_CACHE_TTL_SECONDS: float = float(os.getenv("ENTITY_CACHE_TTL_SECONDS", "60"))
+    # "local" or "capped" (broadcast invalidations to other workers through a capped collection).
+    CACHE_INVALIDATION: str = os.getenv("CACHE_INVALIDATION", "local")
+    CACHE_INVALIDATION_COLLECTION_MB: int = int(os.getenv("CACHE_INVALIDATION_COLLECTION_MB", "16"))
+    # Responses of at least this many bytes are compressed (brotli when the optional
+    # "brotli" package is installed and accepted, else gzip).
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", "6"))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", "5"))
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # "json" (one object per line) or "text".
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    # Comma-separated event=rate pairs, e.g. "agent.parse_failed=0.1"; unlisted events are always kept.
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    WARM_AGENTS_ON_STARTUP: bool = os.getenv("WARM_AGENTS_ON_STARTUP", "true").lower() == "true"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
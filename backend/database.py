@@ -1,8 +1,11 @@
 
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure, OperationFailure
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 client: AsyncIOMotorClient = None
 
 async def connect_to_mongodb():
@@ -15,12 +18,12 @@ async def connect_to_mongodb():
             serverSelectionTimeoutMS=10000
         )
         await client.admin.command('ping')
-        print("MongoDB connection established successfully.")
+        logger.info("MongoDB connection established successfully.")
     except (ConnectionFailure, OperationFailure) as e:
-        print(f"MongoDB connection failed: {e}")
+        logger.error("MongoDB connection failed: %s", e)
         raise
     except Exception as e:
-        print(f"An unexpected error occurred during MongoDB connection: {e}")
+        logger.exception("An unexpected error occurred during MongoDB connection: %s", e)
         raise
 
 async def close_mongodb_connection():
@@ -28,7 +31,7 @@ async def close_mongodb_connection():
     global client
     if client:
         client.close()
-        print("MongoDB connection closed.")
+        logger.info("MongoDB connection closed.")
 
 def get_database():
     """Returns the database instance."""
@@ -0,0 +1,324 @@
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from config import settings
+from repository import CanonicalDomainRepository
+
+logger = logging.getLogger(__name__)
+
+# Canonical domains seeded into an empty CanonicalDomain collection; maintained afterwards
+# through the /admin/domains endpoints.
+DEFAULT_CANONICAL_DOMAINS: List[Dict] = [
+    {"name": "Frontend Developer", "aliases": ["front end developer", "ui developer", "react developer"]},
+    {"name": "Backend Developer", "aliases": ["back end developer", "server side developer", "api developer"]},
+    {"name": "Full Stack Developer", "aliases": ["fullstack developer", "web developer", "mern stack developer", "mean stack developer"]},
+    {"name": "Mobile App Developer", "aliases": ["android developer", "ios developer", "flutter developer"]},
+    {"name": "Data Scientist", "aliases": ["data science"]},
+    {"name": "Data Analyst", "aliases": ["business analyst", "data analytics"]},
+    {"name": "Data Engineer", "aliases": ["big data engineer", "etl developer"]},
+    {"name": "Machine Learning Engineer", "aliases": ["ml engineer", "deep learning engineer"]},
+    {"name": "AI Engineer", "aliases": ["artificial intelligence engineer", "generative ai engineer", "llm engineer"]},
+    {"name": "DevOps Engineer", "aliases": ["site reliability engineer", "sre", "platform engineer"]},
+    {"name": "Cloud Engineer", "aliases": ["aws engineer", "azure engineer", "cloud architect"]},
+    {"name": "Cybersecurity Analyst", "aliases": ["security analyst", "cyber security", "information security"]},
+    {"name": "Software Engineer", "aliases": ["software developer", "programmer"]},
+    {"name": "QA Engineer", "aliases": ["software tester", "test automation engineer", "quality assurance"]},
+    {"name": "UI/UX Designer", "aliases": ["ux designer", "ui designer", "product designer"]},
+    {"name": "Game Developer", "aliases": ["unity developer", "game programmer"]},
+    {"name": "Blockchain Developer", "aliases": ["web3 developer", "smart contract developer"]},
+    {"name": "Embedded Systems Engineer", "aliases": ["embedded developer", "firmware engineer", "iot engineer"]},
+    {"name": "Database Administrator", "aliases": ["dba", "database engineer"]},
+    {"name": "Product Manager", "aliases": ["product owner"]},
+    {"name": "Digital Marketing Specialist", "aliases": ["digital marketing", "seo specialist"]},
+]
+
+ABBREVIATIONS = {
+    "dev": "developer", "devs": "developer", "developers": "developer",
+    "eng": "engineer", "engg": "engineer", "engineers": "engineer",
+    "fe": "frontend", "be": "backend",
+    "ml": "machine learning", "dl": "deep learning",
+    "swe": "software engineer", "sde": "software developer",
+    "ds": "data science", "js": "javascript",
+}
+
+# Words naming a kind of role rather than a domain, grouped into families that may stand in
+# for one another ("frontend engineer" is a Frontend Developer, a "game designer" is not a
+# Game Developer). Seniority words qualify a role without changing it.
+ROLE_FAMILIES = {
+    "developer": "build", "engineer": "build", "programmer": "build",
+    "designer": "design", "architect": "architecture", "manager": "management", "owner": "management",
+    "analyst": "analysis", "scientist": "science", "administrator": "administration",
+    "specialist": "specialist", "consultant": "consulting", "tester": "testing",
+}
+SENIORITY_WORDS = {"senior", "junior", "lead", "principal", "staff", "intern", "trainee", "entry", "level"}
+
+_JOINED_PREFIXES = re.compile(r"\b(front|back|full)[\s\-_]+(end|stack)\b")
+_NON_ALNUM = re.compile(r"[^a-z0-9+#]+")
+
+def normalize_text(text: str) -> str:
+    text = text.lower().replace("&", " and ")
+    text = _JOINED_PREFIXES.sub(r"\1\2", text)
+    words = _NON_ALNUM.sub(" ", text).split()
+    # A lone token is kept as typed: "be" or "ds" on its own is not a role to expand.
+    if len(words) < 2:
+        return " ".join(words)
+    return " ".join(ABBREVIATIONS.get(word, word) for word in words)
+
+def char_ngrams(text: str, n: int = 3) -> Dict[str, int]:
+    counts: Dict[str, int] = defaultdict(int)
+    for word in text.split():
+        padded = f" {word} "
+        for i in range(max(1, len(padded) - n + 1)):
+            counts[padded[i:i + n]] += 1
+    return counts
+
+def _words_match(query_word: str, known_word: str, min_similarity: float = 0.6) -> bool:
+    """Typos and abbreviations of a word ("sciencee", "cyber" for "cybersecurity") match it."""
+    if query_word == known_word or (len(query_word) >= 3 and known_word.startswith(query_word)):
+        return True
+    query_grams, known_grams = char_ngrams(query_word), char_ngrams(known_word)
+    shared = sum(min(count, known_grams[gram]) for gram, count in query_grams.items() if gram in known_grams)
+    return 2 * shared / (sum(query_grams.values()) + sum(known_grams.values())) >= min_similarity
+
+def _split_words(normalized: str) -> Tuple[List[str], Set[str]]:
+    """The distinguishing words of a surface form, and the role families it names."""
+    words, roles = [], set()
+    for word in normalized.split():
+        if word in ROLE_FAMILIES:
+            roles.add(ROLE_FAMILIES[word])
+        elif word not in SENIORITY_WORDS:
+            words.append(word)
+    return words, roles
+
+class DomainNormalizationIndex:
+    """
+    Maps free-text domains to canonical ones with character 3-gram TF-IDF and cosine
+    similarity. Every canonical name and alias is one indexed surface form.
+
+    Lookups go through an inverted index in two steps. Candidates are gathered from the
+    ``grams_per_word`` rarest grams of each query word, whose posting lists are sorted by
+    weight and capped at ``max_postings`` (common grams such as "dev" would otherwise touch
+    most forms). The best ``candidates`` of them are then scored exactly against their full
+    vectors. This keeps lookups under a millisecond for thousands of canonical domains
+    (see tests/test_domain_index.py).
+
+    Cosine similarity alone lets shared role words carry unrelated roles ("Project Manager"
+    onto Product Manager), so a candidate domain must also account for the query's words:
+    every distinguishing word that some canonical domain knows has to match one of that
+    domain's words, and role words must be of a family the domain uses. A query that fits
+    several domains equally well ("data") matches none of them.
+    """
+
+    def __init__(self, threshold: float, max_postings: int = 1024, candidates: int = 24, grams_per_word: int = 2):
+        self.threshold = threshold
+        self.grams_per_word = grams_per_word
+        self.max_postings = max_postings
+        self.candidates = candidates
+        self._exact: Dict[str, int] = {}
+        self._idf: Dict[str, float] = {}
+        self._max_idf = 1.0
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self._form_domain: List[int] = []
+        self._form_vectors: List[Dict[str, float]] = []
+        self._word_domains: Dict[str, Set[int]] = {}
+        self._word_grams: Dict[str, List[str]] = {}
+        self._domain_roles: List[Set[str]] = []
+        self._domains: List[Dict] = []
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    def build(self, entries: List[Dict]) -> None:
+        forms: List[Tuple[int, Dict[str, int]]] = []
+        exact: Dict[str, int] = {}
+        word_domains: Dict[str, Set[int]] = defaultdict(set)
+        domain_roles: List[Set[str]] = []
+        for domain_index, entry in enumerate(entries):
+            roles: Set[str] = set()
+            for surface in [entry["name"], *entry.get("aliases", [])]:
+                normalized = normalize_text(surface)
+                if not normalized:
+                    continue
+                exact.setdefault(normalized, domain_index)
+                forms.append((domain_index, char_ngrams(normalized)))
+                words, form_roles = _split_words(normalized)
+                for word in words:
+                    word_domains[word].add(domain_index)
+                roles |= form_roles
+            domain_roles.append(roles)
+        word_grams: Dict[str, List[str]] = defaultdict(list)
+        for word in word_domains:
+            for gram in char_ngrams(word):
+                word_grams[gram].append(word)
+
+        document_frequency: Dict[str, int] = defaultdict(int)
+        for _, grams in forms:
+            for gram in grams:
+                document_frequency[gram] += 1
+        idf = {gram: math.log((1 + len(forms)) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+
+        postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        form_domain = []
+        form_vectors = []
+        for form_index, (domain_index, grams) in enumerate(forms):
+            weights = {gram: (1 + math.log(count)) * idf[gram] for gram, count in grams.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            vector = {gram: weight / norm for gram, weight in weights.items()}
+            for gram, weight in vector.items():
+                postings[gram].append((form_index, weight))
+            form_domain.append(domain_index)
+            form_vectors.append(vector)
+        capped = {
+            gram: sorted(entries_for_gram, key=lambda posting: -posting[1])[:self.max_postings]
+            for gram, entries_for_gram in postings.items()
+        }
+
+        # Swap everything at once so concurrent lookups never see a half-built index.
+        (self._exact, self._idf, self._max_idf, self._postings, self._form_domain, self._form_vectors,
+         self._word_domains, self._word_grams, self._domain_roles, self._domains) = (
+            exact, idf, max(idf.values(), default=1.0), capped, form_domain, form_vectors,
+            dict(word_domains), dict(word_grams), domain_roles, list(entries)
+        )
+
+    def lookup(self, text: str) -> Optional[Tuple[Dict, float]]:
+        """Returns (canonical entry, similarity) for the best match above the threshold, else None."""
+        normalized = normalize_text(text)
+        # "Senior Data Engineer" is a Data Engineer; seniority would only dilute the match.
+        normalized = " ".join(word for word in normalized.split() if word not in SENIORITY_WORDS) or normalized
+        domains = self._domains
+        if not normalized or not domains:
+            return None
+        if normalized in self._exact:
+            return domains[self._exact[normalized]], 1.0
+
+        allowed = self._consistent_domains(normalized)
+        if not allowed:
+            return None
+
+        idf, postings, form_domain = self._idf, self._postings, self._form_domain
+        # N-grams no canonical form contains still count towards the query norm (with the
+        # highest idf), so unmatched words pull the similarity down instead of being ignored.
+        weights = {gram: (1 + math.log(count)) * idf.get(gram, self._max_idf) for gram, count in char_ngrams(normalized).items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+
+        partial: Dict[int, float] = defaultdict(float)
+        for gram in self._selective_grams(normalized):
+            weight = weights[gram]
+            for form_index, form_weight in postings[gram]:
+                if form_domain[form_index] in allowed:
+                    partial[form_index] += weight * form_weight
+        if not partial:
+            return None
+
+        form_vectors = self._form_vectors
+        candidates = heapq.nlargest(self.candidates, partial, key=partial.__getitem__)
+        best_score, best_form = max(
+            (sum(weight * form_vectors[form_index].get(gram, 0.0) for gram, weight in weights.items()), form_index)
+            for form_index in candidates
+        )
+        best_score /= norm
+        if best_score < self.threshold:
+            return None
+        return domains[form_domain[best_form]], round(best_score, 3)
+
+    def _consistent_domains(self, normalized: str) -> Set[int]:
+        """The domains whose words and roles account for the query; empty when none or several fit."""
+        words, roles = _split_words(normalized)
+        allowed: Optional[Set[int]] = None
+        for word in words:
+            domains = self._domains_for_word(word)
+            # Words no canonical domain knows ("javascript" in "react js developer") neither
+            # confirm nor rule out a domain.
+            if domains:
+                allowed = domains if allowed is None else allowed & domains
+        if not allowed:
+            return set()
+        if roles:
+            domain_roles = self._domain_roles
+            allowed = {domain for domain in allowed if not domain_roles[domain] or roles & domain_roles[domain]}
+        elif len(allowed) > 1:
+            return set()
+        return allowed
+
+    def _domains_for_word(self, word: str) -> Set[int]:
+        word_domains = self._word_domains
+        if word in word_domains:
+            return word_domains[word]
+        candidates = {known for gram in char_ngrams(word) for known in self._word_grams.get(gram, ())}
+        domains: Set[int] = set()
+        for known in candidates:
+            if _words_match(word, known):
+                domains |= word_domains[known]
+        return domains
+
+    def _selective_grams(self, normalized: str) -> List[str]:
+        # The grams of one word are strongly correlated; the rarest few per word are enough
+        # to find candidates, and the exact rescoring still uses every gram.
+        grams = []
+        for word in normalized.split():
+            known = [gram for gram in char_ngrams(word) if gram in self._postings]
+            known.sort(key=lambda gram: -self._idf[gram])
+            grams.extend(known[:self.grams_per_word])
+        return list(dict.fromkeys(grams))
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Domain index refresh failed; keeping the previous index.", exc_info=task.exception(),
+                     extra={"event": "domain_index.refresh_failed"})
+
+class DomainNormalizer:
+    """Process-wide index backed by the CanonicalDomain collection, refreshed periodically."""
+
+    def __init__(self):
+        self.index = DomainNormalizationIndex(settings.DOMAIN_MATCH_THRESHOLD)
+        self.loaded_at = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+
+    async def load(self) -> None:
+        repository = CanonicalDomainRepository()
+        entries = await repository.list_all()
+        if not entries:
+            await repository.seed([{"_id": normalize_text(entry["name"]), **entry} for entry in DEFAULT_CANONICAL_DOMAINS])
+            entries = await repository.list_all()
+        self.index.build(entries)
+        self.loaded_at = time.monotonic()
+        logger.info("Domain index loaded with %d canonical domains.", len(self.index))
+
+    def _refresh_if_stale(self) -> None:
+        stale = time.monotonic() - self.loaded_at > settings.DOMAIN_INDEX_REFRESH_SECONDS
+        if stale and (self._refreshing is None or self._refreshing.done()):
+            self._refreshing = asyncio.create_task(self.load())
+            self._refreshing.add_done_callback(_log_refresh_failure)
+
+    def resolve(self, domain: str) -> Optional[Tuple[str, float]]:
+        """Returns (canonical domain name, similarity), or None when nothing is close enough."""
+        self._refresh_if_stale()
+        match = self.index.lookup(domain)
+        if match is None:
+            return None
+        entry, score = match
+        return entry["name"], score
+
+    def session_fields(self, domain: str) -> Dict:
+        """The canonicalDomain/domainMatchScore fields stored on a new session."""
+        match = self.resolve(domain)
+        if match is None:
+            return {}
+        name, score = match
+        return {"canonicalDomain": name, "domainMatchScore": score}
+
+    def canonical_or_raw(self, domain: str) -> str:
+        match = self.resolve(domain)
+        return match[0] if match else domain
+
+def session_domain(session_doc: Dict) -> str:
+    """The domain content is generated and grouped for: the canonical one when the input matched."""
+    return session_doc.get("canonicalDomain") or session_doc["domain"]
+
+domain_normalizer = DomainNormalizer()
@@ -0,0 +1,199 @@
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+from database import get_database
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Document = Dict[str, Any]
+
+INVALIDATION_COLLECTION = "CacheInvalidation"
+
+class TTLCache:
+    """
+    Bounded LRU cache of whole documents by id with a per-entry TTL.
+
+    Readers take ``version`` before going to Mongo and pass it to ``put``; any
+    invalidation in between bumps the version, so a read that raced a write never
+    re-caches the old document.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, Tuple[float, Document]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Document]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, document: Document, version: Optional[int] = None) -> None:
+        if self.max_entries <= 0 or (version is not None and version != self.version):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, document)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        self.version += 1
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.version += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+session_cache = TTLCache("session", settings.ENTITY_CACHE_SIZE, settings.ENTITY_CACHE_TTL_SECONDS)
+track_cache = TTLCache("careerTrack", settings.ENTITY_CACHE_SIZE, settings.ENTITY_CACHE_TTL_SECONDS)
+
+def _cacheable(projection: Optional[Document]) -> bool:
+    # Whole documents are cached; top-level inclusion projections are applied in memory.
+    return projection is None or all(value == 1 and "." not in key for key, value in projection.items())
+
+def _project(document: Document, projection: Optional[Document]) -> Document:
+    # Always a fresh dict, so callers never modify the cached document itself.
+    if projection is None:
+        return dict(document)
+    return {key: value for key, value in document.items() if key == "_id" or key in projection}
+
+async def read_through(cache: TTLCache, collection, entity_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+    """``find_one`` by id, served from ``cache`` when possible."""
+    if cache.max_entries <= 0 or not _cacheable(projection):
+        return await collection.find_one({"_id": ObjectId(entity_id)}, projection)
+    document = cache.get(entity_id)
+    if document is None:
+        version = cache.version
+        document = await collection.find_one({"_id": ObjectId(entity_id)})
+        if document is None:
+            return None
+        cache.put(entity_id, document, version)
+    return _project(document, projection)
+
+def remember(cache: TTLCache, documents: List[Document], version: int) -> None:
+    """Caches whole documents read by another query (e.g. all tracks of a session); ``version`` as for ``put``."""
+    for document in documents:
+        cache.put(str(document["_id"]), document, version)
+
+async def broadcast_invalidations(entity: str, entity_ids: List[str], origin: str = "offline",
+                                  batch_size: int = 1000) -> None:
+    """
+    Tells every worker tailing the invalidation collection (CACHE_INVALIDATION=capped) to
+    drop these entries; also used by offline scripts that write cached collections directly.
+    """
+    collection = get_database()[INVALIDATION_COLLECTION]
+    for start in range(0, len(entity_ids), batch_size):
+        await collection.insert_many([
+            {"entity": entity, "id": entity_id, "origin": origin, "at": datetime.now()}
+            for entity_id in entity_ids[start:start + batch_size]
+        ])
+
+class CacheInvalidationBus:
+    """
+    Drops cache entries after writes. With CACHE_INVALIDATION=capped, invalidations are
+    also written to a capped collection that every worker tails, so other workers drop
+    their copies too; otherwise (single worker, or staleness up to the TTL is acceptable)
+    they stay local.
+    """
+
+    def __init__(self, caches: Dict[str, TTLCache]):
+        self.caches = caches
+        self.origin = uuid.uuid4().hex
+        self.mode = "local"
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if settings.CACHE_INVALIDATION != "capped":
+            return
+        db = get_database()
+        try:
+            await db.create_collection(
+                INVALIDATION_COLLECTION, capped=True, size=settings.CACHE_INVALIDATION_COLLECTION_MB * 1024 * 1024
+            )
+        except CollectionInvalid:
+            pass
+        self.mode = "capped"
+        self._listener = asyncio.create_task(self._listen())
+        logger.info("Entity cache: cross-worker invalidation via capped collection.")
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def invalidate(self, entity: str, entity_ids: List[str]) -> None:
+        cache = self.caches[entity]
+        for entity_id in entity_ids:
+            cache.invalidate(entity_id)
+        if self.mode == "capped" and entity_ids:
+            await broadcast_invalidations(entity, entity_ids, self.origin)
+
+    async def _listen(self) -> None:
+        collection = get_database()[INVALIDATION_COLLECTION]
+        since = datetime.now()
+        while True:
+            try:
+                cursor = collection.find({"at": {"$gte": since}}, cursor_type=CursorType.TAILABLE_AWAIT)
+                async for event in cursor:
+                    since = max(since, event["at"])
+                    cache = self.caches.get(event.get("entity"))
+                    if cache is not None and event.get("origin") != self.origin:
+                        cache.invalidate(event["id"])
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                # Events may have been missed while disconnected; start over with empty caches.
+                logger.warning("Entity cache: invalidation stream interrupted (%s); clearing caches.", e)
+                for cache in self.caches.values():
+                    cache.clear()
+                since = datetime.now() - timedelta(seconds=1)
+            # A tailable cursor also ends when the collection is empty; poll again shortly.
+            await asyncio.sleep(1)
+
+cache_bus = CacheInvalidationBus({"session": session_cache, "careerTrack": track_cache})
+
+def cache_stats() -> Dict[str, Any]:
+    return {
+        "invalidation": cache_bus.mode,
+        "caches": {name: cache.stats() for name, cache in cache_bus.caches.items()},
+    }
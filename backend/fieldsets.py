@@ -0,0 +1,61 @@
+
+from typing import Any, Dict, Iterable, Optional, Set
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+Document = Dict[str, Any]
+
+# Sparse fieldsets: ``?fields=domain,level,careerTracks.title`` returns only those fields.
+# Field names are the response model's; nested fields use "<parent>.<child>", and a bare
+# parent ("careerTracks") means all of its fields. The selection is pushed down to the
+# Mongo projection, and work for unrequested parts (e.g. roadmap templates) is skipped.
+
+SESSION_FIELDS = ("sessionId", "domain", "canonicalDomain", "level", "createdAt")
+TRACK_FIELDS = ("trackId", "title", "avgSalary", "skills", "tools", "growth", "isEnrolled")
+
+# Response field -> (stored field, key in the response). Ids are serialized as in the full
+# responses: sessions expose "sessionId", tracks keep the "_id" alias.
+_ID_FIELDS = {"sessionId": ("_id", "sessionId"), "trackId": ("_id", "_id")}
+
+def parse_fields(raw: Optional[str], allowed: Iterable[str]) -> Optional[Set[str]]:
+    """Parses a ``fields`` query parameter; None means the full response."""
+    if not raw:
+        return None
+    fields = {field.strip() for field in raw.split(",") if field.strip()}
+    unknown = sorted(fields - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}.")
+    return fields or None
+
+def nested_fields(fields: Set[str], parent: str, children: Iterable[str]) -> Set[str]:
+    """The requested children of ``parent``; all of them when the parent itself was requested."""
+    if parent in fields:
+        return set(children)
+    prefix = parent + "."
+    return {field[len(prefix):] for field in fields if field.startswith(prefix)}
+
+def wants(fields: Set[str], parent: str) -> bool:
+    return parent in fields or any(field.startswith(parent + ".") for field in fields)
+
+def mongo_projection(fields: Iterable[str]) -> Document:
+    projection = {_ID_FIELDS.get(field, (field,))[0]: 1 for field in fields}
+    return projection or {"_id": 1}
+
+def ordered(fields: Set[str], names: Iterable[str]) -> list:
+    return [name for name in names if name in fields]
+
+def select(document: Document, fields: Iterable[str]) -> Document:
+    """Builds the sparse response entry for a stored document."""
+    selected: Document = {}
+    for field in fields:
+        if field in _ID_FIELDS:
+            stored, key = _ID_FIELDS[field]
+            selected[key] = str(document[stored])
+        else:
+            selected[field] = document.get(field)
+    return selected
+
+def sparse_response(content: Any) -> JSONResponse:
+    # Bypasses the route's response_model, whose required fields may have been left out.
+    return JSONResponse(jsonable_encoder(content))
@@ -0,0 +1,212 @@
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+from pymongo.errors import OperationFailure, PyMongoError
+from database import get_database
+from config import settings
+from repository import RoadmapRepository, RoadmapTemplateRepository
+from roadmap_templates import is_completed
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+OVERLAY_PROJECTION = {"sessionId": 1, "trackId": 1, "templateId": 1, "completed": 1, "linkOverrides": 1}
+
+class LiveUpdateHub:
+    """
+    Fans out small task-level diffs for a session to every connected WebSocket client.
+
+    Changes arrive either from one shared MongoDB change stream (multi-node, needs a
+    replica set) or, on a single node, from the write paths calling ``notify_*``
+    directly. Both feed the same diffing against the last known overlay state of
+    each subscribed session, so a change is delivered once however it was observed.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.mode = "local"
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._state: Dict[str, Dict[str, Dict]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        requested = settings.LIVE_UPDATES_MODE
+        if requested == "local":
+            return
+        try:
+            # Change streams need a replica set or sharded cluster; standalone servers do not support them.
+            hello = await get_database().command("hello")
+            if not hello.get("setName") and hello.get("msg") != "isdbgrid":
+                raise OperationFailure("server is a standalone instance")
+            self.mode = "change-stream"
+            self._listener = asyncio.create_task(self._listen())
+            logger.info("Live updates: using MongoDB change streams.")
+        except PyMongoError as e:
+            if requested == "change-stream":
+                raise
+            logger.info("Live updates: change streams unavailable (%s); using in-process pub/sub.", e)
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def subscribe(self, session_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if session_id not in self._subscribers:
+            # The state must exist before the session is registered: notifications only look
+            # at registered sessions and may arrive while the overlays are being read.
+            overlays = await RoadmapRepository().list_for_session(session_id, OVERLAY_PROJECTION)
+            if session_id not in self._subscribers:
+                self._state[session_id] = {str(doc["_id"]): self._snapshot(doc) for doc in overlays}
+                self._subscribers[session_id] = set()
+        self._subscribers[session_id].add(queue)
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(session_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[session_id]
+            self._state.pop(session_id, None)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @staticmethod
+    def _snapshot(overlay: Dict) -> Dict:
+        return {
+            "trackId": overlay.get("trackId"),
+            "templateId": overlay.get("templateId"),
+            "completed": list(overlay.get("completed", [])),
+            "linkOverrides": dict(overlay.get("linkOverrides", {}))
+        }
+
+    def _publish(self, session_id: str, events: List[Event]) -> None:
+        for queue in self._subscribers.get(session_id, ()):
+            for event in events:
+                if queue.full():
+                    # A client this far behind should refetch rather than replay a backlog.
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait({"type": "resync", "sessionId": session_id})
+                    break
+                queue.put_nowait(event)
+
+    async def notify_roadmap(self, overlay: Dict) -> None:
+        """Diffs an updated overlay against the last known state and publishes task-level changes."""
+        session_id = overlay.get("sessionId")
+        state = self._state.get(session_id)
+        if session_id not in self._subscribers or state is None or not overlay.get("templateId"):
+            return
+
+        overlay_id = str(overlay["_id"])
+        previous = state.get(overlay_id)
+        current = self._snapshot(overlay)
+        state[overlay_id] = current
+
+        if previous is None or previous["templateId"] != current["templateId"]:
+            self._publish(session_id, [{"type": "roadmap", "sessionId": session_id, "trackId": current["trackId"]}])
+            return
+
+        template = await RoadmapTemplateRepository().get(current["templateId"])
+        if not template:
+            return
+
+        events = []
+        index = 0
+        for week_data in template["weeks"]:
+            for task_item in week_data["tasks"]:
+                key = str(index)
+                was_done = is_completed(previous["completed"], index)
+                now_done = is_completed(current["completed"], index)
+                old_link = previous["linkOverrides"].get(key, task_item.get("resourceLink"))
+                new_link = current["linkOverrides"].get(key, task_item.get("resourceLink"))
+                if was_done != now_done or old_link != new_link:
+                    events.append({
+                        "type": "task",
+                        "sessionId": session_id,
+                        "trackId": current["trackId"],
+                        "week": week_data["week"],
+                        "task": task_item["task"],
+                        "isCompleted": now_done,
+                        "resourceLink": new_link
+                    })
+                index += 1
+        self._publish(session_id, events)
+
+    def notify_enrollment(self, track: Dict) -> None:
+        session_id = track.get("sessionId")
+        if session_id in self._subscribers:
+            self._publish(session_id, [{
+                "type": "enrollment",
+                "sessionId": session_id,
+                "trackId": str(track["_id"]),
+                "isEnrolled": track.get("isEnrolled", False)
+            }])
+
+    async def local_roadmap_change(self, overlay: Dict) -> None:
+        """Called by write paths; a no-op when the change stream already delivers the change."""
+        if self.mode != "local":
+            return
+        # The write has already happened; a failed notification must not fail the request.
+        try:
+            await self.notify_roadmap(overlay)
+        except Exception:
+            logger.exception("Live updates: failed to publish roadmap change", extra={"event": "live_updates.publish_failed"})
+
+    def local_enrollment_change(self, track: Dict) -> None:
+        if self.mode != "local":
+            return
+        try:
+            self.notify_enrollment(track)
+        except Exception:
+            logger.exception("Live updates: failed to publish enrollment change", extra={"event": "live_updates.publish_failed"})
+
+    async def _listen(self) -> None:
+        db = get_database()
+        pipeline = [
+            {"$match": {
+                "ns.coll": {"$in": ["Roadmap", "CareerTrack"]},
+                "operationType": {"$in": ["insert", "update", "replace"]}
+            }},
+            {"$project": {
+                "ns": 1,
+                "fullDocument._id": 1, "fullDocument.sessionId": 1, "fullDocument.trackId": 1,
+                "fullDocument.templateId": 1, "fullDocument.completed": 1, "fullDocument.linkOverrides": 1,
+                "fullDocument.isEnrolled": 1, "updateDescription.updatedFields.isEnrolled": 1
+            }}
+        ]
+        while True:
+            try:
+                async with db.watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        document = change.get("fullDocument")
+                        if not document or document.get("sessionId") not in self._subscribers:
+                            continue
+                        # One bad event must not end the stream that every subscriber shares.
+                        try:
+                            if change["ns"]["coll"] == "Roadmap":
+                                await self.notify_roadmap(document)
+                            elif "isEnrolled" in change.get("updateDescription", {}).get("updatedFields", {}):
+                                self.notify_enrollment(document)
+                        except PyMongoError:
+                            raise
+                        except Exception:
+                            logger.exception("Live updates: failed to publish change for session %s",
+                                             document.get("sessionId"), extra={"event": "live_updates.publish_failed"})
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.warning("Live updates: change stream interrupted (%s); reconnecting.", e)
+                await asyncio.sleep(1)
+
+live_hub = LiveUpdateHub()
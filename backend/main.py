@@ -1,17 +1,31 @@
 
-from fastapi import FastAPI
+import asyncio
+import logging
+import uuid
+from fastapi import FastAPI, Request
 from dotenv import load_dotenv
 import os
 from fastapi.middleware.cors import CORSMiddleware
+from compression import CompressionMiddleware
 
 
+from pymongo.errors import OperationFailure
 from database import connect_to_mongodb, close_mongodb_connection
+from repository import RoadmapRepository, CohortJobResultRepository
+from config import settings
+from logging_config import configure_logging, request_id_var, agent_trace_var
+from agents.loader import warm_agent_modules
+from live_updates import live_hub
+from entity_cache import cache_bus
+from domain_index import domain_normalizer
+from agents.cassettes import Cassette, use_cassette
 
-from routes import domain, quiz, career, roadmap, tracker, summary
+from routes import domain, quiz, career, roadmap, tracker, summary, metrics, cohort, analytics, admin
 
 load_dotenv() 
 
-
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Agentic Career Pathfinder API",
@@ -26,18 +40,66 @@ app.add_middleware(
     allow_methods=["*"], 
     allow_headers=["*"], 
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+async def record_agent_cassettes(request: Request, call_next):
+    """With CASSETTE_MODE=record, captures each request's LLM and tool calls into a cassette file."""
+    cassette = Cassette.for_request(request.method, request.url.path)
+    with use_cassette(cassette):
+        try:
+            return await call_next(request)
+        finally:
+            path = cassette.close(settings.CASSETTE_DIR)
+            if path:
+                logger.info("Recorded cassette %s", path, extra={"event": "cassette.recorded"})
+
+# Only registered when recording, so other modes do not pay for an extra HTTP middleware.
+if settings.CASSETTE_MODE == "record":
+    app.middleware("http")(record_agent_cassettes)
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """Tags every log line of a request with its id; X-Agent-Trace: 1 logs its agent steps."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    trace = request.headers.get("X-Agent-Trace") == "1" and (
+        not settings.ADMIN_API_KEY or request.headers.get("X-Admin-Key") == settings.ADMIN_API_KEY
+    )
+    request_token = request_id_var.set(request_id)
+    trace_token = agent_trace_var.set(trace)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(request_token)
+        agent_trace_var.reset(trace_token)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 @app.on_event("startup")
 async def startup_event():
     """Connects to MongoDB when the application starts."""
     await connect_to_mongodb()
-    print("Connected to MongoDB")
+    logger.info("Connected to MongoDB")
+    for repository in (RoadmapRepository(), CohortJobResultRepository()):
+        try:
+            await repository.ensure_indexes()
+        except OperationFailure as e:
+            # Queries still work without them, only slower (e.g. a read-only database user).
+            logger.warning("Could not create %s indexes: %s", repository.collection_name, e)
+    await domain_normalizer.load()
+    await cache_bus.start()
+    await live_hub.start()
+    if settings.WARM_AGENTS_ON_STARTUP:
+        # Agent imports are deferred to keep cold start cheap; load them in the
+        # background so Mongo-only endpoints can serve immediately.
+        app.state.agent_warmup = asyncio.create_task(asyncio.to_thread(warm_agent_modules))
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Closes the MongoDB connection when the application shuts down."""
+    await live_hub.stop()
+    await cache_bus.stop()
     await close_mongodb_connection()
-    print("Disconnected from MongoDB")
+    logger.info("Disconnected from MongoDB")
 
 app.include_router(domain.router, tags=["Domain Selection"])
 app.include_router(quiz.router, tags=["Quiz & Skill Assessment"])
@@ -45,6 +107,10 @@ app.include_router(career.router, tags=["Career Tracks"])
 app.include_router(roadmap.router, tags=["Roadmap Generation"])
 app.include_router(tracker.router, tags=["Progress Tracker"])
 app.include_router(summary.router, tags=["Session Summary"])
+app.include_router(analytics.router, tags=["Progress Analytics"])
+app.include_router(cohort.router, tags=["Cohort Onboarding"])
+app.include_router(metrics.router, tags=["Metrics"])
+app.include_router(admin.router, tags=["Admin"])
 
 @app.get("/")
 async def root():
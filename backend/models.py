@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel, Field, BeforeValidator, HttpUrl
-from typing import List, Optional, Annotated
+from typing import Dict, List, Optional, Annotated
 from datetime import datetime
 from bson import ObjectId
 
@@ -28,6 +28,21 @@ class TaskUpdate(BaseModel):
 class EnrollTrackUpdate(BaseModel):
     isEnrolled: bool
 
+class CohortStudent(BaseModel):
+    externalId: Optional[str] = Field(default=None, description="Caller's identifier for the student, echoed back in the job results")
+    domain: str
+    answers: Optional[List[QuizAnswer]] = Field(default=None, description="10 quiz answers; students without answers are onboarded as 'Beginner'")
+
+class CohortOnboardRequest(BaseModel):
+    cohortId: Optional[str] = None
+    students: List[CohortStudent]
+    maxConcurrency: Optional[int] = Field(default=None, ge=1, le=32)
+
+class ProgressBatchRequest(BaseModel):
+    sessionIds: Optional[List[str]] = Field(default=None, description="Sessions to report; sessions without a roadmap are reported with zero totals")
+    cohortId: Optional[str] = Field(default=None, description="Report every session of this cohort that has a roadmap")
+    includeWeeks: bool = False
+
 
 class Question(BaseModel):
     id: int
@@ -38,6 +53,35 @@ class InitDomainResponse(BaseModel):
     quizId: str
     questions: List[Question]
 
+class CohortJobResponse(BaseModel):
+    jobId: str
+    cohortId: str
+    status: str
+    totalStudents: int
+    totalGroups: int
+    completedGroups: int = 0
+    failedGroups: int = 0
+    onboardedStudents: int = 0
+    groups: List[dict] = []
+    results: List[dict] = []
+    createdAt: datetime
+    finishedAt: Optional[datetime] = None
+
+class CanonicalDomainInput(BaseModel):
+    name: str = Field(..., min_length=1)
+    aliases: List[str] = []
+
+class CanonicalDomainResponse(BaseModel):
+    id: str
+    name: str
+    aliases: List[str] = []
+
+class DomainResolveResponse(BaseModel):
+    input: str
+    canonicalDomain: Optional[str] = None
+    score: Optional[float] = None
+    lookupMicros: float
+
 class LevelPredictionResponse(BaseModel):
     level: str 
     nextStep: str
@@ -86,6 +130,7 @@ class SingleTrackWithRoadmapResponse(BaseModel):
 class SessionFullDataResponse(BaseModel): 
     sessionId: str
     domain: str
+    canonicalDomain: Optional[str] = None
     level: Optional[str] = None
     createdAt: datetime
     careerTracks: List[FullCareerTrack] = []
@@ -98,9 +143,35 @@ class SessionFullDataResponse(BaseModel):
             ObjectId: str
         }
 
+class ProgressCounter(BaseModel):
+    completed: int = 0
+    total: int = 0
+    percent: float = 0.0
+
+class WeekProgress(ProgressCounter):
+    week: int
+
+class TrackProgress(ProgressCounter):
+    trackId: str
+    weeks: List[WeekProgress] = []
+
+class SessionProgressResponse(ProgressCounter):
+    sessionId: str
+    tracks: List[TrackProgress] = []
+
+class AggregateProgressResponse(BaseModel):
+    groupBy: str
+    key: str
+    sessions: int = 0
+    roadmaps: int = 0
+    completedTasks: int = 0
+    totalTasks: int = 0
+    percent: float = 0.0
+
 class SessionDetailsResponse(BaseModel): 
     sessionId: str
     domain: str
+    canonicalDomain: Optional[str] = None
     level: Optional[str] = None
     createdAt: datetime
 
@@ -117,7 +188,10 @@ class SessionDetailsResponse(BaseModel):
 class SessionDocument(BaseModel): 
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
     domain: str
+    canonicalDomain: Optional[str] = None
+    domainMatchScore: Optional[float] = None
     level: Optional[str] = None
+    cohortId: Optional[str] = None
     createdAt: datetime = Field(default_factory=datetime.now)
 
     class Config:
@@ -150,10 +224,32 @@ class QuizDocument(BaseModel):
     class Config:
         arbitrary_types_allowed = True
 
+class RoadmapTemplateTask(BaseModel):
+    task: str
+    resourceLink: Optional[str] = None
+
+class RoadmapTemplateWeek(BaseModel):
+    week: int
+    tasks: List[RoadmapTemplateTask]
+
+class RoadmapTemplateDocument(BaseModel): 
+    id: str = Field(alias="_id", description="sha256 of the canonical roadmap content")
+    weeks: List[RoadmapTemplateWeek]
+    taskCount: int
+    createdAt: datetime = Field(default_factory=datetime.now)
+
+    class Config:
+        populate_by_name = True
+
 class RoadmapDocument(BaseModel): 
     sessionId: str
     trackId: str
-    weeks: List[RoadmapWeek]
+    templateId: Optional[str] = None
+    completed: List[int] = []
+    linkOverrides: Dict[str, Optional[str]] = {}
+    progress: Optional[dict] = None
+    groupKeys: List[str] = []
+    weeks: Optional[List[RoadmapWeek]] = None  # legacy documents embed their full content
 
     class Config:
         arbitrary_types_allowed = True
\ No newline at end of file
@@ -0,0 +1,62 @@
+
+import asyncio
+from typing import Dict, List, Optional
+from repository import SessionRepository, ProgressAggregateRepository
+
+# Completion counters are kept at three levels and only ever changed with $inc:
+#   Roadmap.progress          per track (overlay), with a per-week breakdown
+#   Session.progress          per session, summed over its tracks
+#   ProgressAggregate         per group ("domain:<domain>", "cohort:<id>")
+# Totals are added when a roadmap overlay is created; completed counts move by
+# exactly one when a task's completion bit actually flips.
+
+AGGREGATE_GROUPS = ("domain", "cohort")
+
+def domain_key(domain: str) -> str:
+    return " ".join(domain.split()).lower()
+
+def aggregate_keys(domain: Optional[str], cohort_id: Optional[str] = None) -> List[str]:
+    keys = []
+    if domain:
+        keys.append(f"domain:{domain_key(domain)}")
+    if cohort_id:
+        keys.append(f"cohort:{cohort_id}")
+    return keys
+
+def percent(completed: int, total: int) -> float:
+    return round(100.0 * completed / total, 1) if total else 0.0
+
+async def record_new_sessions(group_keys: List[str], count: int = 1) -> None:
+    await ProgressAggregateRepository().increment(group_keys, sessions=count)
+
+async def record_new_roadmap(session_id: str, group_keys: List[str], task_count: int) -> None:
+    """Adds a freshly created roadmap's tasks to the session and group totals."""
+    await asyncio.gather(
+        SessionRepository().increment_progress(session_id, total=task_count),
+        ProgressAggregateRepository().increment(group_keys, roadmaps=1, total_tasks=task_count)
+    )
+
+async def record_completion_change(session_id: str, group_keys: List[str], delta: int) -> None:
+    """Propagates a task completion flip (+1 / -1) from the overlay to session and group counters."""
+    await asyncio.gather(
+        SessionRepository().increment_progress(session_id, completed=delta),
+        ProgressAggregateRepository().increment(group_keys, completed_tasks=delta)
+    )
+
+def has_counters(overlay: Dict) -> bool:
+    # Overlays migrated before counters existed may only carry $inc'd "completed" values.
+    return "total" in (overlay.get("progress") or {})
+
+def track_progress_fields(progress: Dict) -> Dict:
+    """Shapes an overlay's stored counters for the API."""
+    weeks = sorted(progress.get("weeks", {}).items(), key=lambda item: int(item[0]))
+    return {
+        "completed": progress.get("completed", 0),
+        "total": progress.get("total", 0),
+        "percent": percent(progress.get("completed", 0), progress.get("total", 0)),
+        "weeks": [
+            {"week": int(week), "completed": counts.get("completed", 0), "total": counts.get("total", 0),
+             "percent": percent(counts.get("completed", 0), counts.get("total", 0))}
+            for week, counts in weeks
+        ]
+    }
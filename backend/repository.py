@@ -0,0 +1,374 @@
+
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.write_concern import WriteConcern
+from database import get_database
+from config import settings
+from entity_cache import session_cache, track_cache, cache_bus, read_through, remember
+
+Document = Dict[str, Any]
+
+SESSION_DETAILS_PROJECTION = {"domain": 1, "canonicalDomain": 1, "level": 1, "createdAt": 1}
+SESSION_PROFILE_PROJECTION = {"domain": 1, "canonicalDomain": 1, "level": 1, "cohortId": 1, "tracksGeneratedFor": 1}
+TRACK_SESSION_PROJECTION = {"sessionId": 1}
+
+def _write_concern(value: str) -> WriteConcern:
+    return WriteConcern(w=int(value) if value.isdigit() else value)
+
+class BaseRepository:
+    """Thin typed wrapper over one MongoDB collection."""
+
+    collection_name: str = ""
+    write_concern_setting: str = "MONGO_WRITE_CONCERN"
+
+    def __init__(self, db=None):
+        self.db = db if db is not None else get_database()
+        self.collection = self.db[self.collection_name].with_options(
+            write_concern=_write_concern(getattr(settings, self.write_concern_setting))
+        )
+
+    async def insert_many(self, documents: List[Document]) -> None:
+        """Bulk-inserts documents (unordered, so one bad document does not stop the rest)."""
+        if documents:
+            await self.collection.insert_many(documents, ordered=False)
+
+class SessionRepository(BaseRepository):
+    collection_name = "Session"
+
+    async def create(self, document: Document) -> str:
+        result = await self.collection.insert_one(document)
+        return str(result.inserted_id)
+
+    async def get(self, session_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+        return await read_through(session_cache, self.collection, session_id, projection)
+
+    async def list_all(self, projection: Optional[Document] = SESSION_DETAILS_PROJECTION) -> List[Document]:
+        return await self.collection.find({}, projection).to_list(length=None)
+
+    async def set_level(self, session_id: str, level: str) -> Optional[Document]:
+        """Stores the detected level and returns the session profile, or None if it does not exist."""
+        session = await self.collection.find_one_and_update(
+            {"_id": ObjectId(session_id)},
+            {"$set": {"level": level}},
+            projection=SESSION_PROFILE_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+        await cache_bus.invalidate("session", [session_id])
+        return session
+
+    async def mark_tracks_generated(self, session_id: str, level: str) -> None:
+        """Records that the stored career tracks were generated for ``level``."""
+        await self.collection.update_one({"_id": ObjectId(session_id)}, {"$set": {"tracksGeneratedFor": level}})
+        await cache_bus.invalidate("session", [session_id])
+
+    async def increment_progress(self, session_id: str, completed: int = 0, total: int = 0) -> None:
+        await self.collection.update_one(
+            {"_id": ObjectId(session_id)},
+            {"$inc": {"progress.completed": completed, "progress.total": total}}
+        )
+        await cache_bus.invalidate("session", [session_id])
+
+class QuizRepository(BaseRepository):
+    collection_name = "Quiz"
+
+    async def create(self, document: Document) -> str:
+        result = await self.collection.insert_one(document)
+        return str(result.inserted_id)
+
+    async def save_answers(self, quiz_id: str, session_id: str, answers: List[Document]) -> Optional[Document]:
+        """Stores the answers and returns the updated quiz, or None if it does not belong to the session."""
+        return await self.collection.find_one_and_update(
+            {"_id": ObjectId(quiz_id), "sessionId": session_id},
+            {"$set": {"answers": answers}},
+            projection={"answers": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+class CareerTrackRepository(BaseRepository):
+    collection_name = "CareerTrack"
+
+    async def get(self, track_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+        return await read_through(track_cache, self.collection, track_id, projection)
+
+    async def list_for_session(self, session_id: str, projection: Optional[Document] = None) -> List[Document]:
+        version = track_cache.version
+        tracks = await self.collection.find({"sessionId": session_id}, projection).to_list(length=None)
+        if projection is None:
+            remember(track_cache, tracks, version)
+        return tracks
+
+    async def upsert_many(self, session_id: str, tracks: List[Document]) -> List[Document]:
+        """Upserts tracks by (sessionId, title) in one bulk write and returns all tracks of the session."""
+        if tracks:
+            await self.collection.bulk_write(
+                [
+                    UpdateOne({"sessionId": session_id, "title": track["title"]}, {"$set": track}, upsert=True)
+                    for track in tracks
+                ],
+                ordered=False,
+            )
+        stored = await self.collection.find({"sessionId": session_id}).to_list(length=None)
+        await cache_bus.invalidate("careerTrack", [str(doc["_id"]) for doc in stored])
+        remember(track_cache, stored, track_cache.version)
+        return stored
+
+    async def set_enrollment(self, track_id: str, is_enrolled: bool) -> Optional[Document]:
+        track = await self.collection.find_one_and_update(
+            {"_id": ObjectId(track_id)},
+            {"$set": {"isEnrolled": is_enrolled}},
+            return_document=ReturnDocument.AFTER,
+        )
+        await cache_bus.invalidate("careerTrack", [track_id])
+        return track
+
+class RoadmapRepository(BaseRepository):
+    collection_name = "Roadmap"
+    write_concern_setting = "MONGO_PROGRESS_WRITE_CONCERN"
+
+    # by_session reads by sessionId ($in) or by cohort group key, both ordered by sessionId.
+    INDEXES = [
+        IndexModel([("sessionId", ASCENDING)]),
+        IndexModel([("groupKeys", ASCENDING), ("sessionId", ASCENDING)]),
+    ]
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(self.INDEXES)
+
+    async def insert(self, document: Document) -> str:
+        result = await self.collection.insert_one(document)
+        return str(result.inserted_id)
+
+    async def get_for_track(self, track_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+        return await self.collection.find_one({"trackId": track_id}, projection)
+
+    async def get_for_session(self, session_id: str, projection: Optional[Document] = None) -> Optional[Document]:
+        return await self.collection.find_one({"sessionId": session_id}, projection)
+
+    async def map_by_track(self, track_ids: List[str], projection: Optional[Document] = None) -> Dict[str, Document]:
+        """Fetches the roadmaps of several tracks in one query, keyed by trackId."""
+        if not track_ids:
+            return {}
+        cursor = self.collection.find({"trackId": {"$in": track_ids}}, projection)
+        return {doc["trackId"]: doc async for doc in cursor}
+
+    async def list_for_session(self, session_id: str, projection: Optional[Document] = None) -> List[Document]:
+        return await self.collection.find({"sessionId": session_id}, projection).to_list(length=None)
+
+    def by_session(self, query: Document, projection: Optional[Document] = None):
+        """Cursor over the overlays matching ``query``, grouped by session (ordered by sessionId)."""
+        return self.collection.find(query, projection).sort("sessionId", 1)
+
+    async def update_task_state(self, roadmap_id: ObjectId, update: Document, projection: Optional[Document] = None,
+                                extra_filter: Optional[Document] = None) -> Optional[Document]:
+        """
+        Applies a ``$bit``/``$inc``/``$set``/``$unset`` update to one overlay and returns it
+        afterwards, or None if ``extra_filter`` did not match.
+        """
+        return await self.collection.find_one_and_update(
+            {"_id": roadmap_id, **(extra_filter or {})},
+            update,
+            projection=projection or {"sessionId": 1, "trackId": 1, "templateId": 1, "completed": 1, "linkOverrides": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def update_legacy_task(self, session_id: str, week: int, task: str, is_completed: bool,
+                                 resource_link: Optional[str]) -> Optional[Document]:
+        """
+        Sets the status and resource link of one task inside a legacy (fully embedded)
+        roadmap and returns it with only the affected week.
+        """
+        return await self.collection.find_one_and_update(
+            {"sessionId": session_id},
+            {"$set": {
+                "weeks.$[w].tasks.$[t].isCompleted": is_completed,
+                "weeks.$[w].tasks.$[t].resourceLink": resource_link,
+            }},
+            array_filters=[{"w.week": week}, {"t.task": task}],
+            projection={"weeks": {"$elemMatch": {"week": week}}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+class RoadmapTemplateRepository(BaseRepository):
+    """
+    Immutable, content-addressed roadmap content. Templates never change once written,
+    so they are cached in-process (LRU) and read paths only fetch the small overlays.
+    """
+
+    collection_name = "RoadmapTemplate"
+    cache_size = 2048
+    _cache: "OrderedDict[str, Document]" = OrderedDict()
+
+    @classmethod
+    def _remember(cls, template: Document) -> None:
+        cls._cache[template["_id"]] = template
+        cls._cache.move_to_end(template["_id"])
+        while len(cls._cache) > cls.cache_size:
+            cls._cache.popitem(last=False)
+
+    async def ensure(self, template: Document) -> str:
+        """Stores the template if its content hash is new; returns the template id."""
+        if template["_id"] not in self._cache:
+            await self.collection.update_one({"_id": template["_id"]}, {"$setOnInsert": template}, upsert=True)
+            self._remember(template)
+        return template["_id"]
+
+    async def get_many(self, template_ids: List[str]) -> Dict[str, Document]:
+        found: Dict[str, Document] = {}
+        missing = []
+        for template_id in set(template_ids):
+            if template_id in self._cache:
+                self._cache.move_to_end(template_id)
+                found[template_id] = self._cache[template_id]
+            else:
+                missing.append(template_id)
+        if missing:
+            async for template in self.collection.find({"_id": {"$in": missing}}):
+                self._remember(template)
+                found[template["_id"]] = template
+        return found
+
+    async def get(self, template_id: str) -> Optional[Document]:
+        return (await self.get_many([template_id])).get(template_id)
+
+    async def for_roadmaps(self, roadmap_docs: List[Document]) -> Dict[str, Document]:
+        """Loads the templates referenced by a batch of Roadmap overlays."""
+        return await self.get_many([doc["templateId"] for doc in roadmap_docs if doc.get("templateId")])
+
+class ProgressAggregateRepository(BaseRepository):
+    """
+    Precomputed progress counters per group, e.g. ``domain:frontend developer`` or
+    ``cohort:<id>``. Kept up to date with ``$inc`` so aggregated views never scan roadmaps.
+    """
+
+    collection_name = "ProgressAggregate"
+    write_concern_setting = "MONGO_PROGRESS_WRITE_CONCERN"
+
+    async def increment(self, keys: List[str], sessions: int = 0, roadmaps: int = 0,
+                        completed_tasks: int = 0, total_tasks: int = 0) -> None:
+        if not keys:
+            return
+        inc = {"sessions": sessions, "roadmaps": roadmaps, "completedTasks": completed_tasks, "totalTasks": total_tasks}
+        await self.collection.bulk_write(
+            [UpdateOne({"_id": key}, {"$inc": inc}, upsert=True) for key in keys],
+            ordered=False,
+        )
+
+    async def list(self, group_by: str, keys: Optional[List[str]] = None, limit: int = 500) -> List[Document]:
+        if keys:
+            query: Document = {"_id": {"$in": [f"{group_by}:{key}" for key in keys]}}
+        else:
+            query = {"_id": {"$regex": f"^{re.escape(group_by)}:"}}
+        return await self.collection.find(query).sort("_id", 1).limit(limit).to_list(length=None)
+
+class CohortJobRepository(BaseRepository):
+    collection_name = "CohortJob"
+
+    async def create(self, document: Document) -> str:
+        result = await self.collection.insert_one(document)
+        return str(result.inserted_id)
+
+    async def get(self, job_id: str) -> Optional[Document]:
+        return await self.collection.find_one({"_id": ObjectId(job_id)})
+
+    async def set_status(self, job_id: str, status: str, finished: bool = False) -> None:
+        update: Document = {"status": status}
+        if finished:
+            update["finishedAt"] = datetime.now()
+        await self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": update})
+
+    async def set_groups(self, job_id: str, groups: List[Document]) -> None:
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"status": "running", "groups": groups, "totalGroups": len(groups)}},
+        )
+
+    async def record_group(self, job_id: str, group_index: int, status: str, onboarded: int,
+                           error: Optional[str] = None) -> None:
+        """Marks one (domain, level) group finished; its per-student results live in CohortJobResult."""
+        failed = status != "completed"
+        await self.collection.update_one(
+            {"_id": ObjectId(job_id)},
+            {
+                "$set": {f"groups.{group_index}.status": status, f"groups.{group_index}.error": error},
+                "$inc": {
+                    "completedGroups": 0 if failed else 1,
+                    "failedGroups": 1 if failed else 0,
+                    "onboardedStudents": onboarded,
+                },
+            },
+        )
+
+class CohortJobResultRepository(BaseRepository):
+    """
+    One document per onboarded student of a cohort job. Kept out of the CohortJob document,
+    which would otherwise grow with the cohort towards MongoDB's 16MB document limit.
+    """
+
+    collection_name = "CohortJobResult"
+
+    INDEXES = [IndexModel([("jobId", ASCENDING), ("_id", ASCENDING)])]
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_indexes(self.INDEXES)
+
+    async def add(self, job_id: str, results: List[Document]) -> None:
+        await self.insert_many([{"jobId": job_id, **result} for result in results])
+
+    async def list_for_job(self, job_id: str, skip: int = 0, limit: int = 100) -> List[Document]:
+        if limit <= 0:
+            return []
+        cursor = self.collection.find({"jobId": job_id}, {"_id": 0, "jobId": 0}).sort("_id", 1).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
+class CanonicalDomainRepository(BaseRepository):
+    """Canonical domains and their aliases, keyed by normalized name; source of the domain index."""
+
+    collection_name = "CanonicalDomain"
+
+    async def list_all(self) -> List[Document]:
+        return await self.collection.find({}).sort("_id", 1).to_list(length=None)
+
+    async def seed(self, entries: List[Document]) -> None:
+        await self.collection.bulk_write(
+            [UpdateOne({"_id": entry["_id"]}, {"$setOnInsert": entry}, upsert=True) for entry in entries],
+            ordered=False,
+        )
+
+    async def upsert(self, entry_id: str, name: str, aliases: List[str]) -> Document:
+        return await self.collection.find_one_and_update(
+            {"_id": entry_id},
+            {"$set": {"name": name, "aliases": aliases, "updatedAt": datetime.now()}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def delete(self, entry_id: str) -> bool:
+        result = await self.collection.delete_one({"_id": entry_id})
+        return result.deleted_count == 1
+
+class WarmContentRepository(BaseRepository):
+    """
+    Pre-generated agent output written by scripts/warm_cache.py, one document per item:
+    ``questions:<domain>``, ``tracks:<domain>:<level>`` and ``roadmap:<domain>:<level>``
+    (the latter pointing at a RoadmapTemplate). Routes serve from it before calling agents.
+    """
+
+    collection_name = "WarmContent"
+
+    async def get(self, key: str) -> Optional[Document]:
+        return await self.collection.find_one({"_id": key})
+
+    async def existing_keys(self, keys: List[str]) -> set:
+        cursor = self.collection.find({"_id": {"$in": keys}}, {"_id": 1})
+        return {doc["_id"] async for doc in cursor}
+
+    async def save(self, key: str, document: Document) -> None:
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, **document, "generatedAt": datetime.now()},
+            upsert=True,
+        )
@@ -0,0 +1,169 @@
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from models import RoadmapWeek, RoadmapTask
+
+# Roadmap content (weeks, task strings, resource links) is stored once per distinct
+# roadmap in RoadmapTemplate, keyed by the sha256 of its canonical JSON. Each Roadmap
+# document is a small per-session overlay on top of it:
+#   {sessionId, trackId, templateId, completed: [32-bit words], linkOverrides: {"<taskIndex>": link},
+#    progress: {completed, total, weeks: {"<week>": {completed, total}}}, groupKeys: [...]}
+# Tasks are numbered in template order across all weeks; bit i of the bitset is task i.
+# "progress" counters are maintained with $inc whenever a bit flips (see progress.py).
+# Legacy Roadmap documents that still embed "weeks" are read as-is.
+
+BITS_PER_WORD = 32
+WORD_MASK = (1 << BITS_PER_WORD) - 1
+
+def _field(item: Any, name: str, default=None):
+    return item.get(name, default) if isinstance(item, dict) else getattr(item, name, default)
+
+def canonical_weeks(weeks: List[Union[RoadmapWeek, Dict]]) -> List[Dict]:
+    """Strips per-session state and normalizes links so identical roadmaps hash identically."""
+    canonical = []
+    for week_data in weeks:
+        tasks = []
+        for task_item in _field(week_data, "tasks", []):
+            resource_link = _field(task_item, "resourceLink")
+            tasks.append({
+                "task": _field(task_item, "task"),
+                "resourceLink": str(resource_link) if resource_link is not None else None
+            })
+        canonical.append({"week": _field(week_data, "week"), "tasks": tasks})
+    return canonical
+
+def template_id_for(canonical: List[Dict]) -> str:
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_template(weeks: List[Union[RoadmapWeek, Dict]]) -> Dict:
+    canonical = canonical_weeks(weeks)
+    return {
+        "_id": template_id_for(canonical),
+        "weeks": canonical,
+        "taskCount": sum(len(week_data["tasks"]) for week_data in canonical),
+        "createdAt": datetime.now()
+    }
+
+def empty_bitset(task_count: int) -> List[int]:
+    return [0] * max(1, -(-task_count // BITS_PER_WORD))
+
+def initial_progress(template: Dict) -> Dict:
+    return {
+        "completed": 0,
+        "total": template["taskCount"],
+        "weeks": {
+            str(week_data["week"]): {"completed": 0, "total": len(week_data["tasks"])}
+            for week_data in template["weeks"]
+        }
+    }
+
+def new_overlay(session_id: str, track_id: str, template: Dict, group_keys: Optional[List[str]] = None) -> Dict:
+    return {
+        "sessionId": session_id,
+        "trackId": track_id,
+        "templateId": template["_id"],
+        "completed": empty_bitset(template["taskCount"]),
+        "linkOverrides": {},
+        "progress": initial_progress(template),
+        "groupKeys": group_keys or []
+    }
+
+def is_completed(completed: List[int], index: int) -> bool:
+    word = index // BITS_PER_WORD
+    return word < len(completed) and bool(completed[word] >> (index % BITS_PER_WORD) & 1)
+
+def bit_update(index: int, status: bool) -> Dict:
+    """``$bit`` operand that sets or clears task ``index`` atomically."""
+    mask = 1 << (index % BITS_PER_WORD)
+    return {f"completed.{index // BITS_PER_WORD}": {"or": mask} if status else {"and": WORD_MASK ^ mask}}
+
+def bit_state_filter(index: int, completed: bool) -> Dict:
+    """Query filter matching overlays where task ``index`` is currently ``completed``."""
+    # Bit positions, not a mask: numeric masks must fit a signed 32-bit int, which 1 << 31 does not.
+    return {f"completed.{index // BITS_PER_WORD}": {"$bitsAllSet" if completed else "$bitsAllClear": [index % BITS_PER_WORD]}}
+
+def progress_from_bitset(template: Dict, completed: List[int]) -> Dict:
+    """Recomputes an overlay's progress counters from its bitset (backfills and repairs)."""
+    progress = initial_progress(template)
+    index = 0
+    for week_data in template["weeks"]:
+        week_progress = progress["weeks"][str(week_data["week"])]
+        for _ in week_data["tasks"]:
+            if is_completed(completed, index):
+                week_progress["completed"] += 1
+                progress["completed"] += 1
+            index += 1
+    return progress
+
+def find_task_index(template: Dict, week: int, task: str) -> Optional[int]:
+    index = 0
+    for week_data in template["weeks"]:
+        if week_data["week"] == week:
+            for task_item in week_data["tasks"]:
+                if task_item["task"] == task:
+                    return index
+                index += 1
+        else:
+            index += len(week_data["tasks"])
+    return None
+
+def template_task(template: Dict, index: int) -> Dict:
+    for week_data in template["weeks"]:
+        if index < len(week_data["tasks"]):
+            return week_data["tasks"][index]
+        index -= len(week_data["tasks"])
+    raise IndexError(f"Task index {index} out of range for template '{template['_id']}'.")
+
+def merge_weeks(template: Dict, overlay: Dict, only_week: Optional[int] = None) -> List[RoadmapWeek]:
+    """Combines template content with a session overlay into API-shaped weeks."""
+    completed = overlay.get("completed", [])
+    overrides = overlay.get("linkOverrides", {})
+    merged = []
+    index = 0
+    for week_data in template["weeks"]:
+        if only_week is not None and week_data["week"] != only_week:
+            index += len(week_data["tasks"])
+            continue
+        tasks = []
+        for task_item in week_data["tasks"]:
+            key = str(index)
+            tasks.append(RoadmapTask(
+                task=task_item["task"],
+                isCompleted=is_completed(completed, index),
+                resourceLink=overrides[key] if key in overrides else task_item.get("resourceLink")
+            ))
+            index += 1
+        merged.append(RoadmapWeek(week=week_data["week"], tasks=tasks))
+    return merged
+
+def legacy_weeks(roadmap_doc: Dict) -> List[RoadmapWeek]:
+    """Reads a Roadmap document that still embeds its full weeks."""
+    return [
+        RoadmapWeek(week=week_data["week"], tasks=[
+            RoadmapTask(
+                task=task_item.get("task"),
+                isCompleted=task_item.get("isCompleted", False),
+                resourceLink=task_item.get("resourceLink")
+            )
+            for task_item in week_data["tasks"]
+        ])
+        for week_data in roadmap_doc.get("weeks", [])
+    ]
+
+def roadmap_weeks(roadmap_doc: Dict, templates: Dict[str, Dict]) -> List[RoadmapWeek]:
+    """
+    Resolves any Roadmap document (overlay or legacy) into its weeks. Raises LookupError
+    when an overlay's template is gone and it has no embedded weeks to fall back to.
+    """
+    template_id = roadmap_doc.get("templateId")
+    if template_id is None:
+        return legacy_weeks(roadmap_doc)
+    template = templates.get(template_id)
+    if template is None:
+        if roadmap_doc.get("weeks"):
+            return legacy_weeks(roadmap_doc)
+        raise LookupError(f"Roadmap template '{template_id}' not found.")
+    return merge_weeks(template, roadmap_doc)
@@ -0,0 +1,67 @@
+
+import hmac
+import time
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from repository import CanonicalDomainRepository
+from domain_index import domain_normalizer, normalize_text
+from models import CanonicalDomainInput, CanonicalDomainResponse, DomainResolveResponse
+from config import settings
+from typing import List, Optional
+
+async def require_admin_key(x_admin_key: Optional[str] = Header(default=None)):
+    # Fails closed: these endpoints rewrite the canonical domains every worker serves.
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled: ADMIN_API_KEY is not configured.")
+    if x_admin_key is None or not hmac.compare_digest(x_admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin key.")
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_key)])
+
+def _domain_response(doc) -> CanonicalDomainResponse:
+    return CanonicalDomainResponse(id=doc["_id"], name=doc["name"], aliases=doc.get("aliases", []))
+
+@router.get("/domains", response_model=List[CanonicalDomainResponse])
+async def list_canonical_domains():
+    """
+    Lists the canonical domains (and aliases) free-text domains are normalized to.
+    """
+    return [_domain_response(doc) for doc in await CanonicalDomainRepository().list_all()]
+
+@router.put("/domains", response_model=CanonicalDomainResponse)
+async def upsert_canonical_domain(domain_input: CanonicalDomainInput):
+    """
+    Adds a canonical domain or replaces the aliases of an existing one, then rebuilds the index.
+    Other workers pick the change up on their next periodic refresh.
+    """
+    entry_id = normalize_text(domain_input.name)
+    if not entry_id:
+        raise HTTPException(status_code=400, detail="Domain name has no searchable characters.")
+    aliases = sorted({alias.strip() for alias in domain_input.aliases if alias.strip()})
+    doc = await CanonicalDomainRepository().upsert(entry_id, domain_input.name.strip(), aliases)
+    await domain_normalizer.load()
+    return _domain_response(doc)
+
+@router.delete("/domains/{domain_id}")
+async def delete_canonical_domain(domain_id: str):
+    """
+    Removes a canonical domain. Sessions already mapped to it keep their stored canonicalDomain.
+    """
+    if not await CanonicalDomainRepository().delete(domain_id):
+        raise HTTPException(status_code=404, detail="Canonical domain not found.")
+    await domain_normalizer.load()
+    return {"deleted": domain_id}
+
+@router.get("/domains/resolve", response_model=DomainResolveResponse)
+async def resolve_domain(q: str = Query(..., min_length=1)):
+    """
+    Shows which canonical domain a free-text domain maps to, with its similarity and lookup time.
+    """
+    started = time.perf_counter()
+    match = domain_normalizer.resolve(q)
+    elapsed = (time.perf_counter() - started) * 1e6
+    return DomainResolveResponse(
+        input=q,
+        canonicalDomain=match[0] if match else None,
+        score=match[1] if match else None,
+        lookupMicros=round(elapsed, 1)
+    )
@@ -0,0 +1,169 @@
+
+import json
+import logging
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from repository import SessionRepository, RoadmapRepository, RoadmapTemplateRepository, ProgressAggregateRepository
+from models import SessionProgressResponse, TrackProgress, AggregateProgressResponse, ProgressBatchRequest
+from progress import AGGREGATE_GROUPS, domain_key, percent, track_progress_fields, has_counters
+from roadmap_templates import progress_from_bitset
+from domain_index import domain_normalizer
+from config import settings
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+BATCH_PROGRESS_PROJECTION = {"sessionId": 1, "trackId": 1, "templateId": 1, "progress": 1, "completed": 1}
+
+@router.get("/progress/{session_id}", response_model=SessionProgressResponse)
+async def get_session_progress(session_id: str):
+    """
+    Returns completion counts per week, per track and for the whole session from the stored counters.
+    """
+    session_doc = await SessionRepository().get(session_id, {"progress": 1})
+    if not session_doc:
+        raise HTTPException(status_code=404, detail="Session not found.")
+
+    overlays = await RoadmapRepository().list_for_session(session_id, {"trackId": 1, "templateId": 1, "progress": 1, "completed": 1})
+
+    # Overlays written before counters existed (or with only partial $inc'd counters) are backfilled from their bitset.
+    missing = [doc for doc in overlays if not has_counters(doc) and doc.get("templateId")]
+    templates = await RoadmapTemplateRepository().for_roadmaps(missing) if missing else {}
+
+    tracks: List[TrackProgress] = []
+    for overlay in overlays:
+        progress = overlay.get("progress")
+        if not has_counters(overlay):
+            template = templates.get(overlay.get("templateId"))
+            if not template:
+                continue
+            progress = progress_from_bitset(template, overlay.get("completed", []))
+        tracks.append(TrackProgress(trackId=overlay["trackId"], **track_progress_fields(progress)))
+
+    session_progress = session_doc.get("progress") or {}
+    completed = session_progress.get("completed", sum(t.completed for t in tracks))
+    total = session_progress.get("total", sum(t.total for t in tracks))
+
+    return SessionProgressResponse(
+        sessionId=session_id,
+        completed=completed,
+        total=total,
+        percent=percent(completed, total),
+        tracks=tracks
+    )
+
+@router.get("/progress-aggregates", response_model=List[AggregateProgressResponse])
+async def get_aggregate_progress(
+    group_by: str = Query("domain", alias="groupBy", description="'domain' or 'cohort'"),
+    keys: Optional[List[str]] = Query(None, description="Domains or cohort ids to include; all when omitted"),
+    limit: int = Query(500, ge=1, le=5000)
+):
+    """
+    Returns aggregated progress across many sessions, grouped by domain or cohort, from precomputed counters.
+    """
+    if group_by not in AGGREGATE_GROUPS:
+        raise HTTPException(status_code=400, detail=f"groupBy must be one of: {', '.join(AGGREGATE_GROUPS)}.")
+
+    if keys and group_by == "domain":
+        keys = [domain_key(domain_normalizer.canonical_or_raw(key)) for key in keys]
+
+    aggregates = await ProgressAggregateRepository().list(group_by, keys, limit)
+
+    return [
+        AggregateProgressResponse(
+            groupBy=group_by,
+            key=aggregate["_id"].split(":", 1)[1],
+            sessions=aggregate.get("sessions", 0),
+            roadmaps=aggregate.get("roadmaps", 0),
+            completedTasks=aggregate.get("completedTasks", 0),
+            totalTasks=aggregate.get("totalTasks", 0),
+            percent=percent(aggregate.get("completedTasks", 0), aggregate.get("totalTasks", 0))
+        )
+        for aggregate in aggregates
+    ]
+
+@router.post("/progress/batch", response_class=StreamingResponse,
+             responses={200: {"content": {"application/x-ndjson": {}}, "description": "One progress record per line"}})
+async def stream_batch_progress(request: ProgressBatchRequest):
+    """
+    Streams compact progress records for many sessions (a list of ids or a whole cohort) as NDJSON,
+    one line per session: {"sessionId", "completed", "total", "percent", "tracks": [...]}.
+    All matching roadmaps are read through a single cursor ordered by session, and each record is
+    written as soon as its session's roadmaps have been read.
+    """
+    if (request.sessionIds is None) == (request.cohortId is None):
+        raise HTTPException(status_code=400, detail="Provide either sessionIds or cohortId.")
+
+    session_ids = None
+    if request.sessionIds is not None:
+        session_ids = list(dict.fromkeys(request.sessionIds))
+        if len(session_ids) > settings.PROGRESS_BATCH_MAX_SESSIONS:
+            raise HTTPException(status_code=400, detail=f"At most {settings.PROGRESS_BATCH_MAX_SESSIONS} sessionIds per request.")
+        query = {"sessionId": {"$in": session_ids}}
+    else:
+        # Overlays carry their cohort in groupKeys, so the Session collection is not needed.
+        query = {"groupKeys": f"cohort:{request.cohortId}"}
+
+    return StreamingResponse(_progress_lines(query, session_ids, request.includeWeeks), media_type="application/x-ndjson")
+
+async def _progress_lines(query: Dict, session_ids: Optional[List[str]], include_weeks: bool) -> AsyncIterator[str]:
+    templates: Dict[str, Optional[Dict]] = {}
+    seen: Set[str] = set()
+    chunk: List[str] = []
+    current_session, tracks = None, []
+
+    def finish_session() -> None:
+        chunk.append(_progress_line(current_session, tracks))
+        if session_ids is not None:
+            seen.add(current_session)
+
+    try:
+        async for overlay in RoadmapRepository().by_session(query, BATCH_PROGRESS_PROJECTION):
+            if overlay["sessionId"] != current_session:
+                if current_session is not None:
+                    finish_session()
+                    if len(chunk) >= settings.PROGRESS_BATCH_CHUNK_RECORDS:
+                        yield "".join(chunk)
+                        chunk = []
+                current_session, tracks = overlay["sessionId"], []
+            track = await _batch_track_progress(overlay, templates, include_weeks)
+            if track is not None:
+                tracks.append(track)
+        if current_session is not None:
+            finish_session()
+        # Requested sessions without any roadmap are reported last, with zero totals.
+        for session_id in session_ids or []:
+            if session_id not in seen:
+                chunk.append(_progress_line(session_id, []))
+    except Exception:
+        # Headers are already sent; end the stream with an error record rather than silently short.
+        logger.exception("Batch progress stream interrupted", extra={"event": "progress.batch_failed"})
+        chunk.append(json.dumps({"error": "Progress stream interrupted."}) + "\n")
+    if chunk:
+        yield "".join(chunk)
+
+async def _batch_track_progress(overlay: Dict, templates: Dict[str, Optional[Dict]], include_weeks: bool) -> Optional[Dict]:
+    progress = overlay.get("progress")
+    if not has_counters(overlay):
+        # Overlays written before counters existed; each template is loaded once per stream.
+        template_id = overlay.get("templateId")
+        if not template_id:
+            return None
+        if template_id not in templates:
+            templates[template_id] = await RoadmapTemplateRepository().get(template_id)
+        if not templates[template_id]:
+            return None
+        progress = progress_from_bitset(templates[template_id], overlay.get("completed", []))
+    fields = track_progress_fields(progress)
+    if not include_weeks:
+        del fields["weeks"]
+    return {"trackId": overlay["trackId"], **fields}
+
+def _progress_line(session_id: str, tracks: List[Dict]) -> str:
+    completed = sum(track["completed"] for track in tracks)
+    total = sum(track["total"] for track in tracks)
+    record = {"sessionId": session_id, "completed": completed, "total": total,
+              "percent": percent(completed, total), "tracks": tracks}
+    return json.dumps(record, separators=(",", ":")) + "\n"
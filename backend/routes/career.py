@@ -1,55 +1,58 @@
 
-from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorClient
-from database import get_database
-from models import CareerTrack, SessionDocument, CareerTrackDocument, FullCareerTrack, EnrollTrackUpdate
-from agents.track_recommender import CareerTrackRecommenderAgent
-from config import settings
-from typing import List
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from fieldsets import TRACK_FIELDS, parse_fields, mongo_projection, ordered, select, sparse_response
+from repository import SessionRepository, CareerTrackRepository, SESSION_PROFILE_PROJECTION
+from live_updates import live_hub
+from track_prefetch import track_prefetcher, generate_career_tracks, TrackGenerationError
+from domain_index import session_domain
+from models import SessionDocument, FullCareerTrack, EnrollTrackUpdate
+from typing import List, Optional
 from bson import ObjectId
 
 router = APIRouter()
 
 @router.get("/career-tracks/{session_id}", response_model=List[FullCareerTrack])
-async def get_career_tracks(session_id: str):
+async def get_career_tracks(
+    session_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated track fields to return, e.g. 'trackId,title'; all when omitted")
+):
     """
     Generates and returns career track recommendations based on user's domain and skill level.
     """
-    db = get_database()
-
-    session_doc = await db.Session.find_one({"_id": ObjectId(session_id)})
+    selected = parse_fields(fields, TRACK_FIELDS)
+    track_fields = ordered(selected, TRACK_FIELDS) if selected is not None else None
+    session_doc = await SessionRepository().get(session_id, SESSION_PROFILE_PROJECTION)
     if not session_doc:
         raise HTTPException(status_code=404, detail="Session not found")
     if not session_doc.get("level"):
         raise HTTPException(status_code=400, detail="User level not yet determined. Complete the quiz first.")
 
-    domain = session_doc["domain"]
+    domain = session_domain(session_doc)
     level = session_doc["level"]
 
-    recommender_agent = CareerTrackRecommenderAgent(
-        api_key=settings.GROQ_API_KEY,
-        tavily_api_key=settings.TAVILY_API_KEY
-    )
-    
-    try:
-        llm_recommended_tracks = await recommender_agent.recommend_tracks(domain, level)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate career tracks due to agent error: {e}")
-
-    if not llm_recommended_tracks:
-        raise HTTPException(status_code=500, detail="Failed to generate any career tracks. Agent returned empty list.")
-
-    for track_data in llm_recommended_tracks:
-        track_doc = CareerTrackDocument(sessionId=session_id, **track_data)
-        
-        await db.CareerTrack.update_one(
-            {"sessionId": session_id, "title": track_data["title"]},
-            {"$set": track_doc.model_dump(by_alias=True, exclude_none=True)},
-            upsert=True 
-        )
-
-    fetched_career_tracks_cursor = db.CareerTrack.find({"sessionId": session_id})
-    fetched_career_tracks_data = await fetched_career_tracks_cursor.to_list(length=None)
+    fetched_career_tracks_data = None
+
+    # Attach to the speculative run started by /submit-answer while it is still in flight;
+    # once it has finished, the tracks are read back so enrollment changes are reflected.
+    pending = track_prefetcher.attach(session_id, domain, level)
+    if pending is not None and not pending.done():
+        try:
+            fetched_career_tracks_data = await asyncio.shield(pending)
+        except Exception:
+            fetched_career_tracks_data = None
+    elif pending is not None or session_doc.get("tracksGeneratedFor") == level:
+        projection = mongo_projection(track_fields) if track_fields is not None else None
+        fetched_career_tracks_data = await CareerTrackRepository().list_for_session(session_id, projection) or None
+
+    if fetched_career_tracks_data is None:
+        try:
+            fetched_career_tracks_data = await generate_career_tracks(session_id, domain, level)
+        except TrackGenerationError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    if track_fields is not None:
+        return sparse_response([select(track_doc_data, track_fields) for track_doc_data in fetched_career_tracks_data])
 
     response_tracks = []
     for track_doc_data in fetched_career_tracks_data:
@@ -64,23 +67,10 @@ async def update_career_track_enrollment(track_id: str, enroll_update: EnrollTra
     """
     Updates the enrollment status of a specific career track.
     """
-    db = get_database()
-
-    existing_track = await db.CareerTrack.find_one({"_id": ObjectId(track_id)})
-    if not existing_track:
+    updated_track_data = await CareerTrackRepository().set_enrollment(track_id, enroll_update.isEnrolled)
+    if not updated_track_data:
         raise HTTPException(status_code=404, detail="Career track not found.")
 
-    result = await db.CareerTrack.update_one(
-        {"_id": ObjectId(track_id)},
-        {"$set": {"isEnrolled": enroll_update.isEnrolled}}
-    )
+    live_hub.local_enrollment_change(updated_track_data)
 
-    if result.modified_count == 0:
-        updated_track_data = await db.CareerTrack.find_one({"_id": ObjectId(track_id)})
-        if not updated_track_data: 
-             raise HTTPException(status_code=404, detail="Career track not found after update attempt.")
-        return FullCareerTrack(**updated_track_data)
-    
-    updated_track_data = await db.CareerTrack.find_one({"_id": ObjectId(track_id)})
-    
     return FullCareerTrack(**updated_track_data)
\ No newline at end of file
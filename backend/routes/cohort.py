@@ -0,0 +1,284 @@
+
+import asyncio
+import logging
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from repository import (
+    SessionRepository, QuizRepository, CareerTrackRepository, ProgressAggregateRepository, CohortJobRepository,
+    CohortJobResultRepository
+)
+from roadmap_templates import build_template
+from progress import domain_key, aggregate_keys
+from domain_index import domain_normalizer
+from warm_content import warm_questions, warm_tracks, warm_template, save_warm_template
+from models import (
+    CohortOnboardRequest, CohortJobResponse, CohortStudent, SessionDocument, QuizDocument,
+    CareerTrackDocument, RoadmapWeek, RoadmapTask
+)
+from config import settings
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def _build_roadmap_weeks(generated_weeks_data: List[Dict]) -> List[RoadmapWeek]:
+    roadmap_weeks = []
+    for week_data in generated_weeks_data:
+        tasks = []
+        for task_item in week_data['tasks']:
+            resource_link_value = task_item.get('resourceLink')
+            if resource_link_value is not None:
+                resource_link_value = str(resource_link_value)
+            tasks.append(RoadmapTask(task=task_item.get('task'), isCompleted=False, resourceLink=resource_link_value))
+        roadmap_weeks.append(RoadmapWeek(week=week_data['week'], tasks=tasks))
+    return roadmap_weeks
+
+async def _detect_levels(students: List[CohortStudent], semaphore: asyncio.Semaphore) -> List[str]:
+    """Detects each student's level, running identical answer sets only once."""
+    from agents.level_detector import LevelDetectorAgent
+
+    detector = LevelDetectorAgent(api_key=settings.GROQ_API_KEY)
+
+    async def detect(qa_pairs: List[Dict]) -> str:
+        async with semaphore:
+            return await detector.detect_level(qa_pairs)
+
+    by_answers: Dict[Tuple, asyncio.Future] = {}
+    per_student: List[Optional[asyncio.Future]] = []
+    for student in students:
+        if not student.answers:
+            per_student.append(None)
+            continue
+        qa_pairs = [answer.model_dump() for answer in student.answers]
+        key = tuple((qa["question"], qa["answer"]) for qa in qa_pairs)
+        if key not in by_answers:
+            by_answers[key] = asyncio.ensure_future(detect(qa_pairs))
+        per_student.append(by_answers[key])
+
+    await asyncio.gather(*by_answers.values())
+    return [future.result() if future else "Beginner" for future in per_student]
+
+class _SharedAgents:
+    """One instance of each agent per job, plus per-domain question sets shared across levels.
+    Content pre-generated by scripts/warm_cache.py is used instead of the agents when present.
+    Every agent call holds the job's semaphore, so it bounds concurrent agent calls."""
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        from agents.strategy_questions import StrategyQuestionsAgent
+        from agents.track_recommender import CareerTrackRecommenderAgent
+        from agents.roadmap_generator import RoadmapGeneratorAgent
+
+        self.questions_agent = StrategyQuestionsAgent(api_key=settings.GROQ_API_KEY)
+        self.recommender_agent = CareerTrackRecommenderAgent(
+            api_key=settings.GROQ_API_KEY,
+            tavily_api_key=settings.TAVILY_API_KEY
+        )
+        self.roadmap_agent = RoadmapGeneratorAgent(
+            api_key=settings.GROQ_API_KEY,
+            tavily_api_key=settings.TAVILY_API_KEY
+        )
+        self.semaphore = semaphore
+        self._questions: Dict[str, asyncio.Future] = {}
+
+    async def questions_for(self, domain: str) -> List[Dict]:
+        key = domain_key(domain)
+        if key not in self._questions:
+            self._questions[key] = asyncio.ensure_future(self._questions_for(domain))
+        return await self._questions[key]
+
+    async def _questions_for(self, domain: str) -> List[Dict]:
+        warmed = await warm_questions(domain)
+        if warmed:
+            return warmed
+        async with self.semaphore:
+            return await self.questions_agent.generate_questions(domain)
+
+    async def tracks_for(self, domain: str, level: str) -> List[Dict]:
+        warmed = await warm_tracks(domain, level)
+        if warmed:
+            return warmed
+        async with self.semaphore:
+            return await self.recommender_agent.recommend_tracks(domain, level)
+
+    async def template_for(self, domain: str, level: str) -> Optional[Dict]:
+        """
+        The warmed roadmap template for (domain, level), else a freshly generated one, which is
+        stored as warmed content so the students' roadmaps are created from it when opened.
+        """
+        template = await warm_template(domain, level)
+        if template is not None:
+            return template
+        async with self.semaphore:
+            generated_weeks_data = await self.roadmap_agent.generate_roadmap(domain, level)
+        if not generated_weeks_data:
+            return None
+        template = build_template(_build_roadmap_weeks(generated_weeks_data))
+        await save_warm_template(domain, level, template)
+        return template
+
+async def _no_questions() -> List[Dict]:
+    return []
+
+async def _onboard_group(job_id: str, group_index: int, domain: str, level: str, student_indices: List[int],
+                         students: List[CohortStudent], cohort_id: str, agents: _SharedAgents) -> bool:
+    """
+    Generates content once for a (domain, level) group and bulk-inserts it for every student in it.
+    Roadmap overlays are not created here: like a single user's, a student's roadmap is created
+    when /roadmap/{track_id} is first opened (from the group's template), so progress totals only
+    count the roadmaps a student actually follows.
+    """
+    jobs = CohortJobRepository()
+    try:
+        needs_questions = any(not students[i].answers for i in student_indices)
+        tracks_data, template, questions = await asyncio.gather(
+            agents.tracks_for(domain, level),
+            agents.template_for(domain, level),
+            agents.questions_for(domain) if needs_questions else _no_questions()
+        )
+
+        if not tracks_data:
+            raise ValueError("Agent returned no career tracks.")
+        if template is None:
+            raise ValueError("Agent returned no roadmap.")
+
+        group_keys = aggregate_keys(domain, cohort_id)
+
+        session_docs, quiz_docs, track_docs, results = [], [], [], []
+        for i in student_indices:
+            student = students[i]
+            session_oid = ObjectId()
+            session_id = str(session_oid)
+
+            session_doc = SessionDocument(
+                domain=student.domain, level=level, cohortId=cohort_id, **domain_normalizer.session_fields(student.domain)
+            ).model_dump(by_alias=True, exclude_none=True)
+            session_doc["_id"] = session_oid
+            session_doc["progress"] = {"completed": 0, "total": 0}
+            # The tracks below are this level's; /career-tracks must serve them, not regenerate.
+            session_doc["tracksGeneratedFor"] = level
+            session_docs.append(session_doc)
+
+            if student.answers:
+                quiz_doc = QuizDocument(
+                    sessionId=session_id,
+                    questions=[{"id": n + 1, "question": answer.question} for n, answer in enumerate(student.answers)],
+                    answers=student.answers
+                )
+            else:
+                quiz_doc = QuizDocument(sessionId=session_id, questions=questions)
+            quiz_docs.append(quiz_doc.model_dump(by_alias=True, exclude_none=True))
+
+            track_ids = []
+            for track_data in tracks_data:
+                track_oid = ObjectId()
+                track_doc = CareerTrackDocument(sessionId=session_id, **track_data).model_dump(by_alias=True, exclude_none=True)
+                track_doc["_id"] = track_oid
+                track_docs.append(track_doc)
+                track_ids.append(str(track_oid))
+
+            results.append({
+                "externalId": student.externalId,
+                "sessionId": session_id,
+                "domain": student.domain,
+                "level": level,
+                "trackIds": track_ids
+            })
+
+        await asyncio.gather(
+            SessionRepository().insert_many(session_docs),
+            QuizRepository().insert_many(quiz_docs),
+            CareerTrackRepository().insert_many(track_docs),
+            ProgressAggregateRepository().increment(group_keys, sessions=len(session_docs))
+        )
+        await CohortJobResultRepository().add(job_id, results)
+        await jobs.record_group(job_id, group_index, "completed", len(results))
+        return True
+    except Exception as e:
+        logger.warning("Cohort job %s: group %r (%s) failed: %s", job_id, domain, level, e, extra={"event": "cohort.group_failed"})
+        await jobs.record_group(job_id, group_index, "failed", 0, error=str(e))
+        return False
+
+async def _run_cohort_job(job_id: str, cohort_id: str, students: List[CohortStudent], max_concurrency: int):
+    jobs = CohortJobRepository()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    try:
+        await jobs.set_status(job_id, "detecting-levels")
+        levels = await _detect_levels(students, semaphore)
+
+        # Spelling variants of one domain ("front-end dev", "Frontend Developer") share a group.
+        domains = [domain_normalizer.canonical_or_raw(student.domain) for student in students]
+        grouped: Dict[Tuple[str, str], List[int]] = {}
+        for index, (domain, level) in enumerate(zip(domains, levels)):
+            grouped.setdefault((domain_key(domain), level), []).append(index)
+
+        groups = [
+            {"domain": domains[indices[0]], "level": level, "students": len(indices), "status": "pending", "error": None}
+            for (_, level), indices in grouped.items()
+        ]
+        await jobs.set_groups(job_id, groups)
+
+        agents = _SharedAgents(semaphore)
+        outcomes = await asyncio.gather(*(
+            _onboard_group(job_id, group_index, group["domain"], group["level"], indices, students, cohort_id, agents)
+            for group_index, (group, indices) in enumerate(zip(groups, grouped.values()))
+        ))
+
+        await jobs.set_status(job_id, "completed" if all(outcomes) else "completed_with_errors", finished=True)
+    except Exception as e:
+        logger.exception("Cohort job %s failed: %s", job_id, e, extra={"event": "cohort.failed"})
+        await jobs.set_status(job_id, "failed", finished=True)
+
+def _job_response(job_id: str, job_doc: Dict, results: Optional[List[Dict]] = None) -> CohortJobResponse:
+    job_doc = {k: v for k, v in job_doc.items() if k not in ("_id", "results")}
+    return CohortJobResponse(jobId=job_id, results=results or [], **job_doc)
+
+@router.post("/cohorts/onboard", response_model=CohortJobResponse, status_code=202)
+async def onboard_cohort(request: CohortOnboardRequest, background_tasks: BackgroundTasks):
+    """
+    Onboards a whole cohort in the background. Students are grouped by (domain, level) and
+    questions, career tracks and roadmaps are generated once per group, then fanned out into
+    per-student Session, Quiz and CareerTrack documents with bulk inserts. Each student's
+    Roadmap is created from the group's template when it is first opened.
+    """
+    if not request.students:
+        raise HTTPException(status_code=400, detail="At least one student must be submitted.")
+    for index, student in enumerate(request.students):
+        if student.answers is not None and len(student.answers) != 10:
+            raise HTTPException(status_code=400, detail=f"Student {index}: exactly 10 answers must be submitted.")
+
+    cohort_id = request.cohortId or str(ObjectId())
+    job_doc = {
+        "cohortId": cohort_id,
+        "status": "queued",
+        "totalStudents": len(request.students),
+        "totalGroups": 0,
+        "completedGroups": 0,
+        "failedGroups": 0,
+        "onboardedStudents": 0,
+        "groups": [],
+        "createdAt": datetime.now()
+    }
+    job_id = await CohortJobRepository().create(dict(job_doc))
+
+    max_concurrency = request.maxConcurrency or settings.COHORT_MAX_CONCURRENCY
+    background_tasks.add_task(_run_cohort_job, job_id, cohort_id, request.students, max_concurrency)
+
+    return _job_response(job_id, job_doc)
+
+@router.get("/cohorts/jobs/{job_id}", response_model=CohortJobResponse)
+async def get_cohort_job(
+    job_id: str,
+    results_offset: int = Query(0, ge=0, description="Number of created sessions to skip"),
+    results_limit: int = Query(100, ge=0, le=1000, description="Maximum number of created sessions to return")
+):
+    """
+    Returns the progress of a cohort onboarding job, including per-group status and a page
+    of the created sessions (onboardedStudents is the total).
+    """
+    job_doc = await CohortJobRepository().get(job_id)
+    if not job_doc:
+        raise HTTPException(status_code=404, detail="Cohort job not found.")
+    results = await CohortJobResultRepository().list_for_job(job_id, results_offset, results_limit)
+    return _job_response(job_id, job_doc, results)
@@ -1,9 +1,10 @@
 
 from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorClient
-from database import get_database
+from repository import SessionRepository, QuizRepository
+from progress import aggregate_keys, record_new_sessions
+from domain_index import domain_normalizer
+from warm_content import warm_questions
 from models import DomainInput, InitDomainResponse, SessionDocument, QuizDocument, Question
-from agents.strategy_questions import StrategyQuestionsAgent
 from config import settings 
 from bson import ObjectId
 
@@ -14,18 +15,22 @@ async def init_domain(domain_input: DomainInput):
     """
     Allows a user to input their domain of interest and initiates the quiz.
     """
-    db = get_database()
+    # Content is generated for the canonical domain so spelling variants share it.
+    domain_fields = domain_normalizer.session_fields(domain_input.domain)
+    domain = domain_fields.get("canonicalDomain", domain_input.domain)
+    session_doc = SessionDocument(domain=domain_input.domain, **domain_fields)
+    session_id = await SessionRepository().create(session_doc.model_dump(by_alias=True, exclude_none=True))
+    await record_new_sessions(aggregate_keys(domain))
 
-    session_doc = SessionDocument(domain=domain_input.domain)
-    inserted_session = await db.Session.insert_one(session_doc.model_dump(by_alias=True, exclude_none=True))
-    session_id = str(inserted_session.inserted_id)
+    questions_list = await warm_questions(domain)
+    if not questions_list:
+        from agents.strategy_questions import StrategyQuestionsAgent
 
-    questions_agent = StrategyQuestionsAgent(api_key=settings.GROQ_API_KEY )
-    questions_list = await questions_agent.generate_questions(domain_input.domain)
+        questions_agent = StrategyQuestionsAgent(api_key=settings.GROQ_API_KEY )
+        questions_list = await questions_agent.generate_questions(domain)
 
     quiz_doc = QuizDocument(sessionId=session_id, questions=questions_list)
-    inserted_quiz = await db.Quiz.insert_one(quiz_doc.model_dump(by_alias=True, exclude_none=True))
-    quiz_id = str(inserted_quiz.inserted_id)
+    quiz_id = await QuizRepository().create(quiz_doc.model_dump(by_alias=True, exclude_none=True))
 
     response_questions = [Question(id=q['id'], question=q['question']) for q in questions_list]
 
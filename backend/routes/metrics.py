@@ -0,0 +1,20 @@
+
+from fastapi import APIRouter
+from agents.model_router import model_router
+from entity_cache import cache_stats
+
+router = APIRouter()
+
+@router.get("/metrics/model-routes")
+async def get_model_route_metrics():
+    """
+    Returns per-agent model tiers, latency per model and escalation rate per route.
+    """
+    return model_router.snapshot()
+
+@router.get("/metrics/cache")
+async def get_cache_metrics():
+    """
+    Returns size, hit ratio, evictions and invalidations of the Session and CareerTrack caches.
+    """
+    return cache_stats()
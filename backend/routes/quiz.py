@@ -1,10 +1,10 @@
 
 import time
 from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorClient
-from database import get_database
+from repository import SessionRepository, QuizRepository
+from track_prefetch import track_prefetcher
+from domain_index import session_domain
 from models import QuizSubmission, LevelPredictionResponse, SessionDocument, QuizDocument
-from agents.level_detector import LevelDetectorAgent
 from config import settings
 from bson import ObjectId
 
@@ -12,30 +12,25 @@ router = APIRouter()
 
 @router.post("/submit-answer", response_model=LevelPredictionResponse)
 async def submit_answers(submission_data: QuizSubmission):
-    db = get_database()
+    if len(submission_data.answers) != 10:
+        raise HTTPException(status_code=400, detail="Exactly 10 answers must be submitted.")
 
-    quiz_doc = await db.Quiz.find_one({"_id": ObjectId(submission_data.quizId), "sessionId": submission_data.sessionId})
+    answers = [answer.model_dump() for answer in submission_data.answers]
 
+    quiz_doc = await QuizRepository().save_answers(submission_data.quizId, submission_data.sessionId, answers)
     if not quiz_doc:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    if len(submission_data.answers) != 10:
-        raise HTTPException(status_code=400, detail="Exactly 10 answers must be submitted.")
-
-    quiz_doc['answers'] = [answer.model_dump() for answer in submission_data.answers]
-
-    await db.Quiz.update_one(
-        {"_id": ObjectId(submission_data.quizId)},
-        {"$set": {"answers": quiz_doc['answers']}}
-    )
+    from agents.level_detector import LevelDetectorAgent
 
     level_detector_agent = LevelDetectorAgent(api_key=settings.GROQ_API_KEY)
     predicted_level = await level_detector_agent.detect_level(quiz_doc['answers'])
 
-    await db.Session.update_one(
-        {"_id": ObjectId(submission_data.sessionId)},
-        {"$set": {"level": predicted_level}}
-    )
+    session_doc = await SessionRepository().set_level(submission_data.sessionId, predicted_level)
 
+    # The next step is track recommendation, so start it now and let /career-tracks attach to it.
+    if session_doc:
+        track_prefetcher.start(submission_data.sessionId, session_domain(session_doc), predicted_level,
+                               session_doc.get("tracksGeneratedFor"))
 
     return LevelPredictionResponse(level=predicted_level, nextStep="career-track-recommendation")
\ No newline at end of file
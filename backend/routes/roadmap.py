@@ -1,25 +1,38 @@
 
-from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorClient
-from database import get_database
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from fieldsets import TRACK_FIELDS, parse_fields, nested_fields, ordered, select, sparse_response
+from repository import SessionRepository, CareerTrackRepository, RoadmapRepository, RoadmapTemplateRepository, SESSION_PROFILE_PROJECTION
+from progress import aggregate_keys, record_new_roadmap
+from domain_index import session_domain
+from warm_content import warm_template
+from live_updates import live_hub
+from roadmap_templates import build_template, new_overlay, roadmap_weeks as resolve_roadmap_weeks
 from models import RoadmapWeek, RoadmapDocument, SessionDocument, CareerTrackDocument, RoadmapTask, FullCareerTrack, SingleTrackWithRoadmapResponse
-from agents.roadmap_generator import RoadmapGeneratorAgent
 from config import settings
-from typing import List
+from typing import List, Optional
 from bson import ObjectId
 import json
 import traceback
 
 router = APIRouter()
 
+ROADMAP_FIELDS = ("track", "roadmap") + tuple(f"track.{field}" for field in TRACK_FIELDS)
+
 @router.get("/roadmap/{track_id}", response_model=SingleTrackWithRoadmapResponse)
-async def get_roadmap(track_id: str):
+async def get_roadmap(
+    track_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. 'track.title,roadmap'; all when omitted")
+):
     """
     Generates and returns a specific career track's details along with its weekly roadmap.
     """
-    db = get_database()
+    # The roadmap may have to be generated from the full track and session, so fields
+    # here only trim the response.
+    selected = parse_fields(fields, ROADMAP_FIELDS)
+    roadmaps = RoadmapRepository()
 
-    career_track_doc_data = await db.CareerTrack.find_one({"_id": ObjectId(track_id)})
+    career_track_doc_data = await CareerTrackRepository().get(track_id)
     if not career_track_doc_data:
         raise HTTPException(status_code=404, detail="Career track not found.")
     
@@ -28,60 +41,78 @@ async def get_roadmap(track_id: str):
     career_track_response_model = FullCareerTrack(**career_track_doc_data)
 
     session_id = str(career_track_db_model.sessionId) 
-    session_doc = await db.Session.find_one({"_id": ObjectId(session_id)})
+    # The session and any stored roadmap only depend on the track, so fetch them concurrently.
+    session_doc, existing_roadmap_doc_data = await asyncio.gather(
+        SessionRepository().get(session_id, SESSION_PROFILE_PROJECTION),
+        roadmaps.get_for_track(track_id)
+    )
     if not session_doc:
         raise HTTPException(status_code=404, detail="Session not found for this track.")
     if not session_doc.get("level"):
         raise HTTPException(status_code=400, detail="User level not yet determined. Complete the quiz first.")
 
-    domain = session_doc["domain"]
+    domain = session_domain(session_doc)
     level = session_doc["level"]
 
-    existing_roadmap_doc_data = await db.Roadmap.find_one({"trackId": track_id})
-    
     roadmap_weeks: List[RoadmapWeek] = []
 
     if existing_roadmap_doc_data:
-        roadmap_doc = RoadmapDocument(**existing_roadmap_doc_data)
-        for week_data in roadmap_doc.weeks:
-            tasks = []
-            for task_item in week_data.tasks:
-                tasks.append(RoadmapTask(
-                    task=task_item.get('task') if isinstance(task_item, dict) else task_item.task,
-                    isCompleted=task_item.get('isCompleted', False) if isinstance(task_item, dict) else task_item.isCompleted,
-                    resourceLink=task_item.get('resourceLink') if isinstance(task_item, dict) else task_item.resourceLink
-                ))
-            roadmap_weeks.append(RoadmapWeek(week=week_data.week, tasks=tasks))
+        templates = await RoadmapTemplateRepository().for_roadmaps([existing_roadmap_doc_data])
+        try:
+            roadmap_weeks = resolve_roadmap_weeks(existing_roadmap_doc_data, templates)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
     else:
-        roadmap_agent = RoadmapGeneratorAgent(
-            api_key=settings.GROQ_API_KEY,
-            tavily_api_key=settings.TAVILY_API_KEY
-        )
+        template = await warm_template(domain, level)
+        if template is None:
+            from agents.roadmap_generator import RoadmapGeneratorAgent
+
+            roadmap_agent = RoadmapGeneratorAgent(
+                api_key=settings.GROQ_API_KEY,
+                tavily_api_key=settings.TAVILY_API_KEY
+            )
         
-        try:
-            generated_weeks_data = await roadmap_agent.generate_roadmap(domain, level)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to generate roadmap due to agent error: {e}")
+            try:
+                generated_weeks_data = await roadmap_agent.generate_roadmap(domain, level)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Failed to generate roadmap due to agent error: {e}")
 
-        if not generated_weeks_data:
-            raise HTTPException(status_code=500, detail="Failed to generate roadmap. Agent returned empty list or invalid format.")
+            if not generated_weeks_data:
+                raise HTTPException(status_code=500, detail="Failed to generate roadmap. Agent returned empty list or invalid format.")
 
-        for week_data in generated_weeks_data:
-            tasks_with_status = []
-            for task_item in week_data['tasks']:
-                resource_link_value = task_item.get('resourceLink')
-                if resource_link_value is not None:
-                    resource_link_value = str(resource_link_value)
+            for week_data in generated_weeks_data:
+                tasks_with_status = []
+                for task_item in week_data['tasks']:
+                    resource_link_value = task_item.get('resourceLink')
+                    if resource_link_value is not None:
+                        resource_link_value = str(resource_link_value)
                 
-                tasks_with_status.append(RoadmapTask(
-                    task=task_item.get('task'),
-                    isCompleted=False,
-                    resourceLink=resource_link_value
-                ))
-            roadmap_weeks.append(RoadmapWeek(week=week_data['week'], tasks=tasks_with_status))
+                    tasks_with_status.append(RoadmapTask(
+                        task=task_item.get('task'),
+                        isCompleted=False,
+                        resourceLink=resource_link_value
+                    ))
+                roadmap_weeks.append(RoadmapWeek(week=week_data['week'], tasks=tasks_with_status))
+
+            template = build_template(roadmap_weeks)
+            await RoadmapTemplateRepository().ensure(template)
+        group_keys = aggregate_keys(domain, session_doc.get("cohortId"))
+        roadmap_doc = RoadmapDocument(**new_overlay(session_id, track_id, template, group_keys))
+        overlay = roadmap_doc.model_dump(by_alias=True, exclude_none=True)
+        await roadmaps.insert(overlay)
+        await record_new_roadmap(session_id, group_keys, template["taskCount"])
+        await live_hub.local_roadmap_change(overlay)
+        if not roadmap_weeks:
+            roadmap_weeks = resolve_roadmap_weeks(overlay, {template["_id"]: template})
 
-        roadmap_doc = RoadmapDocument(sessionId=session_id, trackId=track_id, weeks=roadmap_weeks)
-        await db.Roadmap.insert_one(roadmap_doc.model_dump(by_alias=True, exclude_none=True))
+    if selected is not None:
+        response = {}
+        track_fields = nested_fields(selected, "track", TRACK_FIELDS)
+        if track_fields:
+            response["track"] = select(career_track_doc_data, ordered(track_fields, TRACK_FIELDS))
+        if "roadmap" in selected:
+            response["roadmap"] = roadmap_weeks
+        return sparse_response(response)
 
     return SingleTrackWithRoadmapResponse(
         track=career_track_response_model,
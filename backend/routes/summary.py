@@ -1,29 +1,46 @@
 
-from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorClient
-from database import get_database
+from fastapi import APIRouter, HTTPException, Query
+from fieldsets import SESSION_FIELDS, TRACK_FIELDS, parse_fields, nested_fields, wants, mongo_projection, ordered, select, sparse_response
+from repository import SessionRepository, CareerTrackRepository, RoadmapRepository, RoadmapTemplateRepository, SESSION_DETAILS_PROJECTION
+from roadmap_templates import roadmap_weeks
 from models import SessionFullDataResponse, SessionDetailsResponse, SessionDocument, CareerTrackDocument, RoadmapDocument, FullCareerTrack, RoadmapWeek, RoadmapTask
 from bson import ObjectId
 from typing import List, Optional
 
 router = APIRouter()
 
+SUMMARY_TRACK_FIELDS = TRACK_FIELDS + ("roadmap",)
+SUMMARY_FIELDS = SESSION_FIELDS + ("careerTracks",) + tuple(f"careerTracks.{field}" for field in SUMMARY_TRACK_FIELDS)
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. 'level,careerTracks.title'; all when omitted"
+
+def _track_roadmap(roadmap_doc_data: dict, templates: dict) -> List[RoadmapWeek]:
+    try:
+        return roadmap_weeks(roadmap_doc_data, templates)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.get("/session-summary/{session_id}", response_model=SessionFullDataResponse)
-async def get_session_summary(session_id: str):
+async def get_session_summary(session_id: str, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """
     Retrieves a full summary of a user's session, including
     session details, recommended career tracks, and associated roadmaps.
     """
-    db = get_database()
+    selected = parse_fields(fields, SUMMARY_FIELDS)
+    if selected is not None:
+        return sparse_response(await _sparse_summary(session_id, selected))
 
-    session_doc_data = await db.Session.find_one({"_id": ObjectId(session_id)})
+    session_doc_data = await SessionRepository().get(session_id, SESSION_DETAILS_PROJECTION)
     if not session_doc_data:
         raise HTTPException(status_code=404, detail="Session not found.")
     
     session_details = SessionDocument(**session_doc_data)
 
-    career_tracks_cursor = db.CareerTrack.find({"sessionId": session_id})
-    career_tracks_data_from_db = await career_tracks_cursor.to_list(length=None)
+    career_tracks_data_from_db = await CareerTrackRepository().list_for_session(session_id)
+    roadmaps_by_track = await RoadmapRepository().map_by_track(
+        [str(track["_id"]) for track in career_tracks_data_from_db]
+    )
+    templates = await RoadmapTemplateRepository().for_roadmaps(list(roadmaps_by_track.values()))
 
     full_career_tracks: List[FullCareerTrack] = []
 
@@ -32,22 +49,10 @@ async def get_session_summary(session_id: str):
         
         roadmap_for_track: Optional[List[RoadmapWeek]] = None
         
-        roadmap_doc_data = await db.Roadmap.find_one({"trackId": full_career_track_instance.trackId})
+        roadmap_doc_data = roadmaps_by_track.get(full_career_track_instance.trackId)
         
         if roadmap_doc_data:
-            roadmap_doc = RoadmapDocument(**roadmap_doc_data)
-            
-            formatted_weeks: List[RoadmapWeek] = []
-            for week_data in roadmap_doc.weeks:
-                tasks_in_week = []
-                for task_item in week_data.tasks:
-                    tasks_in_week.append(RoadmapTask(
-                        task=task_item.get('task') if isinstance(task_item, dict) else task_item.task,
-                        isCompleted=task_item.get('isCompleted', False) if isinstance(task_item, dict) else task_item.isCompleted,
-                        resourceLink=task_item.get('resourceLink') if isinstance(task_item, dict) else task_item.resourceLink
-                    ))
-                formatted_weeks.append(RoadmapWeek(week=week_data.week, tasks=tasks_in_week))
-            roadmap_for_track = formatted_weeks
+            roadmap_for_track = _track_roadmap(roadmap_doc_data, templates)
         
         full_career_track_instance.roadmap = roadmap_for_track
         
@@ -56,19 +61,41 @@ async def get_session_summary(session_id: str):
     return SessionFullDataResponse(
         sessionId=str(session_details.id),
         domain=session_details.domain,
+        canonicalDomain=session_details.canonicalDomain,
         level=session_details.level,
         createdAt=session_details.createdAt,
         careerTracks=full_career_tracks
     )
 
+async def _sparse_summary(session_id: str, selected: set) -> dict:
+    session_fields = ordered(selected, SESSION_FIELDS)
+    session_doc_data = await SessionRepository().get(session_id, mongo_projection(session_fields))
+    if not session_doc_data:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    summary = select(session_doc_data, session_fields)
+    if not wants(selected, "careerTracks"):
+        return summary
+
+    track_fields = nested_fields(selected, "careerTracks", SUMMARY_TRACK_FIELDS)
+    stored_fields = ordered(track_fields, TRACK_FIELDS)
+    tracks = await CareerTrackRepository().list_for_session(session_id, mongo_projection(stored_fields))
+    entries = [select(track, stored_fields) for track in tracks]
+    # Roadmap overlays and their templates are only loaded when roadmaps were asked for.
+    if "roadmap" in track_fields:
+        roadmaps_by_track = await RoadmapRepository().map_by_track([str(track["_id"]) for track in tracks])
+        templates = await RoadmapTemplateRepository().for_roadmaps(list(roadmaps_by_track.values()))
+        for entry, track in zip(entries, tracks):
+            roadmap_doc_data = roadmaps_by_track.get(str(track["_id"]))
+            entry["roadmap"] = _track_roadmap(roadmap_doc_data, templates) if roadmap_doc_data else None
+    summary["careerTracks"] = entries
+    return summary
+
 @router.get("/session/{session_id}", response_model=SessionDetailsResponse)
 async def get_session_details(session_id: str):
     """
     Retrieves basic details for a specific session by ID.
     """
-    db = get_database()
-
-    session_doc_data = await db.Session.find_one({"_id": ObjectId(session_id)})
+    session_doc_data = await SessionRepository().get(session_id, SESSION_DETAILS_PROJECTION)
     if not session_doc_data:
         raise HTTPException(status_code=404, detail="Session not found.")
     
@@ -77,19 +104,23 @@ async def get_session_details(session_id: str):
     return SessionDetailsResponse(
         sessionId=str(session_details.id),
         domain=session_details.domain,
+        canonicalDomain=session_details.canonicalDomain,
         level=session_details.level,
         createdAt=session_details.createdAt
     )
 
 @router.get("/sessions", response_model=List[SessionDetailsResponse])
-async def get_all_sessions():
+async def get_all_sessions(fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """
     Retrieves a list of basic details for all available sessions.
     """
-    db = get_database()
+    selected = parse_fields(fields, SESSION_FIELDS)
+    if selected is not None:
+        session_fields = ordered(selected, SESSION_FIELDS)
+        sessions = await SessionRepository().list_all(mongo_projection(session_fields))
+        return sparse_response([select(session_doc_data, session_fields) for session_doc_data in sessions])
 
-    sessions_cursor = db.Session.find({})
-    all_sessions_data = await sessions_cursor.to_list(length=None)
+    all_sessions_data = await SessionRepository().list_all()
 
     response_sessions = []
     for session_doc_data in all_sessions_data:
@@ -97,6 +128,7 @@ async def get_all_sessions():
         response_sessions.append(SessionDetailsResponse(
             sessionId=str(session_details.id),
             domain=session_details.domain,
+            canonicalDomain=session_details.canonicalDomain,
             level=session_details.level,
             createdAt=session_details.createdAt
         ))
@@ -1,8 +1,11 @@
 
-from fastapi import APIRouter, HTTPException
-from motor.motor_asyncio import AsyncIOMotorClient
-from database import get_database
+import asyncio
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from repository import RoadmapRepository, RoadmapTemplateRepository
 from models import RoadmapWeek, TaskUpdate, RoadmapDocument, RoadmapTask
+from roadmap_templates import roadmap_weeks, find_task_index, template_task, bit_update, bit_state_filter, merge_weeks, progress_from_bitset
+from progress import record_completion_change
+from live_updates import live_hub
 from typing import List
 from bson import ObjectId
 
@@ -13,68 +16,118 @@ async def get_progress_tracker(session_id: str):
     """
     Retrieves the user's progress checklist for their active roadmap.
     """
-    db = get_database()
+    roadmap_doc = await RoadmapRepository().get_for_session(session_id)
+    if not roadmap_doc:
+        raise HTTPException(status_code=404, detail="No roadmap found for this session.")
+
+    templates = await RoadmapTemplateRepository().for_roadmaps([roadmap_doc])
+    try:
+        return roadmap_weeks(roadmap_doc, templates)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-    roadmap_doc = await db.Roadmap.find_one({"sessionId": session_id})
+async def _update_legacy_task(session_id: str, task_update: TaskUpdate) -> RoadmapWeek:
+    roadmap_doc = await RoadmapRepository().update_legacy_task(
+        session_id,
+        task_update.week,
+        task_update.task,
+        task_update.status,
+        task_update.resourceLink
+    )
     if not roadmap_doc:
         raise HTTPException(status_code=404, detail="No roadmap found for this session.")
 
-    formatted_weeks = []
-    for week_data in roadmap_doc["weeks"]:
-        tasks = []
-        for task_item in week_data["tasks"]:
-            tasks.append(RoadmapTask(
-                task=task_item.get('task'),
-                isCompleted=task_item.get('isCompleted', False),
-                resourceLink=task_item.get('resourceLink') 
-            ))
-        formatted_weeks.append(RoadmapWeek(week=week_data["week"], tasks=tasks))
+    found_week = roadmap_doc.get("weeks", [None])[0]
+    if not found_week or not any(task_item["task"] == task_update.task for task_item in found_week["tasks"]):
+        raise HTTPException(status_code=404, detail="Task or week not found in the roadmap.")
 
-    return formatted_weeks
+    return RoadmapWeek(week=found_week['week'], tasks=[RoadmapTask(**t) for t in found_week['tasks']])
 
-@router.patch("/tracker/{session_id}", response_model=RoadmapWeek) 
+@router.patch("/tracker/{session_id}", response_model=RoadmapWeek)
 async def update_progress_tracker(session_id: str, task_update: TaskUpdate):
     """
     Updates the completion status and optionally the resource link of a specific task in the roadmap.
     """
-    db = get_database()
+    roadmaps = RoadmapRepository()
 
-    roadmap_doc = await db.Roadmap.find_one({"sessionId": session_id})
-    if not roadmap_doc:
+    overlay = await roadmaps.get_for_session(session_id, {"templateId": 1, "groupKeys": 1, "completed": 1, "progress.total": 1})
+    if not overlay:
         raise HTTPException(status_code=404, detail="No roadmap found for this session.")
+    if not overlay.get("templateId"):
+        return await _update_legacy_task(session_id, task_update)
 
-    found_week = None
-    update_needed = False
-
-    for week_idx, week_data in enumerate(roadmap_doc["weeks"]):
-        if week_data["week"] == task_update.week:
-            for task_idx, task_item in enumerate(week_data["tasks"]):
-                if task_item["task"] == task_update.task:
-                    if task_item.get("isCompleted") != task_update.status:
-                        roadmap_doc["weeks"][week_idx]["tasks"][task_idx]["isCompleted"] = task_update.status
-                        update_needed = True
-                    
-                    if task_update.resourceLink is not None and task_item.get("resourceLink") != task_update.resourceLink:
-                        roadmap_doc["weeks"][week_idx]["tasks"][task_idx]["resourceLink"] = task_update.resourceLink
-                        update_needed = True
-                    elif task_update.resourceLink is None and task_item.get("resourceLink") is not None:
-                         roadmap_doc["weeks"][week_idx]["tasks"][task_idx]["resourceLink"] = None
-                         update_needed = True
-
-
-                    found_week = roadmap_doc["weeks"][week_idx]
-                    break 
-            if found_week:
-                break
-
-    if not found_week:
+    template = await RoadmapTemplateRepository().get(overlay["templateId"])
+    if not template:
+        raise HTTPException(status_code=500, detail="Roadmap template missing for this session.")
+
+    task_index = find_task_index(template, task_update.week, task_update.task)
+    if task_index is None:
         raise HTTPException(status_code=404, detail="Task or week not found in the roadmap.")
 
-    if update_needed:
-        await db.Roadmap.update_one(
-            {"_id": roadmap_doc["_id"]},
-            {"$set": {"weeks": roadmap_doc["weeks"]}}
+    # Overlays migrated before counters existed get them from the bitset before the first $inc,
+    # so the counters never start from a partial (negative, total-less) document.
+    if "total" not in (overlay.get("progress") or {}):
+        await roadmaps.update_task_state(
+            overlay["_id"],
+            {"$set": {"progress": progress_from_bitset(template, overlay.get("completed", []))}},
+            extra_filter={"progress.total": {"$exists": False}}
         )
-        return RoadmapWeek(week=found_week['week'], tasks=[RoadmapTask(**t) for t in found_week['tasks']])
+
+    # Only links that differ from the shared template are stored on the overlay.
+    template_link = template_task(template, task_index).get("resourceLink")
+    override_field = f"linkOverrides.{task_index}"
+    link_update = {"$set": {override_field: task_update.resourceLink}} if task_update.resourceLink != template_link \
+        else {"$unset": {override_field: ""}}
+
+    # Flip the bit and move the counters only if the task is currently in the opposite
+    # state, so repeated PATCHes never double count.
+    delta = 1 if task_update.status else -1
+    flip_filter = {**bit_state_filter(task_index, not task_update.status), "progress.total": {"$exists": True}}
+    flip_update = {
+        "$bit": bit_update(task_index, task_update.status),
+        "$inc": {"progress.completed": delta, f"progress.weeks.{task_update.week}.completed": delta},
+        **link_update
+    }
+
+    updated_overlay = await roadmaps.update_task_state(overlay["_id"], flip_update, extra_filter=flip_filter)
+    if updated_overlay:
+        await record_completion_change(session_id, overlay.get("groupKeys", []), delta)
     else:
-        return RoadmapWeek(week=found_week['week'], tasks=[RoadmapTask(**t) for t in found_week['tasks']])
\ No newline at end of file
+        updated_overlay = await roadmaps.update_task_state(overlay["_id"], link_update)
+    if not updated_overlay:
+        raise HTTPException(status_code=404, detail="No roadmap found for this session.")
+
+    await live_hub.local_roadmap_change(updated_overlay)
+
+    return merge_weeks(template, updated_overlay, only_week=task_update.week)[0]
+
+
+@router.websocket("/ws/tracker/{session_id}")
+async def tracker_updates(websocket: WebSocket, session_id: str):
+    """
+    Pushes task-level progress and enrollment changes for a session as they are written.
+    Messages are JSON objects with a "type" of "task", "enrollment", "roadmap" or "resync".
+    """
+    await websocket.accept()
+    queue = await live_hub.subscribe(session_id)
+    await websocket.send_json({"type": "subscribed", "sessionId": session_id, "mode": live_hub.mode})
+
+    async def forward_events():
+        while True:
+            await websocket.send_json(await queue.get())
+
+    async def wait_for_disconnect():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    sender = asyncio.create_task(forward_events())
+    receiver = asyncio.create_task(wait_for_disconnect())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        live_hub.unsubscribe(session_id, queue)
@@ -0,0 +1,93 @@
+"""
+Cold-start import budget for the API process.
+
+Runs ``python -X importtime -c "import main"`` in a fresh interpreter, reports the
+slowest modules and fails if the cumulative import time of ``main`` exceeds the
+budget or if any agent/LLM module is imported eagerly.
+
+Usage (from the backend directory):
+    python scripts/import_budget.py --budget-ms 1500 --runs 3
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be loaded lazily (on first agent use or by the background warm-up).
+FORBIDDEN_PREFIXES: Tuple[str, ...] = (
+    "agents.strategy_questions",
+    "agents.level_detector",
+    "agents.track_recommender",
+    "agents.roadmap_generator",
+    "langchain",
+    "langchain_core",
+    "langchain_community",
+    "langchain_groq",
+)
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure_once(target: str) -> Tuple[int, Dict[str, int]]:
+    """Returns the cumulative import time of ``target`` (µs) and per-module cumulative times."""
+    env = dict(os.environ, WARM_AGENTS_ON_STARTUP="false")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise SystemExit(f"Importing '{target}' failed with exit code {proc.returncode}.")
+
+    modules: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return modules.get(target, 0), modules
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Enforce a cold-start import budget for the API.")
+    parser.add_argument("--target", default="main", help="Module to import (default: main).")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=3, help="Number of fresh interpreters to sample.")
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest modules to print.")
+    args = parser.parse_args(argv)
+
+    totals = []
+    modules: Dict[str, int] = {}
+    for _ in range(args.runs):
+        total_us, modules = measure_once(args.target)
+        totals.append(total_us)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"'import {args.target}' cumulative: median {median_ms:.1f} ms over {args.runs} run(s) "
+          f"(min {min(totals) / 1000:.1f} ms, max {max(totals) / 1000:.1f} ms)")
+
+    print(f"Slowest {args.top} modules (cumulative, last run):")
+    for name, cumulative in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:9.1f} ms  {name}")
+
+    failed = False
+    eager = sorted(name for name in modules if name.startswith(FORBIDDEN_PREFIXES))
+    if eager:
+        failed = True
+        print(f"FAIL: agent/LLM modules imported at start-up: {', '.join(eager[:10])}")
+
+    if median_ms > args.budget_ms:
+        failed = True
+        print(f"FAIL: cold-start import time {median_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+
+    if not failed:
+        print(f"OK: within the {args.budget_ms:.0f} ms budget and no eager agent imports.")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
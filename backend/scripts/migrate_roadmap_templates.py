@@ -0,0 +1,75 @@
+"""
+Moves legacy Roadmap documents (full weeks embedded per session) onto shared,
+content-addressed RoadmapTemplate documents plus a per-session overlay.
+
+Completion flags become the overlay bitset; nothing else changes for the API.
+Safe to re-run: only documents that still embed "weeks" are touched.
+
+Usage (from the backend directory):
+    python scripts/migrate_roadmap_templates.py --batch-size 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import UpdateOne
+from database import connect_to_mongodb, close_mongodb_connection, get_database
+from repository import RoadmapTemplateRepository
+from roadmap_templates import build_template, empty_bitset, BITS_PER_WORD
+
+def _overlay_fields(roadmap_doc: dict) -> dict:
+    template = build_template(roadmap_doc["weeks"])
+    completed = empty_bitset(template["taskCount"])
+    index = 0
+    for week_data in roadmap_doc["weeks"]:
+        for task_item in week_data["tasks"]:
+            if task_item.get("isCompleted"):
+                completed[index // BITS_PER_WORD] |= 1 << (index % BITS_PER_WORD)
+            index += 1
+    return {"template": template, "completed": completed}
+
+async def migrate(batch_size: int) -> None:
+    db = get_database()
+    templates = RoadmapTemplateRepository(db)
+    migrated = 0
+    distinct_templates = set()
+    operations = []
+
+    async for roadmap_doc in db.Roadmap.find({"weeks": {"$exists": True}, "templateId": {"$exists": False}}):
+        fields = _overlay_fields(roadmap_doc)
+        template_id = await templates.ensure(fields["template"])
+        distinct_templates.add(template_id)
+        operations.append(UpdateOne(
+            {"_id": roadmap_doc["_id"]},
+            {
+                "$set": {"templateId": template_id, "completed": fields["completed"], "linkOverrides": {}},
+                "$unset": {"weeks": ""}
+            }
+        ))
+        if len(operations) >= batch_size:
+            await db.Roadmap.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+            operations = []
+            print(f"Migrated {migrated} roadmaps...")
+
+    if operations:
+        await db.Roadmap.bulk_write(operations, ordered=False)
+        migrated += len(operations)
+
+    print(f"Migrated {migrated} roadmaps onto {len(distinct_templates)} templates.")
+
+async def main(batch_size: int) -> None:
+    await connect_to_mongodb()
+    try:
+        await migrate(batch_size)
+    finally:
+        await close_mongodb_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate embedded roadmaps to shared templates.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,110 @@
+"""
+Recomputes all progress counters from the roadmap bitsets: Roadmap.progress,
+Roadmap.groupKeys, Session.progress and the ProgressAggregate collection.
+
+Use it once after deploying the counters (to backfill existing data) or to repair
+drift. Run scripts/migrate_roadmap_templates.py first so every roadmap is an overlay.
+
+Session documents are cached by the API workers (entity_cache.py). With
+CACHE_INVALIDATION=capped, the rewritten sessions are broadcast so every worker drops
+them. In the default local mode, workers keep serving the old counters for up to
+ENTITY_CACHE_TTL_SECONDS; restart them to pick up the rebuilt counters at once.
+
+Usage (from the backend directory):
+    python scripts/rebuild_progress_counters.py --batch-size 500
+"""
+import argparse
+import asyncio
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from pymongo import UpdateOne, ReplaceOne
+from config import settings
+from database import connect_to_mongodb, close_mongodb_connection, get_database
+from entity_cache import broadcast_invalidations
+from repository import RoadmapTemplateRepository
+from roadmap_templates import progress_from_bitset
+from progress import aggregate_keys
+
+def _empty_aggregate():
+    return {"sessions": 0, "roadmaps": 0, "completedTasks": 0, "totalTasks": 0}
+
+async def _flush(collection, operations):
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+    return []
+
+async def rebuild(batch_size: int) -> None:
+    db = get_database()
+    templates = RoadmapTemplateRepository(db)
+
+    sessions = {}
+    aggregates = defaultdict(_empty_aggregate)
+    async for session_doc in db.Session.find({}, {"domain": 1, "canonicalDomain": 1, "cohortId": 1}):
+        keys = aggregate_keys(session_doc.get("canonicalDomain") or session_doc.get("domain"), session_doc.get("cohortId"))
+        sessions[str(session_doc["_id"])] = {"keys": keys, "completed": 0, "total": 0}
+        for key in keys:
+            aggregates[key]["sessions"] += 1
+
+    operations = []
+    skipped = 0
+    async for overlay in db.Roadmap.find({}, {"sessionId": 1, "templateId": 1, "completed": 1}):
+        template = await templates.get(overlay["templateId"]) if overlay.get("templateId") else None
+        session = sessions.get(overlay["sessionId"])
+        if template is None or session is None:
+            skipped += 1
+            continue
+        progress = progress_from_bitset(template, overlay.get("completed", []))
+        operations.append(UpdateOne(
+            {"_id": overlay["_id"]},
+            {"$set": {"progress": progress, "groupKeys": session["keys"]}}
+        ))
+        session["completed"] += progress["completed"]
+        session["total"] += progress["total"]
+        for key in session["keys"]:
+            aggregates[key]["roadmaps"] += 1
+            aggregates[key]["completedTasks"] += progress["completed"]
+            aggregates[key]["totalTasks"] += progress["total"]
+        if len(operations) >= batch_size:
+            operations = await _flush(db.Roadmap, operations)
+    await _flush(db.Roadmap, operations)
+
+    operations = []
+    for session_id, session in sessions.items():
+        operations.append(UpdateOne(
+            {"_id": ObjectId(session_id)},
+            {"$set": {"progress": {"completed": session["completed"], "total": session["total"]}}}
+        ))
+        if len(operations) >= batch_size:
+            operations = await _flush(db.Session, operations)
+    await _flush(db.Session, operations)
+    if settings.CACHE_INVALIDATION == "capped":
+        await broadcast_invalidations("session", list(sessions), batch_size=batch_size)
+
+    await db.ProgressAggregate.delete_many({})
+    operations = [ReplaceOne({"_id": key}, {"_id": key, **counts}, upsert=True) for key, counts in aggregates.items()]
+    for start in range(0, len(operations), batch_size):
+        await _flush(db.ProgressAggregate, operations[start:start + batch_size])
+
+    print(f"Rebuilt counters for {len(sessions)} sessions and {len(aggregates)} groups "
+          f"({skipped} roadmaps skipped: legacy or orphaned).")
+    if settings.CACHE_INVALIDATION != "capped":
+        print(f"CACHE_INVALIDATION={settings.CACHE_INVALIDATION}: API workers may serve cached session "
+              f"counters for up to {settings.ENTITY_CACHE_TTL_SECONDS}s; restart them to refresh now.")
+
+async def main(batch_size: int) -> None:
+    await connect_to_mongodb()
+    try:
+        await rebuild(batch_size)
+    finally:
+        await close_mongodb_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild progress counters from roadmap bitsets.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
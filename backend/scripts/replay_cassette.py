@@ -0,0 +1,113 @@
+"""
+Re-runs the agent calls captured in a cassette (see agents/cassettes.py) offline.
+The LLM and Tavily responses come from the cassette, so the agents' parsing, retry
+and serialization code runs against the exact production traffic shape.
+
+Agent calls start at their recorded offsets, and every LLM/tool call sleeps for its
+recorded duration, both scaled by --speed (1 = original timing, 0 = no delays).
+The report compares recorded and replayed wall time per agent call and whether the
+result still matches. Use --profile to write cProfile stats for the replay.
+
+Record cassettes by running the API with CASSETTE_MODE=record.
+
+Usage (from the backend directory):
+    python scripts/replay_cassette.py data/cassettes/<name>.json.gz --speed 0 --repeat 5
+"""
+import argparse
+import asyncio
+import cProfile
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+
+# Replay answers every LLM and tool call from the cassette; set before any agent is built.
+settings.CASSETTE_MODE = "replay"
+
+from agents.cassettes import Cassette, use_cassette
+
+# route -> (module, class, whether the constructor takes a Tavily key)
+AGENTS = {
+    "strategy_questions": ("agents.strategy_questions", "StrategyQuestionsAgent", False),
+    "level_detector": ("agents.level_detector", "LevelDetectorAgent", False),
+    "track_recommender": ("agents.track_recommender", "CareerTrackRecommenderAgent", True),
+    "roadmap_generator": ("agents.roadmap_generator", "RoadmapGeneratorAgent", True),
+}
+
+def _build_agent(route: str):
+    module_name, class_name, needs_tavily = AGENTS[route]
+    agent_class = getattr(importlib.import_module(module_name), class_name)
+    if needs_tavily:
+        return agent_class(api_key="replay", tavily_api_key="replay")
+    return agent_class(api_key="replay")
+
+def _normalized(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+async def _replay_call(agent, call: Dict, speed: float) -> Dict:
+    route, method_name = call["name"].split(".", 1)
+    if speed > 0:
+        await asyncio.sleep(call["offsetMs"] / 1000 * speed)
+    started = time.perf_counter()
+    error = None
+    try:
+        result = await getattr(agent, method_name)(*call["response"]["args"], **call["response"]["kwargs"])
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    return {
+        "call": call["name"],
+        "recordedMs": call["durationMs"],
+        "replayMs": round(1000 * (time.perf_counter() - started), 1),
+        "matches": error is None and _normalized(result) == _normalized(call["response"]["result"]),
+        "error": error,
+    }
+
+async def replay(path: str, speed: float) -> List[Dict]:
+    cassette = Cassette.load(path, speed)
+    agents = {}
+    for call in cassette.agent_calls():
+        route = call["name"].split(".", 1)[0]
+        if route not in agents:
+            agents[route] = _build_agent(route)
+    with use_cassette(cassette):
+        return await asyncio.gather(*(
+            _replay_call(agents[call["name"].split(".", 1)[0]], call, speed) for call in cassette.agent_calls()
+        ))
+
+def main(args: argparse.Namespace) -> None:
+    profiler = cProfile.Profile() if args.profile else None
+    runs: List[List[Dict]] = []
+    for _ in range(args.repeat):
+        if profiler:
+            profiler.enable()
+        runs.append(asyncio.run(replay(args.cassette, args.speed)))
+        if profiler:
+            profiler.disable()
+
+    if not runs[0]:
+        print("Cassette contains no agent calls.")
+        return
+    print(f"{'agent call':<40} {'recorded ms':>12} {'replay ms (median)':>19}  result")
+    for index, first in enumerate(runs[0]):
+        replay_ms = statistics.median(run[index]["replayMs"] for run in runs)
+        outcome = first["error"] or ("matches" if all(run[index]["matches"] for run in runs) else "DIFFERS")
+        print(f"{first['call']:<40} {first['recordedMs']:>12.1f} {replay_ms:>19.1f}  {outcome}")
+
+    if profiler:
+        profiler.dump_stats(args.profile)
+        print(f"Profile written to {args.profile}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay the agent calls recorded in a cassette.")
+    parser.add_argument("cassette")
+    parser.add_argument("--speed", type=float, default=1.0, help="Delay scale: 1 = recorded timing, 0 = no delays.")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--profile", help="Write cProfile stats of the replays to this path.")
+    main(parser.parse_args())
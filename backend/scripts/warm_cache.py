@@ -0,0 +1,234 @@
+"""
+Pre-generates strategy questions, career tracks and roadmaps for a list of domains
+before traffic arrives, so /init-domain, /career-tracks and /roadmap serve them from
+the WarmContent collection instead of calling the agents.
+
+Domains are mapped onto canonical domains first (see domain_index.py). Every finished
+item is written to Mongo immediately and doubles as the checkpoint: re-running the
+command skips what is already there, so an interrupted run resumes where it stopped.
+Pass --force to regenerate.
+
+Agent calls are bounded by --concurrency, and the LLM requests they make by a sliding
+one-minute window of --requests-per-minute requests and --tokens-per-minute tokens
+(provider limits).
+Wall-clock time and tokens are reported per item and optionally written as JSON.
+
+Usage (from the backend directory):
+    python scripts/warm_cache.py --domains-file top_domains.txt --concurrency 4 \
+        --requests-per-minute 30 --tokens-per-minute 60000 --report warm_report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from database import connect_to_mongodb, close_mongodb_connection
+from domain_index import domain_normalizer
+from progress import domain_key
+from repository import WarmContentRepository, RoadmapTemplateRepository
+from roadmap_templates import build_template
+from agents.model_router import model_router
+from warm_content import LEVELS, questions_key, tracks_key, roadmap_key
+
+class RateLimiter:
+    """
+    Sliding one-minute window over provider (LLM) requests and the tokens they used; 0
+    disables a limit. Installed through model_router.meter_tokens, so every request an
+    agent call makes, retries and tool-calling turns included, waits here first.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, clock: Callable[[], float] = time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self._requests: Deque[float] = deque()
+        self._tokens: Deque[Tuple[float, int]] = deque()
+        self._lock = asyncio.Lock()
+
+    def _trim(self, now: float) -> None:
+        while self._requests and now - self._requests[0] >= 60:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= 60:
+            self._tokens.popleft()
+
+    async def acquire(self) -> None:
+        """Waits until one more request fits in the window and counts it."""
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self._trim(now)
+                waits = []
+                if self.requests_per_minute and len(self._requests) >= self.requests_per_minute:
+                    waits.append(60 - (now - self._requests[0]))
+                if self.tokens_per_minute and sum(tokens for _, tokens in self._tokens) >= self.tokens_per_minute:
+                    waits.append(60 - (now - self._tokens[0][0]))
+                if not waits:
+                    self._requests.append(now)
+                    return
+                await asyncio.sleep(max(0.05, min(waits)))
+
+    def record_tokens(self, tokens: int) -> None:
+        self._tokens.append((self.clock(), tokens))
+
+class Warmer:
+    def __init__(self, concurrency: int, limiter: RateLimiter, force: bool):
+        from agents.strategy_questions import StrategyQuestionsAgent
+        from agents.track_recommender import CareerTrackRecommenderAgent
+        from agents.roadmap_generator import RoadmapGeneratorAgent
+
+        self.questions_agent = StrategyQuestionsAgent(api_key=settings.GROQ_API_KEY)
+        self.recommender_agent = CareerTrackRecommenderAgent(
+            api_key=settings.GROQ_API_KEY,
+            tavily_api_key=settings.TAVILY_API_KEY
+        )
+        self.roadmap_agent = RoadmapGeneratorAgent(
+            api_key=settings.GROQ_API_KEY,
+            tavily_api_key=settings.TAVILY_API_KEY
+        )
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = limiter
+        self.force = force
+        self.warm = WarmContentRepository()
+        self.report: List[Dict[str, Any]] = []
+
+    async def _call(self, agent_call: Callable[[], Awaitable[Any]]) -> Tuple[Any, Dict[str, int]]:
+        with model_router.meter_tokens(self.limiter) as usage:
+            result = await agent_call()
+        return result, usage
+
+    def _record(self, domain: str, level: Optional[str], started: float, usages: List[Dict[str, int]],
+                status: str, error: Optional[str] = None) -> None:
+        row = {
+            "domain": domain,
+            "level": level or "-",
+            "status": status,
+            "seconds": round(time.perf_counter() - started, 2),
+            "promptTokens": sum(usage["promptTokens"] for usage in usages),
+            "completionTokens": sum(usage["completionTokens"] for usage in usages),
+            "totalTokens": sum(usage["totalTokens"] for usage in usages),
+            "error": error,
+        }
+        self.report.append(row)
+        print(f"{row['status']:>8}  {domain} / {row['level']}: {row['seconds']}s, {row['totalTokens']} tokens"
+              + (f" ({error})" if error else ""))
+
+    async def warm_questions(self, domain: str) -> None:
+        from agents.strategy_questions import is_fallback_questions
+
+        async with self.semaphore:
+            started = time.perf_counter()
+            try:
+                questions, usage = await self._call(lambda: self.questions_agent.generate_questions(domain))
+                if not questions:
+                    raise ValueError("agent returned no questions")
+                # On failure the agent answers with placeholder questions; those must never be cached.
+                if is_fallback_questions(questions):
+                    raise ValueError("agent failed and returned fallback questions")
+                await self.warm.save(questions_key(domain), {
+                    "kind": "questions", "domain": domain, "questions": questions,
+                    "seconds": round(time.perf_counter() - started, 2), "tokens": usage["totalTokens"]
+                })
+                self._record(domain, None, started, [usage], "warmed")
+            except Exception as e:
+                self._record(domain, None, started, [], "failed", str(e))
+
+    async def warm_pair(self, domain: str, level: str, need_tracks: bool, need_roadmap: bool) -> None:
+        async with self.semaphore:
+            started = time.perf_counter()
+            usages: List[Dict[str, int]] = []
+            errors = []
+
+            async def tracks() -> None:
+                tracks_data, usage = await self._call(lambda: self.recommender_agent.recommend_tracks(domain, level))
+                usages.append(usage)
+                if not tracks_data:
+                    raise ValueError("agent returned no career tracks")
+                await self.warm.save(tracks_key(domain, level), {
+                    "kind": "tracks", "domain": domain, "level": level, "tracks": tracks_data,
+                    "tokens": usage["totalTokens"]
+                })
+
+            async def roadmap() -> None:
+                weeks, usage = await self._call(lambda: self.roadmap_agent.generate_roadmap(domain, level))
+                usages.append(usage)
+                if not weeks:
+                    raise ValueError("agent returned no roadmap")
+                template = build_template(weeks)
+                await RoadmapTemplateRepository().ensure(template)
+                await self.warm.save(roadmap_key(domain, level), {
+                    "kind": "roadmap", "domain": domain, "level": level, "templateId": template["_id"],
+                    "taskCount": template["taskCount"], "tokens": usage["totalTokens"]
+                })
+
+            jobs = ([tracks()] if need_tracks else []) + ([roadmap()] if need_roadmap else [])
+            for outcome in await asyncio.gather(*jobs, return_exceptions=True):
+                if isinstance(outcome, Exception):
+                    errors.append(str(outcome))
+            self._record(domain, level, started, usages, "failed" if errors else "warmed", "; ".join(errors) or None)
+
+async def warm(domains: List[str], levels: List[str], warmer: Warmer) -> None:
+    await domain_normalizer.load()
+    canonical: Dict[str, str] = {}
+    for domain in domains:
+        resolved = domain_normalizer.canonical_or_raw(domain)
+        canonical.setdefault(domain_key(resolved), resolved)
+    domains = list(canonical.values())
+
+    keys = [questions_key(d) for d in domains]
+    keys += [key(d, level) for d in domains for level in levels for key in (tracks_key, roadmap_key)]
+    done = set() if warmer.force else await warmer.warm.existing_keys(keys)
+    print(f"Warming {len(domains)} domains x {len(levels)} levels; {len(done)} of {len(keys)} items already cached.")
+
+    jobs = []
+    for domain in domains:
+        if questions_key(domain) not in done:
+            jobs.append(warmer.warm_questions(domain))
+        for level in levels:
+            need_tracks = tracks_key(domain, level) not in done
+            need_roadmap = roadmap_key(domain, level) not in done
+            if need_tracks or need_roadmap:
+                jobs.append(warmer.warm_pair(domain, level, need_tracks, need_roadmap))
+
+    started = time.perf_counter()
+    await asyncio.gather(*jobs)
+    failed = sum(1 for row in warmer.report if row["status"] == "failed")
+    tokens = sum(row["totalTokens"] for row in warmer.report)
+    print(f"Done in {time.perf_counter() - started:.1f}s: {len(warmer.report) - failed} warmed, "
+          f"{failed} failed (re-run to retry), {tokens} tokens.")
+
+def _read_domains(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+async def main(args: argparse.Namespace) -> None:
+    domains = _read_domains(args.domains_file)
+    levels = [level.strip() for level in args.levels.split(",") if level.strip()]
+    await connect_to_mongodb()
+    try:
+        warmer = Warmer(args.concurrency, RateLimiter(args.requests_per_minute, args.tokens_per_minute), args.force)
+        await warm(domains, levels, warmer)
+    finally:
+        await close_mongodb_connection()
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(warmer.report, f, indent=2)
+        print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate agent content for domain x level pairs.")
+    parser.add_argument("--domains-file", required=True, help="One domain per line; '#' starts a comment line.")
+    parser.add_argument("--levels", default=",".join(LEVELS))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests-per-minute", type=int, default=30, help="LLM requests per minute (0 = unlimited).")
+    parser.add_argument("--tokens-per-minute", type=int, default=0, help="Tokens per minute (0 = unlimited).")
+    parser.add_argument("--force", action="store_true", help="Regenerate items that are already cached.")
+    parser.add_argument("--report", help="Write the per-item report as JSON to this path.")
+    args = parser.parse_args()
+    asyncio.run(main(args))
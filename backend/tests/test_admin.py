@@ -0,0 +1,24 @@
+import asyncio
+
+from fastapi import HTTPException
+
+from config import settings
+from routes.admin import require_admin_key
+
+def _status(key):
+    try:
+        asyncio.run(require_admin_key(key))
+    except HTTPException as error:
+        return error.status_code
+    return 200
+
+def test_admin_endpoints_are_disabled_without_a_configured_key(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "")
+    assert _status(None) == 503
+    assert _status("") == 503
+
+def test_admin_key_must_match(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "s3cret")
+    assert _status(None) == 403
+    assert _status("wrong") == 403
+    assert _status("s3cret") == 200
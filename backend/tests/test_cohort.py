@@ -0,0 +1,155 @@
+import asyncio
+from collections import defaultdict
+
+import pytest
+
+from models import CohortStudent, QuizAnswer
+from roadmap_templates import build_template
+from routes import cohort
+
+TRACKS = [{"title": f"Track {n}", "avgSalary": "-", "skills": [], "tools": [], "growth": "-"} for n in range(3)]
+TEMPLATE = build_template([{"week": 1, "tasks": [{"task": "a", "resourceLink": None}, {"task": "b", "resourceLink": None}]}])
+
+class _Store:
+    def __init__(self):
+        self.inserted = defaultdict(list)
+        self.increments = []
+        self.groups = []
+        self.results = []
+
+def _fake_repositories(monkeypatch, store):
+    def inserting(name):
+        class Repository:
+            async def insert_many(self, documents):
+                store.inserted[name].extend(documents)
+        return Repository
+
+    class Aggregates:
+        async def increment(self, keys, **counts):
+            store.increments.append((keys, counts))
+
+    class Jobs:
+        async def record_group(self, job_id, group_index, status, onboarded, error=None):
+            store.groups.append((group_index, status, onboarded, error))
+
+    class Results:
+        async def add(self, job_id, results):
+            store.results.extend(results)
+
+    class Normalizer:
+        def session_fields(self, domain):
+            return {"canonicalDomain": "Data Scientist", "domainMatchScore": 0.9}
+
+    for name in ("SessionRepository", "QuizRepository", "CareerTrackRepository"):
+        monkeypatch.setattr(cohort, name, inserting(name))
+    monkeypatch.setattr(cohort, "ProgressAggregateRepository", Aggregates)
+    monkeypatch.setattr(cohort, "CohortJobRepository", Jobs)
+    monkeypatch.setattr(cohort, "CohortJobResultRepository", Results)
+    monkeypatch.setattr(cohort, "domain_normalizer", Normalizer())
+
+class _Agents:
+    def __init__(self, tracks=TRACKS, template=TEMPLATE):
+        self.tracks, self.template = tracks, template
+
+    async def tracks_for(self, domain, level):
+        return self.tracks
+
+    async def template_for(self, domain, level):
+        return self.template
+
+    async def questions_for(self, domain):
+        return [{"id": 1, "question": "Why data?"}]
+
+def _students():
+    answers = [QuizAnswer(question=f"q{n}", answer="a") for n in range(10)]
+    return [
+        CohortStudent(externalId="s1", domain="data science", answers=answers),
+        CohortStudent(externalId="s2", domain="Data Science"),
+    ]
+
+def _onboard(agents):
+    return asyncio.run(cohort._onboard_group("job", 0, "Data Scientist", "Beginner", [0, 1], _students(), "c1", agents))
+
+@pytest.fixture
+def store(monkeypatch):
+    store = _Store()
+    _fake_repositories(monkeypatch, store)
+    return store
+
+def test_group_creates_sessions_quizzes_and_tracks_but_no_roadmaps(store):
+    assert _onboard(_Agents())
+
+    sessions = store.inserted["SessionRepository"]
+    assert [session["cohortId"] for session in sessions] == ["c1", "c1"]
+    # Roadmaps are created (and counted) when opened, so nothing is owed yet.
+    assert all(session["progress"] == {"completed": 0, "total": 0} for session in sessions)
+    # The tracks inserted here are this level's; /career-tracks must not regenerate them.
+    assert all(session["tracksGeneratedFor"] == "Beginner" for session in sessions)
+    assert len(store.inserted["CareerTrackRepository"]) == 2 * len(TRACKS)
+    assert store.increments == [(["domain:data scientist", "cohort:c1"], {"sessions": 2})]
+
+    quizzes = store.inserted["QuizRepository"]
+    assert len(quizzes[0]["answers"]) == 10
+    assert quizzes[1]["questions"] == [{"id": 1, "question": "Why data?"}]
+
+    assert store.groups == [(0, "completed", 2, None)]
+    assert [result["externalId"] for result in store.results] == ["s1", "s2"]
+    assert all(len(result["trackIds"]) == len(TRACKS) for result in store.results)
+
+def test_group_without_a_roadmap_fails_without_inserting(store):
+    assert not _onboard(_Agents(template=None))
+    assert not store.inserted
+    assert store.groups == [(0, "failed", 0, "Agent returned no roadmap.")]
+
+def test_agent_calls_share_one_semaphore(monkeypatch):
+    async def nothing_warmed(*args):
+        return None
+
+    monkeypatch.setattr(cohort, "warm_tracks", nothing_warmed)
+    running, peak = 0, 0
+
+    class Recommender:
+        async def recommend_tracks(self, domain, level):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return TRACKS
+
+    agents = cohort._SharedAgents.__new__(cohort._SharedAgents)
+    agents.recommender_agent = Recommender()
+
+    async def run():
+        agents.semaphore = asyncio.Semaphore(2)
+        await asyncio.gather(*(agents.tracks_for(f"domain {n}", "Beginner") for n in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+
+def test_generated_template_is_stored_for_lazily_created_roadmaps(monkeypatch):
+    saved = []
+
+    async def nothing_warmed(*args):
+        return None
+
+    async def save(domain, level, template):
+        saved.append((domain, level, template["taskCount"]))
+
+    class Generator:
+        async def generate_roadmap(self, domain, level):
+            return [{"week": 1, "tasks": [{"task": "a", "resourceLink": None}]}]
+
+    monkeypatch.setattr(cohort, "warm_template", nothing_warmed)
+    monkeypatch.setattr(cohort, "save_warm_template", save)
+    agents = cohort._SharedAgents.__new__(cohort._SharedAgents)
+    agents.roadmap_agent = Generator()
+
+    async def run():
+        agents.semaphore = asyncio.Semaphore(1)
+        return await agents.template_for("Data Scientist", "Beginner")
+
+    template = asyncio.run(run())
+    # /roadmap/{track_id} reads it back with warm_template() instead of calling the agent per student.
+    assert saved == [("Data Scientist", "Beginner", 1)]
+    assert template["taskCount"] == 1
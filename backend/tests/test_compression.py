@@ -0,0 +1,87 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+import compression
+from compression import CompressionMiddleware, negotiate_encoding
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+def test_negotiate_prefers_brotli_then_gzip(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("br;q=0.5, gzip;q=0.8") == "gzip"
+    assert negotiate_encoding("*") == "br"
+
+def test_negotiate_honours_q_values_and_identity(without_brotli):
+    assert negotiate_encoding("gzip, br") == "gzip"
+    assert negotiate_encoding("*;q=0.2") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("gzip;q=oops") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+
+def _app(bodies, content_type=b"application/json", extra_headers=()):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type), *extra_headers]})
+        for index, body in enumerate(bodies):
+            await send({"type": "http.response.body", "body": body, "more_body": index < len(bodies) - 1})
+    return app
+
+def _call(app, accept_encoding=b"gzip", minimum_size=1024):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(scope, receive, send))
+    start, *bodies = messages
+    return dict(start["headers"]), bodies
+
+def test_large_body_is_gzipped_with_length_and_vary(without_brotli):
+    payload = b'{"items": [' + b'"x", ' * 500 + b'"x"]}'
+    headers, bodies = _call(_app([payload]))
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(bodies[0]["body"])
+    assert gzip.decompress(bodies[0]["body"]) == payload
+
+def test_small_body_and_other_types_pass_through(without_brotli):
+    headers, bodies = _call(_app([b'{"ok": true}']))
+    assert b"content-encoding" not in headers and bodies[0]["body"] == b'{"ok": true}'
+
+    image = b"\x89PNG" * 1000
+    headers, bodies = _call(_app([image], content_type=b"image/png"))
+    assert b"content-encoding" not in headers and bodies[0]["body"] == image
+
+    encoded = gzip.compress(b"{}" * 1000)
+    headers, bodies = _call(_app([encoded], extra_headers=[(b"content-encoding", b"gzip")]))
+    assert bodies[0]["body"] == encoded
+
+def test_no_accept_encoding_passes_through(without_brotli):
+    payload = b"[" + b"1," * 2000 + b"1]"
+    headers, bodies = _call(_app([payload]), accept_encoding=b"identity")
+    assert b"content-encoding" not in headers and bodies[0]["body"] == payload
+
+def test_streamed_chunks_are_each_decodable_as_they_arrive(without_brotli):
+    lines = [b'{"line": %d}\n' % index for index in range(5)]
+    headers, bodies = _call(_app(lines, content_type=b"application/x-ndjson"))
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert [body["more_body"] for body in bodies] == [True] * 4 + [False]
+    # Each chunk is sync-flushed, so a client can decode every line without waiting for the end.
+    decoder = zlib.decompressobj(31)
+    for line, body in zip(lines, bodies):
+        assert decoder.decompress(body["body"]) == line
+    assert decoder.eof
@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+
+import pytest
+
+from config import settings
+from domain_index import DEFAULT_CANONICAL_DOMAINS, DomainNormalizationIndex, normalize_text
+
+TECHS = [
+    "react", "angular", "vue", "node", "django", "flask", "spring", "rails", "kotlin", "swift", "golang",
+    "rust", "java", "python", "php", "dotnet", "scala", "elixir", "haskell", "terraform", "kubernetes",
+    "docker", "aws", "azure", "gcp", "spark", "kafka", "hadoop", "tableau", "powerbi", "salesforce", "sap",
+    "oracle", "unity", "unreal", "solidity", "tensorflow", "pytorch", "nlp", "vision", "robotics",
+    "embedded", "fpga", "network", "security", "mobile", "web", "cloud", "data", "platform",
+]
+ROLES = ["developer", "engineer", "architect", "analyst", "specialist", "consultant",
+         "administrator", "scientist", "designer", "manager", "lead", "tester"]
+SENIORITY = ["", "senior ", "junior ", "lead ", "principal ", "staff "]
+
+def _role_domains(count=5000, seed=7):
+    """The default domains plus generated role-style ones, sharing many common grams."""
+    rng = random.Random(seed)
+    names = {entry["name"].lower() for entry in DEFAULT_CANONICAL_DOMAINS}
+    entries = list(DEFAULT_CANONICAL_DOMAINS)
+    while len(entries) < count:
+        name = f"{rng.choice(SENIORITY)}{rng.choice(TECHS)} {rng.choice(TECHS)} {rng.choice(ROLES)}"
+        if name not in names:
+            names.add(name)
+            entries.append({"name": name.title(), "aliases": []})
+    return entries
+
+def _index(entries=DEFAULT_CANONICAL_DOMAINS):
+    index = DomainNormalizationIndex(threshold=settings.DOMAIN_MATCH_THRESHOLD)
+    index.build(entries)
+    return index
+
+def _name(match):
+    return match[0]["name"] if match else None
+
+def test_exact_names_and_aliases_score_one():
+    index = _index()
+    assert index.lookup("Frontend Developer") == (DEFAULT_CANONICAL_DOMAINS[0], 1.0)
+    assert _name(index.lookup("front-end developer")) == "Frontend Developer"
+    assert index.lookup("ML Engineer")[1] == 1.0
+
+def test_fuzzy_matches_and_rejects():
+    index = _index()
+    assert _name(index.lookup("machine learning dev")) == "Machine Learning Engineer"
+    assert _name(index.lookup("data sciencee")) == "Data Scientist"
+    assert _name(index.lookup("frontend engineer")) == "Frontend Developer"
+    assert _name(index.lookup("full stack web dev")) == "Full Stack Developer"
+    assert _name(index.lookup("Cyber Security Analyst")) == "Cybersecurity Analyst"
+    assert index.lookup("astronaut") is None
+
+def test_seniority_does_not_dilute_the_match():
+    assert _index().lookup("Senior Data Engineer") == (DEFAULT_CANONICAL_DOMAINS[6], 1.0)
+
+@pytest.mark.parametrize("text", [
+    "Project Manager",          # shares only the role word with Product Manager
+    "Software Architect",       # an architect, not a Software Engineer; "software" is not a Cloud Engineer
+    "Business Developer",       # "business analyst" is a Data Analyst alias, but the role differs
+    "Game Designer",            # neither a Game Developer nor a UI/UX Designer
+    "Web Designer",
+    "Cloud Security Engineer",  # "security" is not a Cloud Engineer word
+    "Data",                     # fits Data Scientist, Analyst and Engineer alike
+    "developer",
+    "manager",
+])
+def test_unrelated_roles_are_not_pulled_onto_a_canonical_domain(text):
+    assert _index().lookup(text) is None
+
+def test_abbreviations_only_expand_with_context():
+    assert normalize_text("be") == "be"
+    assert normalize_text("BE dev") == "backend developer"
+    assert normalize_text("ai engineer") == "ai engineer"
+    assert _index().lookup("be") is None
+
+def test_lookup_finds_the_exact_best_match_in_a_large_index():
+    entries = _role_domains()
+    index = _index(entries)
+    # Brute-force cosine over every form agrees with the inverted-index lookup.
+    exhaustive = DomainNormalizationIndex(threshold=settings.DOMAIN_MATCH_THRESHOLD, max_postings=len(entries) * 2, candidates=len(entries) * 2,
+                                          grams_per_word=100)
+    exhaustive.build(entries)
+    rng = random.Random(3)
+    words = ["senior", "java", "python", "react", "developer", "engineer", "cloud", "data", "security", "mobile"]
+    queries = [" ".join(rng.sample(words, rng.randint(2, 3))) for _ in range(200)]
+    # Ties between equally similar forms may resolve differently, so compare the best scores.
+    agreeing = sum(
+        (index.lookup(query) or (None, None))[1] == (exhaustive.lookup(query) or (None, None))[1] for query in queries
+    )
+    assert agreeing >= 0.97 * len(queries)
+
+def test_lookup_stays_under_a_millisecond_with_5k_domains():
+    index = _index(_role_domains())
+    queries = ["machine learning dev", "frontend engineer", "senior java engineer", "python developer",
+               "full stack web dev", "react js developer"]
+    timings = []
+    for _ in range(20):
+        for query in queries:
+            started = time.perf_counter()
+            index.lookup(query)
+            timings.append(time.perf_counter() - started)
+    assert statistics.median(timings) < 0.001
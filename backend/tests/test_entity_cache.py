@@ -0,0 +1,153 @@
+import asyncio
+
+from bson import ObjectId
+
+import entity_cache
+from config import settings
+from entity_cache import CacheInvalidationBus, TTLCache, read_through, remember
+
+SESSION_ID = str(ObjectId())
+
+class FakeCollection:
+    """find_one by _id over a dict; ``during_read`` runs while a read is "in flight"."""
+
+    def __init__(self, documents):
+        self.documents = {str(doc["_id"]): doc for doc in documents}
+        self.reads = []
+        self.during_read = None
+
+    async def find_one(self, query, projection=None):
+        self.reads.append(projection)
+        document = dict(self.documents.get(str(query["_id"])) or {}) or None
+        if self.during_read is not None:
+            await self.during_read()
+        if document is not None and projection is not None:
+            document = {key: value for key, value in document.items() if key == "_id" or key in projection}
+        return document
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def _session(**fields):
+    return {"_id": ObjectId(SESSION_ID), "domain": "Data Scientist", "level": None, **fields}
+
+def test_hits_are_served_from_the_cache():
+    cache = TTLCache("session", max_entries=10, ttl_seconds=60)
+    collection = FakeCollection([_session()])
+
+    async def run():
+        await read_through(cache, collection, SESSION_ID)
+        return await read_through(cache, collection, SESSION_ID, {"domain": 1})
+
+    assert asyncio.run(run()) == {"_id": ObjectId(SESSION_ID), "domain": "Data Scientist"}
+    # The second read applied the top-level projection to the cached document in memory.
+    assert collection.reads == [None]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_a_write_racing_a_read_is_not_remembered():
+    cache = TTLCache("session", max_entries=10, ttl_seconds=60)
+    bus = CacheInvalidationBus({"session": cache})
+    collection = FakeCollection([_session()])
+
+    async def write_level():
+        # The write lands after the read fetched the old document but before it is cached.
+        collection.documents[SESSION_ID] = _session(level="Beginner")
+        await bus.invalidate("session", [SESSION_ID])
+
+    async def run():
+        collection.during_read = write_level
+        stale = await read_through(cache, collection, SESSION_ID)
+        collection.during_read = None
+        fresh = await read_through(cache, collection, SESSION_ID)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert stale["level"] is None
+    assert fresh["level"] == "Beginner"
+    assert len(collection.reads) == 2
+
+def test_remember_with_an_old_version_is_ignored():
+    cache = TTLCache("careerTrack", max_entries=10, ttl_seconds=60)
+    version = cache.version
+    cache.invalidate("anything")
+    remember(cache, [{"_id": ObjectId(), "title": "old"}], version)
+    assert cache.stats()["entries"] == 0
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(entity_cache.time, "monotonic", clock)
+    cache = TTLCache("session", max_entries=10, ttl_seconds=60)
+    cache.put(SESSION_ID, _session())
+
+    clock.now += 59
+    assert cache.get(SESSION_ID) is not None
+    clock.now += 2
+    assert cache.get(SESSION_ID) is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entries_are_evicted_at_the_size_limit():
+    assert entity_cache.session_cache.max_entries == settings.ENTITY_CACHE_SIZE
+    cache = TTLCache("session", max_entries=3, ttl_seconds=60)
+    for key in "abc":
+        cache.put(key, {"_id": key})
+    cache.get("a")
+    cache.put("d", {"_id": "d"})
+
+    assert cache.get("b") is None
+    assert [cache.get(key) is not None for key in "acd"] == [True, True, True]
+    assert cache.stats()["evictions"] == 1
+
+def test_projections_that_cannot_be_applied_in_memory_bypass_the_cache():
+    cache = TTLCache("session", max_entries=10, ttl_seconds=60)
+    collection = FakeCollection([_session(progress={"completed": 1, "total": 4})])
+
+    async def run():
+        await read_through(cache, collection, SESSION_ID, {"progress.total": 1})
+        await read_through(cache, collection, SESSION_ID, {"level": 0})
+
+    asyncio.run(run())
+    assert collection.reads == [{"progress.total": 1}, {"level": 0}]
+    assert cache.stats()["entries"] == 0
+
+def test_a_disabled_cache_always_reads_through():
+    cache = TTLCache("session", max_entries=0, ttl_seconds=60)
+    collection = FakeCollection([_session()])
+
+    async def run():
+        for _ in range(2):
+            await read_through(cache, collection, SESSION_ID)
+
+    asyncio.run(run())
+    assert len(collection.reads) == 2
+
+def test_cached_documents_are_not_shared_with_callers():
+    cache = TTLCache("session", max_entries=10, ttl_seconds=60)
+    collection = FakeCollection([_session()])
+
+    async def run():
+        (await read_through(cache, collection, SESSION_ID))["level"] = "Advanced"
+        return await read_through(cache, collection, SESSION_ID)
+
+    assert asyncio.run(run())["level"] is None
+
+def test_bus_broadcasts_only_in_capped_mode(monkeypatch):
+    broadcasts = []
+
+    async def broadcast(entity, entity_ids, origin):
+        broadcasts.append((entity, entity_ids))
+
+    monkeypatch.setattr(entity_cache, "broadcast_invalidations", broadcast)
+    cache = TTLCache("session", max_entries=10, ttl_seconds=60)
+    bus = CacheInvalidationBus({"session": cache})
+    cache.put(SESSION_ID, _session())
+
+    asyncio.run(bus.invalidate("session", [SESSION_ID]))
+    assert cache.get(SESSION_ID) is None and broadcasts == []
+
+    bus.mode = "capped"
+    asyncio.run(bus.invalidate("session", [SESSION_ID]))
+    assert broadcasts == [("session", [SESSION_ID])]
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from fieldsets import (
+    SESSION_FIELDS, TRACK_FIELDS, mongo_projection, nested_fields, ordered, parse_fields, select, sparse_response, wants
+)
+
+SUMMARY_FIELDS = SESSION_FIELDS + ("careerTracks",) + tuple(f"careerTracks.{field}" for field in TRACK_FIELDS)
+
+def test_parse_fields_omitted_or_blank_means_full_response():
+    assert parse_fields(None, SESSION_FIELDS) is None
+    assert parse_fields("", SESSION_FIELDS) is None
+    assert parse_fields(" , ,", SESSION_FIELDS) is None
+
+def test_parse_fields_strips_and_deduplicates():
+    assert parse_fields(" domain,level , domain", SESSION_FIELDS) == {"domain", "level"}
+
+def test_parse_fields_rejects_unknown_fields_with_400():
+    with pytest.raises(HTTPException) as error:
+        parse_fields("level,password,careerTracks.secret", SUMMARY_FIELDS)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Unknown fields: careerTracks.secret, password."
+
+def test_nested_fields_and_wants():
+    selected = {"level", "careerTracks.title", "careerTracks.skills"}
+    assert nested_fields(selected, "careerTracks", TRACK_FIELDS) == {"title", "skills"}
+    assert nested_fields({"careerTracks"}, "careerTracks", TRACK_FIELDS) == set(TRACK_FIELDS)
+    assert wants(selected, "careerTracks")
+    assert not wants({"level"}, "careerTracks")
+
+def test_mongo_projection_maps_ids_to_the_stored_field():
+    assert mongo_projection(["sessionId", "domain"]) == {"_id": 1, "domain": 1}
+    assert mongo_projection(["trackId", "title"]) == {"_id": 1, "title": 1}
+    # An empty selection still projects something, rather than the whole document.
+    assert mongo_projection([]) == {"_id": 1}
+
+def test_select_serializes_ids_like_the_full_responses():
+    session_id, track_id = ObjectId(), ObjectId()
+    session = {"_id": session_id, "domain": "Data Scientist", "level": "Beginner"}
+    assert select(session, ordered({"level", "sessionId"}, SESSION_FIELDS)) == {
+        "sessionId": str(session_id), "level": "Beginner"
+    }
+    assert select({"_id": track_id, "title": "ML"}, ["trackId", "skills"]) == {"_id": str(track_id), "skills": None}
+
+def test_sparse_response_encodes_without_a_response_model():
+    response = sparse_response({"level": "Beginner", "careerTracks": [{"title": "ML"}]})
+    assert json.loads(response.body) == {"level": "Beginner", "careerTracks": [{"title": "ML"}]}
@@ -0,0 +1,136 @@
+import asyncio
+
+import live_updates
+from live_updates import LiveUpdateHub
+from roadmap_templates import build_template, empty_bitset
+
+TEMPLATE = build_template([
+    {"week": 1, "tasks": [{"task": "a", "resourceLink": "https://a"}, {"task": "b", "resourceLink": None}]},
+    {"week": 2, "tasks": [{"task": "c", "resourceLink": None}]},
+])
+OTHER_TEMPLATE = build_template([{"week": 1, "tasks": [{"task": "z", "resourceLink": None}]}])
+
+def _overlay(bits=0, template=TEMPLATE, **fields):
+    completed = empty_bitset(template["taskCount"])
+    completed[0] = bits
+    return {"_id": "r1", "sessionId": "s1", "trackId": "t1", "templateId": template["_id"],
+            "completed": completed, **fields}
+
+class FakeRoadmaps:
+    overlays = []
+    during_read = None
+
+    async def list_for_session(self, session_id, projection=None):
+        if FakeRoadmaps.during_read is not None:
+            await FakeRoadmaps.during_read()
+        return [doc for doc in FakeRoadmaps.overlays if doc["sessionId"] == session_id]
+
+class FakeTemplates:
+    async def get(self, template_id):
+        return {TEMPLATE["_id"]: TEMPLATE, OTHER_TEMPLATE["_id"]: OTHER_TEMPLATE}.get(template_id)
+
+def _hub(monkeypatch, overlays, queue_size=100):
+    FakeRoadmaps.overlays = overlays
+    FakeRoadmaps.during_read = None
+    monkeypatch.setattr(live_updates, "RoadmapRepository", FakeRoadmaps)
+    monkeypatch.setattr(live_updates, "RoadmapTemplateRepository", FakeTemplates)
+    return LiveUpdateHub(queue_size=queue_size)
+
+def _drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+def test_only_changed_tasks_are_published(monkeypatch):
+    hub = _hub(monkeypatch, [_overlay()])
+
+    async def run():
+        queue = await hub.subscribe("s1")
+        await hub.notify_roadmap(_overlay(bits=0b100))
+        await hub.notify_roadmap(_overlay(bits=0b100, linkOverrides={"1": "https://b"}))
+        # An unchanged overlay publishes nothing.
+        await hub.notify_roadmap(_overlay(bits=0b100, linkOverrides={"1": "https://b"}))
+        return _drain(queue)
+
+    assert asyncio.run(run()) == [
+        {"type": "task", "sessionId": "s1", "trackId": "t1", "week": 2, "task": "c",
+         "isCompleted": True, "resourceLink": None},
+        {"type": "task", "sessionId": "s1", "trackId": "t1", "week": 1, "task": "b",
+         "isCompleted": False, "resourceLink": "https://b"},
+    ]
+
+def test_new_or_replaced_roadmaps_publish_a_roadmap_event(monkeypatch):
+    hub = _hub(monkeypatch, [])
+
+    async def run():
+        queue = await hub.subscribe("s1")
+        await hub.notify_roadmap(_overlay())
+        await hub.notify_roadmap(_overlay(template=OTHER_TEMPLATE))
+        return _drain(queue)
+
+    assert asyncio.run(run()) == [{"type": "roadmap", "sessionId": "s1", "trackId": "t1"}] * 2
+
+def test_a_full_queue_is_replaced_by_one_resync(monkeypatch):
+    hub = _hub(monkeypatch, [_overlay()], queue_size=2)
+
+    async def run():
+        slow = await hub.subscribe("s1")
+        fast = await hub.subscribe("s1")
+        for bits in (0b001, 0b011, 0b111):
+            await hub.notify_roadmap(_overlay(bits=bits))
+            if not fast.empty():
+                fast.get_nowait()
+        return _drain(slow), fast
+
+    slow_events, fast = asyncio.run(run())
+    assert slow_events == [{"type": "resync", "sessionId": "s1"}]
+    # Other subscribers of the session keep their diffs.
+    assert fast.empty()
+
+def test_changes_during_the_snapshot_read_are_ignored_not_lost(monkeypatch):
+    hub = _hub(monkeypatch, [_overlay()])
+
+    async def concurrent_change():
+        # The session is not registered yet, so this must be a no-op rather than a KeyError.
+        await hub.notify_roadmap(_overlay(bits=0b001))
+        hub.notify_enrollment({"_id": "t1", "sessionId": "s1", "isEnrolled": True})
+
+    async def run():
+        FakeRoadmaps.during_read = concurrent_change
+        queue = await hub.subscribe("s1")
+        FakeRoadmaps.during_read = None
+        # The snapshot taken after registration is the baseline for the next diff.
+        await hub.notify_roadmap(_overlay(bits=0b001))
+        return _drain(queue)
+
+    events = asyncio.run(run())
+    assert [(event["type"], event["task"]) for event in events] == [("task", "a")]
+
+def test_unsubscribing_the_last_client_drops_the_session_state(monkeypatch):
+    hub = _hub(monkeypatch, [_overlay()])
+
+    async def run():
+        first = await hub.subscribe("s1")
+        second = await hub.subscribe("s1")
+        hub.unsubscribe("s1", first)
+        assert hub.subscriber_count() == 1 and "s1" in hub._state
+        hub.unsubscribe("s1", second)
+        hub.unsubscribe("s1", second)
+        await hub.notify_roadmap(_overlay(bits=0b001))
+
+    asyncio.run(run())
+    assert hub.subscriber_count() == 0
+    assert hub._state == {} and hub._subscribers == {}
+
+def test_local_notifications_are_skipped_when_change_streams_deliver_them(monkeypatch):
+    hub = _hub(monkeypatch, [_overlay()])
+
+    async def run():
+        queue = await hub.subscribe("s1")
+        hub.mode = "change-stream"
+        await hub.local_roadmap_change(_overlay(bits=0b001))
+        hub.local_enrollment_change({"_id": "t1", "sessionId": "s1", "isEnrolled": True})
+        return _drain(queue)
+
+    assert asyncio.run(run()) == []
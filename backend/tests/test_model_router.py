@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from agents import strategy_questions
+from agents.model_router import ModelRouter
+from agents.strategy_questions import StrategyQuestionsAgent, is_fallback_questions
+from config import settings
+
+QUESTIONS = [{"id": n, "question": f"Question {n}"} for n in range(1, 11)]
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_SMALL_MODEL", "small-model")
+    monkeypatch.setattr(settings, "LLM_LARGE_MODEL", "large-model")
+    monkeypatch.setattr(settings, "STRATEGY_QUESTIONS_MODELS", "small,large")
+    return ModelRouter()
+
+def test_tiers_resolve_aliases_and_stay_on_the_last_one(router, monkeypatch):
+    assert router.tiers("strategy_questions") == ["small-model", "large-model"]
+    assert [router.model_for_attempt("strategy_questions", attempt) for attempt in range(3)] == [
+        "small-model", "large-model", "large-model"
+    ]
+    assert not router.is_escalated("strategy_questions", "small-model")
+    assert router.is_escalated("strategy_questions", "large-model")
+
+    monkeypatch.setattr(settings, "STRATEGY_QUESTIONS_MODELS", "mixtral-8x7b, large")
+    assert router.tiers("strategy_questions") == ["mixtral-8x7b", "large-model"]
+    monkeypatch.setattr(settings, "STRATEGY_QUESTIONS_MODELS", "")
+    assert router.tiers("strategy_questions") == ["large-model"]
+
+class ScriptedModels:
+    """Stub chat models: each call to ``model`` pops its next reply (a string or an exception)."""
+
+    def __init__(self, **replies):
+        self.replies = {model.replace("_", "-"): list(items) for model, items in replies.items()}
+        self.calls = []
+
+    def chat_model(self, model, **llm_kwargs):
+        def reply(prompt_value):
+            self.calls.append(model)
+            item = self.replies[model].pop(0)
+            if isinstance(item, Exception):
+                raise item
+            return AIMessage(content=item)
+        return RunnableLambda(reply)
+
+@pytest.fixture
+def agent_with(router, monkeypatch, tmp_path):
+    sleeps = []
+
+    async def no_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(strategy_questions, "model_router", router)
+    monkeypatch.setattr(strategy_questions.asyncio, "sleep", no_sleep)
+    resume = tmp_path / "resume.txt"
+    resume.write_text("SKILLS\nPython, SQL\n", encoding="utf-8")
+
+    def build(**replies):
+        models = ScriptedModels(**replies)
+        monkeypatch.setattr(router, "chat_model", models.chat_model)
+        return StrategyQuestionsAgent(api_key="test", resume_file=str(resume)), models, sleeps
+    return build
+
+def _generate(agent):
+    return asyncio.run(agent.generate_questions("Data Scientist"))
+
+def test_valid_small_model_output_is_accepted(router, agent_with):
+    agent, models, _ = agent_with(small_model=[json.dumps(QUESTIONS)])
+
+    assert _generate(agent) == QUESTIONS
+    assert models.calls == ["small-model"]
+    stats = router.snapshot()["strategy_questions"]
+    assert (stats["requests"], stats["escalationRate"], stats["failureRate"]) == (1, 0.0, 0.0)
+    assert stats["models"]["small-model"]["calls"] == 1
+    assert stats["models"]["small-model"]["failures"] == 0
+
+def test_invalid_output_escalates_to_the_large_model(router, agent_with):
+    agent, models, sleeps = agent_with(
+        small_model=['[{"id": 1}]'],
+        large_model=[f"```json\n{json.dumps(QUESTIONS)}\n```"],
+    )
+
+    assert _generate(agent) == QUESTIONS
+    assert models.calls == ["small-model", "large-model"]
+    # Moving up a tier is the retry strategy; there is no backoff before it.
+    assert sleeps == []
+    stats = router.snapshot()["strategy_questions"]
+    assert (stats["requests"], stats["escalationRate"], stats["failureRate"]) == (1, 1.0, 0.0)
+    assert stats["models"]["small-model"]["failures"] == 1
+    assert (stats["models"]["large-model"]["calls"], stats["models"]["large-model"]["failures"]) == (1, 0)
+
+def test_model_errors_escalate_like_invalid_output(router, agent_with):
+    agent, models, _ = agent_with(small_model=[RuntimeError("rate limited")], large_model=[json.dumps(QUESTIONS)])
+
+    assert _generate(agent) == QUESTIONS
+    assert models.calls == ["small-model", "large-model"]
+    assert router.snapshot()["strategy_questions"]["escalationRate"] == 1.0
+
+def test_exhausted_retries_back_off_on_the_last_tier_and_fall_back(router, agent_with):
+    agent, models, sleeps = agent_with(small_model=["nope"], large_model=["still nope", RuntimeError("down")])
+
+    assert is_fallback_questions(_generate(agent))
+    assert models.calls == ["small-model", "large-model", "large-model"]
+    assert sleeps == [4]
+    stats = router.snapshot()["strategy_questions"]
+    assert (stats["requests"], stats["escalationRate"], stats["failureRate"]) == (1, 1.0, 1.0)
+    assert stats["models"]["large-model"]["calls"] == 2
+    assert stats["models"]["large-model"]["failures"] == 2
+
+def test_escalation_rate_is_per_request(router, agent_with):
+    agent, _, _ = agent_with(
+        small_model=[json.dumps(QUESTIONS), "bad", json.dumps(QUESTIONS), json.dumps(QUESTIONS)],
+        large_model=[json.dumps(QUESTIONS)],
+    )
+    for _ in range(4):
+        _generate(agent)
+
+    stats = router.snapshot()["strategy_questions"]
+    assert stats["requests"] == 4
+    assert stats["escalationRate"] == 0.25
+    assert stats["models"]["small-model"]["calls"] == 4
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from config import settings
+from models import ProgressBatchRequest
+from roadmap_templates import build_template, empty_bitset
+from routes import analytics
+
+TEMPLATE = build_template([
+    {"week": 1, "tasks": [{"task": "a", "resourceLink": None}, {"task": "b", "resourceLink": None}]},
+    {"week": 2, "tasks": [{"task": "c", "resourceLink": None}]},
+])
+
+def _overlay(session_id, track_id, completed=0, total=3, cohort="c1", **fields):
+    return {"sessionId": session_id, "trackId": track_id, "templateId": TEMPLATE["_id"],
+            "groupKeys": [f"cohort:{cohort}"], "progress": {"completed": completed, "total": total}, **fields}
+
+class FakeRoadmaps:
+    def __init__(self, overlays, fail_after=None):
+        self.overlays = overlays
+        self.fail_after = fail_after
+        self.queries = []
+
+    async def by_session(self, query, projection=None):
+        self.queries.append(query)
+        if "sessionId" in query:
+            matching = [doc for doc in self.overlays if doc["sessionId"] in query["sessionId"]["$in"]]
+        else:
+            matching = [doc for doc in self.overlays if query["groupKeys"] in doc["groupKeys"]]
+        for index, doc in enumerate(sorted(matching, key=lambda doc: doc["sessionId"])):
+            if index == self.fail_after:
+                raise RuntimeError("cursor died")
+            yield doc
+
+class FakeTemplates:
+    reads = 0
+
+    async def get(self, template_id):
+        FakeTemplates.reads += 1
+        return TEMPLATE if template_id == TEMPLATE["_id"] else None
+
+def _stream(monkeypatch, overlays, fail_after=None, **request):
+    roadmaps = FakeRoadmaps(overlays, fail_after)
+    FakeTemplates.reads = 0
+    monkeypatch.setattr(analytics, "RoadmapRepository", lambda: roadmaps)
+    monkeypatch.setattr(analytics, "RoadmapTemplateRepository", FakeTemplates)
+
+    async def run():
+        response = await analytics.stream_batch_progress(ProgressBatchRequest(**request))
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = asyncio.run(run())
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    return chunks, records
+
+def test_one_record_per_session_with_totals_over_its_tracks(monkeypatch):
+    overlays = [_overlay("s2", "t3", completed=3), _overlay("s1", "t1", completed=1), _overlay("s1", "t2", completed=2)]
+    _, records = _stream(monkeypatch, overlays, sessionIds=["s1", "s2"])
+
+    assert [record["sessionId"] for record in records] == ["s1", "s2"]
+    assert (records[0]["completed"], records[0]["total"], records[0]["percent"]) == (3, 6, 50.0)
+    assert [track["trackId"] for track in records[0]["tracks"]] == ["t1", "t2"]
+    assert "weeks" not in records[0]["tracks"][0]
+
+def test_requested_sessions_without_roadmaps_and_unknown_ids_get_zero_records(monkeypatch):
+    _, records = _stream(monkeypatch, [_overlay("s1", "t1", completed=1)],
+                         sessionIds=["s1", "no-roadmap", "not-an-id", "s1"])
+
+    assert [record["sessionId"] for record in records] == ["s1", "no-roadmap", "not-an-id"]
+    assert records[1] == {"sessionId": "no-roadmap", "completed": 0, "total": 0, "percent": 0.0, "tracks": []}
+
+def test_cohort_streams_are_chunked(monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_BATCH_CHUNK_RECORDS", 2)
+    overlays = [_overlay(f"s{n}", f"t{n}") for n in range(5)] + [_overlay("other", "t9", cohort="c2")]
+    chunks, records = _stream(monkeypatch, overlays, cohortId="c1")
+
+    assert [record["sessionId"] for record in records] == [f"s{n}" for n in range(5)]
+    assert [chunk.count("\n") for chunk in chunks] == [2, 2, 1]
+
+def test_overlays_without_counters_are_computed_from_the_bitset(monkeypatch):
+    legacy = _overlay("s1", "t1")
+    del legacy["progress"]
+    legacy["completed"] = empty_bitset(3)
+    legacy["completed"][0] = 0b101
+    second = dict(legacy, trackId="t2")
+    _, records = _stream(monkeypatch, [legacy, second], sessionIds=["s1"], includeWeeks=True)
+
+    (record,) = records
+    assert (record["completed"], record["total"]) == (4, 6)
+    assert record["tracks"][0]["weeks"][0]["completed"] == 1
+    # Each template is read once per stream.
+    assert FakeTemplates.reads == 1
+
+def test_an_interrupted_cursor_ends_the_stream_with_an_error_record(monkeypatch):
+    overlays = [_overlay("s1", "t1"), _overlay("s2", "t2"), _overlay("s3", "t3")]
+    _, records = _stream(monkeypatch, overlays, fail_after=2, cohortId="c1")
+
+    # The cursor died before s2 was known to be complete, so it is not reported with partial totals.
+    assert [record.get("sessionId") for record in records] == ["s1", None]
+    assert records[-1] == {"error": "Progress stream interrupted."}
+
+@pytest.mark.parametrize("request_fields", [{}, {"sessionIds": ["s1"], "cohortId": "c1"}])
+def test_exactly_one_selector_is_required(request_fields):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(analytics.stream_batch_progress(ProgressBatchRequest(**request_fields)))
+    assert error.value.status_code == 400
+
+def test_too_many_session_ids_are_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_BATCH_MAX_SESSIONS", 2)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(analytics.stream_batch_progress(ProgressBatchRequest(sessionIds=["a", "b", "c"])))
+    assert error.value.status_code == 400
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from agents.resume_digest import ResumeDigest, estimate_tokens, split_sections
+
+RESUME = """Jane Doe
+SUMMARY
+Backend engineer with a taste for data.
+
+SKILLS:
+Python, Django, PostgreSQL
+Python, Django, PostgreSQL
+
+EXPERIENCE
+Built data pipelines with Spark and Airflow at Acme.
+Maintained the front-end build of the marketing site.
+
+HOBBIES
+Chess   and   climbing.
+"""
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(ResumeDigest, "_memory_cache", {})
+    monkeypatch.setattr(ResumeDigest, "_file_cache", {})
+
+def test_split_sections_by_heading_compacts_and_deduplicates():
+    sections = split_sections(RESUME)
+    assert [section["heading"] for section in sections] == ["", "SUMMARY", "SKILLS", "EXPERIENCE", "HOBBIES"]
+    assert sections[2]["text"] == "Python, Django, PostgreSQL"
+    assert sections[4]["text"] == "Chess and climbing."
+    assert "airflow" in sections[3]["terms"]
+
+def test_for_domain_keeps_relevant_sections_in_resume_order():
+    digest = ResumeDigest.from_text(RESUME, cache_dir=None)
+    context = digest.for_domain("Data Engineer")
+    assert context.index("SUMMARY") < context.index("SKILLS") < context.index("EXPERIENCE")
+    assert "HOBBIES" not in context and "Jane Doe" not in context
+
+def test_for_domain_truncates_to_the_token_budget():
+    long_resume = "EXPERIENCE\n" + "\n".join(f"Shipped data project number {n} end to end." for n in range(200))
+    digest = ResumeDigest.from_text(long_resume, cache_dir=None)
+    assert digest.raw_tokens > 1000
+    context = digest.for_domain("data", max_tokens=100)
+    assert estimate_tokens(context) <= 100
+    assert context.endswith(" ...")
+
+def test_digest_is_reused_until_the_content_hash_changes(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = ResumeDigest.from_text(RESUME, cache_dir=str(cache_dir))
+    assert ResumeDigest.from_text(RESUME, cache_dir=str(cache_dir)) is first
+    assert os.listdir(cache_dir) == [f"{first.content_hash}.json"]
+
+    edited = ResumeDigest.from_text(RESUME.replace("Spark", "Flink"), cache_dir=str(cache_dir))
+    assert edited.content_hash != first.content_hash
+    assert "Flink" in edited.for_domain("data engineer")
+
+def test_disk_cache_survives_a_restart(tmp_path, monkeypatch):
+    first = ResumeDigest.from_text(RESUME, cache_dir=str(tmp_path))
+    monkeypatch.setattr(ResumeDigest, "_memory_cache", {})
+    reloaded = ResumeDigest.from_text(RESUME, cache_dir=str(tmp_path))
+    assert reloaded is not first
+    assert reloaded.sections == first.sections and reloaded.raw_tokens == first.raw_tokens
+
+def test_from_file_rereads_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "resume.txt"
+    path.write_text(RESUME, encoding="utf-8")
+    first = ResumeDigest.from_file(str(path), cache_dir=None)
+    assert ResumeDigest.from_file(str(path), cache_dir=None) is first
+
+    path.write_text(RESUME + "\nCERTIFICATIONS\nAWS Data Analytics\n", encoding="utf-8")
+    changed = ResumeDigest.from_file(str(path), cache_dir=None)
+    assert changed.content_hash != first.content_hash
+    assert "AWS Data Analytics" in changed.for_domain("data")
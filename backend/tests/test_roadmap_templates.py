@@ -0,0 +1,65 @@
+from roadmap_templates import (
+    BITS_PER_WORD, bit_state_filter, bit_update, build_template, empty_bitset, find_task_index,
+    is_completed, new_overlay, progress_from_bitset, roadmap_weeks
+)
+import pytest
+
+def _template(tasks_per_week, weeks=12):
+    return build_template([
+        {"week": week, "tasks": [{"task": f"w{week}t{i}", "resourceLink": None} for i in range(tasks_per_week)]}
+        for week in range(1, weeks + 1)
+    ])
+
+def _apply_or(bitset, update):
+    (field, operand), = update.items()
+    word = int(field.split(".")[1])
+    if "or" in operand:
+        bitset[word] |= operand["or"]
+    else:
+        bitset[word] &= operand["and"]
+
+def test_empty_bitset_rounds_up_to_whole_words():
+    assert empty_bitset(0) == [0]
+    assert empty_bitset(32) == [0]
+    assert empty_bitset(33) == [0, 0]
+
+def test_bit_update_sets_and_clears_last_bit_of_word():
+    bitset = empty_bitset(64)
+    _apply_or(bitset, bit_update(31, True))
+    assert is_completed(bitset, 31)
+    assert not is_completed(bitset, 30)
+    _apply_or(bitset, bit_update(31, False))
+    assert bitset == [0, 0]
+
+def test_bit_state_filter_uses_bit_positions_for_index_31():
+    # A numeric mask for bit 31 (2147483648) does not fit a signed 32-bit int and MongoDB rejects it.
+    assert bit_state_filter(31, True) == {"completed.0": {"$bitsAllSet": [31]}}
+    assert bit_state_filter(63, False) == {"completed.1": {"$bitsAllClear": [31]}}
+    for index in range(3 * BITS_PER_WORD):
+        (operand,) = bit_state_filter(index, True).values()
+        assert all(0 <= position < BITS_PER_WORD for position in operand["$bitsAllSet"])
+
+def test_progress_from_bitset_counts_per_week():
+    template = _template(tasks_per_week=3)
+    bitset = empty_bitset(template["taskCount"])
+    for week, task in ((1, "w1t0"), (1, "w1t2"), (11, "w11t1")):
+        _apply_or(bitset, bit_update(find_task_index(template, week, task), True))
+
+    progress = progress_from_bitset(template, bitset)
+
+    assert progress["completed"] == 3
+    assert progress["total"] == 36
+    assert progress["weeks"]["1"] == {"completed": 2, "total": 3}
+    assert progress["weeks"]["11"] == {"completed": 1, "total": 3}
+    assert progress["weeks"]["12"] == {"completed": 0, "total": 3}
+
+def test_roadmap_weeks_with_a_missing_template():
+    template = _template(tasks_per_week=1, weeks=2)
+    overlay = new_overlay("s1", "t1", template)
+    assert [week.week for week in roadmap_weeks(overlay, {template["_id"]: template})] == [1, 2]
+    with pytest.raises(LookupError):
+        roadmap_weeks(overlay, {})
+    # Overlays that still embed their weeks fall back to them.
+    overlay["weeks"] = [{"week": 1, "tasks": [{"task": "kept", "isCompleted": True}]}]
+    (week,) = roadmap_weeks(overlay, {})
+    assert week.tasks[0].task == "kept" and week.tasks[0].isCompleted
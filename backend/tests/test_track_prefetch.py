@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+import track_prefetch
+from routes import career
+from track_prefetch import TrackGenerationError, TrackPrefetcher
+
+class FakeGenerator:
+    """Stands in for generate_career_tracks; each call blocks until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = None
+        self.error = None
+
+    async def __call__(self, session_id, domain, level):
+        self.calls.append((session_id, domain, level))
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return [{"_id": f"{session_id}:{level}", "title": f"{domain} ({level})"}]
+
+@pytest.fixture
+def generator(monkeypatch):
+    generator = FakeGenerator()
+    monkeypatch.setattr(track_prefetch, "generate_career_tracks", generator)
+    return generator
+
+def test_attach_returns_the_run_for_the_same_domain_and_level(generator):
+    prefetcher = TrackPrefetcher(max_concurrency=2, ttl_seconds=60)
+
+    async def scenario():
+        generator.release = asyncio.Event()
+        assert prefetcher.start("s1", "Data Scientist", "Beginner")
+        # A second submission of the same level joins the run in flight.
+        assert prefetcher.start("s1", "Data Scientist", "Beginner")
+        task = prefetcher.attach("s1", "Data Scientist", "Beginner")
+        assert prefetcher.attach("s1", "Data Scientist", "Advanced") is None
+        assert prefetcher.attach("s2", "Data Scientist", "Beginner") is None
+        generator.release.set()
+        return await task
+
+    tracks = asyncio.run(scenario())
+    assert tracks == [{"_id": "s1:Beginner", "title": "Data Scientist (Beginner)"}]
+    assert generator.calls == [("s1", "Data Scientist", "Beginner")]
+
+def test_a_new_level_supersedes_the_previous_run(generator):
+    prefetcher = TrackPrefetcher(max_concurrency=2, ttl_seconds=60)
+
+    async def scenario():
+        generator.release = asyncio.Event()
+        prefetcher.start("s1", "Data Scientist", "Beginner")
+        prefetcher.start("s1", "Data Scientist", "Advanced")
+        assert prefetcher.attach("s1", "Data Scientist", "Beginner") is None
+        task = prefetcher.attach("s1", "Data Scientist", "Advanced")
+        generator.release.set()
+        return await task
+
+    assert asyncio.run(scenario())[0]["_id"] == "s1:Advanced"
+    assert len(generator.calls) == 2
+
+def test_tracks_already_generated_for_the_level_are_not_regenerated(generator):
+    prefetcher = TrackPrefetcher(max_concurrency=2, ttl_seconds=60)
+
+    async def scenario():
+        generator.release = asyncio.Event()
+        assert not prefetcher.start("s1", "Data Scientist", "Beginner", tracks_generated_for="Beginner")
+        assert prefetcher.start("s1", "Data Scientist", "Advanced", tracks_generated_for="Beginner")
+        generator.release.set()
+        await prefetcher.attach("s1", "Data Scientist", "Advanced")
+
+    asyncio.run(scenario())
+    assert generator.calls == [("s1", "Data Scientist", "Advanced")]
+
+def test_speculation_is_skipped_beyond_max_concurrency(generator):
+    prefetcher = TrackPrefetcher(max_concurrency=1, ttl_seconds=60)
+
+    async def scenario():
+        generator.release = asyncio.Event()
+        assert prefetcher.start("s1", "Data Scientist", "Beginner")
+        assert not prefetcher.start("s2", "Data Scientist", "Beginner")
+        generator.release.set()
+        await prefetcher.attach("s1", "Data Scientist", "Beginner")
+        # The slot is free again once the run finished.
+        assert prefetcher.start("s2", "Data Scientist", "Beginner")
+        await prefetcher.attach("s2", "Data Scientist", "Beginner")
+
+    asyncio.run(scenario())
+
+def test_a_failed_run_is_dropped_so_the_endpoint_generates_on_demand(generator):
+    prefetcher = TrackPrefetcher(max_concurrency=1, ttl_seconds=60)
+
+    async def scenario():
+        generator.release = asyncio.Event()
+        generator.error = TrackGenerationError("agent down")
+        prefetcher.start("s1", "Data Scientist", "Beginner")
+        generator.release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return prefetcher.attach("s1", "Data Scientist", "Beginner")
+
+    assert asyncio.run(scenario()) is None
+    assert prefetcher._running == 0
+
+def test_career_tracks_fall_back_when_the_attached_run_fails(generator, monkeypatch):
+    prefetcher = TrackPrefetcher(max_concurrency=1, ttl_seconds=60)
+    on_demand = []
+
+    class Sessions:
+        async def get(self, session_id, projection=None):
+            return {"_id": session_id, "domain": "Data Scientist", "level": "Beginner"}
+
+    async def generate(session_id, domain, level):
+        on_demand.append((session_id, domain, level))
+        return [{"_id": "t1", "sessionId": session_id, "title": "Analyst", "avgSalary": "-", "skills": [],
+                 "tools": [], "growth": "-"}]
+
+    monkeypatch.setattr(career, "SessionRepository", Sessions)
+    monkeypatch.setattr(career, "track_prefetcher", prefetcher)
+    monkeypatch.setattr(career, "generate_career_tracks", generate)
+
+    async def scenario():
+        generator.release = asyncio.Event()
+        generator.error = TrackGenerationError("agent down")
+        prefetcher.start("s1", "Data Scientist", "Beginner")
+        # The request attaches while the run is still in flight; the run then fails.
+        request = asyncio.create_task(career.get_career_tracks("s1", fields=None))
+        await asyncio.sleep(0)
+        generator.release.set()
+        return await request
+
+    tracks = asyncio.run(scenario())
+    assert [track.title for track in tracks] == ["Analyst"]
+    assert on_demand == [("s1", "Data Scientist", "Beginner")]
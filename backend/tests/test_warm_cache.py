@@ -0,0 +1,58 @@
+import asyncio
+
+from scripts.warm_cache import RateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def _limiter(monkeypatch, requests_per_minute, tokens_per_minute):
+    clock = FakeClock()
+    monkeypatch.setattr(asyncio, "sleep", clock.sleep)
+    return RateLimiter(requests_per_minute, tokens_per_minute, clock=clock), clock
+
+def test_requests_wait_for_the_window_to_slide(monkeypatch):
+    limiter, clock = _limiter(monkeypatch, requests_per_minute=2, tokens_per_minute=0)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire()
+            clock.now += 1
+
+    asyncio.run(run())
+    # The third request (at +2s) waits until the first one is a minute old.
+    assert clock.sleeps == [58.0]
+
+def test_tokens_per_minute_blocks_until_usage_expires(monkeypatch):
+    limiter, clock = _limiter(monkeypatch, requests_per_minute=0, tokens_per_minute=1000)
+
+    async def run():
+        await limiter.acquire()
+        limiter.record_tokens(600)
+        clock.now += 10
+        await limiter.acquire()
+        limiter.record_tokens(600)
+        clock.now += 10
+        await limiter.acquire()
+
+    asyncio.run(run())
+    assert clock.sleeps == [40.0]
+
+def test_zero_disables_both_limits(monkeypatch):
+    limiter, clock = _limiter(monkeypatch, requests_per_minute=0, tokens_per_minute=0)
+
+    async def run():
+        for _ in range(100):
+            await limiter.acquire()
+            limiter.record_tokens(10_000)
+
+    asyncio.run(run())
+    assert clock.sleeps == []
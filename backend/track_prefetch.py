@@ -0,0 +1,112 @@
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from models import CareerTrackDocument
+from repository import SessionRepository, CareerTrackRepository
+from warm_content import warm_tracks
+
+logger = logging.getLogger(__name__)
+
+class TrackGenerationError(Exception):
+    pass
+
+async def generate_career_tracks(session_id: str, domain: str, level: str) -> List[Dict]:
+    """
+    Stores career tracks for the session, from the warmed cache when available, else from
+    the recommender agent, and returns all of the session's tracks.
+    """
+    llm_recommended_tracks = await warm_tracks(domain, level)
+    if not llm_recommended_tracks:
+        from agents.track_recommender import CareerTrackRecommenderAgent
+
+        recommender_agent = CareerTrackRecommenderAgent(
+            api_key=settings.GROQ_API_KEY,
+            tavily_api_key=settings.TAVILY_API_KEY
+        )
+
+        try:
+            llm_recommended_tracks = await recommender_agent.recommend_tracks(domain, level)
+        except Exception as e:
+            raise TrackGenerationError(f"Failed to generate career tracks due to agent error: {e}")
+
+    if not llm_recommended_tracks:
+        raise TrackGenerationError("Failed to generate any career tracks. Agent returned empty list.")
+
+    track_docs = [
+        CareerTrackDocument(sessionId=session_id, **track_data).model_dump(by_alias=True, exclude_none=True)
+        for track_data in llm_recommended_tracks
+    ]
+    stored_tracks = await CareerTrackRepository().upsert_many(session_id, track_docs)
+    await SessionRepository().mark_tracks_generated(session_id, level)
+    return stored_tracks
+
+class TrackPrefetcher:
+    """
+    Starts career-track generation speculatively as soon as a session's level is known,
+    so ``/career-tracks`` can attach to the in-flight (or finished) run instead of
+    starting from zero. At most ``max_concurrency`` speculative runs execute at once;
+    beyond that, speculation is skipped and the endpoint generates on demand as before.
+    Results are also persisted, so other workers can serve them from Mongo.
+    """
+
+    def __init__(self, max_concurrency: int, ttl_seconds: int):
+        self.max_concurrency = max_concurrency
+        self.ttl_seconds = ttl_seconds
+        self._running = 0
+        self._tasks: Dict[str, Tuple[float, str, str, asyncio.Task]] = {}
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for session_id, (started, _, _, task) in list(self._tasks.items()):
+            if task.done() and now - started > self.ttl_seconds:
+                del self._tasks[session_id]
+
+    def start(self, session_id: str, domain: str, level: str, tracks_generated_for: Optional[str] = None) -> bool:
+        """
+        Begins speculative generation; returns False if it was skipped. ``tracks_generated_for``
+        is the session's stored marker: tracks already generated for ``level`` (e.g. the same
+        quiz submitted again) are served from Mongo, so nothing is generated.
+        """
+        if tracks_generated_for == level:
+            return False
+        self._evict_expired()
+        existing = self._tasks.get(session_id)
+        if existing and existing[1:3] == (domain, level) and not existing[3].done():
+            return True
+        if self._running >= self.max_concurrency:
+            return False
+        self._running += 1
+        task = asyncio.create_task(self._run(session_id, domain, level))
+        # Failures are already logged; mark them retrieved in case nobody attaches.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._tasks[session_id] = (time.monotonic(), domain, level, task)
+        return True
+
+    async def _run(self, session_id: str, domain: str, level: str) -> List[Dict]:
+        try:
+            return await generate_career_tracks(session_id, domain, level)
+        except TrackGenerationError as e:
+            logger.warning("Speculative track generation for session %s failed: %s", session_id, e,
+                           extra={"event": "prefetch.failed"})
+            raise
+        finally:
+            self._running -= 1
+
+    def attach(self, session_id: str, domain: str, level: str) -> Optional[asyncio.Task]:
+        """Returns the speculative run for this session if it matches the current domain and level."""
+        entry = self._tasks.get(session_id)
+        if not entry or entry[1:3] != (domain, level):
+            return None
+        task = entry[3]
+        if task.done() and (task.cancelled() or task.exception() is not None):
+            del self._tasks[session_id]
+            return None
+        return task
+
+track_prefetcher = TrackPrefetcher(
+    max_concurrency=settings.SPECULATIVE_TRACKS_MAX_CONCURRENCY,
+    ttl_seconds=settings.SPECULATIVE_TRACKS_TTL_SECONDS
+)
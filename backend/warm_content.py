@@ -0,0 +1,38 @@
+
+from typing import Dict, List, Optional
+from progress import domain_key
+from repository import WarmContentRepository, RoadmapTemplateRepository
+
+LEVELS = ("Beginner", "Intermediate", "Advanced")
+
+def questions_key(domain: str) -> str:
+    return f"questions:{domain_key(domain)}"
+
+def tracks_key(domain: str, level: str) -> str:
+    return f"tracks:{domain_key(domain)}:{level}"
+
+def roadmap_key(domain: str, level: str) -> str:
+    return f"roadmap:{domain_key(domain)}:{level}"
+
+async def warm_questions(domain: str) -> Optional[List[Dict]]:
+    doc = await WarmContentRepository().get(questions_key(domain))
+    return doc["questions"] if doc else None
+
+async def warm_tracks(domain: str, level: str) -> Optional[List[Dict]]:
+    doc = await WarmContentRepository().get(tracks_key(domain, level))
+    return doc["tracks"] if doc else None
+
+async def warm_template(domain: str, level: str) -> Optional[Dict]:
+    """The pre-generated roadmap template for (domain, level), if the cache was warmed for it."""
+    doc = await WarmContentRepository().get(roadmap_key(domain, level))
+    if not doc:
+        return None
+    return await RoadmapTemplateRepository().get(doc["templateId"])
+
+async def save_warm_template(domain: str, level: str, template: Dict) -> None:
+    """Stores a freshly generated template so later roadmaps for (domain, level) reuse it."""
+    await RoadmapTemplateRepository().ensure(template)
+    await WarmContentRepository().save(roadmap_key(domain, level), {
+        "kind": "roadmap", "domain": domain, "level": level, "templateId": template["_id"],
+        "taskCount": template["taskCount"]
+    })